@@ -0,0 +1,129 @@
+'''
+Инкрементальная синхронизация каталога: path=changes&since=<token>
+
+Триггеры из V0011 пишут в catalog_changes сущность и id каждой изменённой
+строки instructions, training_programs и test_questions. Ответ содержит
+актуальное состояние изменённых записей и id удалённых (tombstones):
+удалённые строки и инструкции/программы не в статусе active.
+
+Токен — txid_snapshot_xmin на момент чтения и время его выдачи. Изменения
+транзакций, которые ещё не завершились, имеют txid не меньше xmin и попадут
+в следующий ответ; записи одной транзакции могут прийти повторно, клиент
+применяет их как upsert.
+
+Вопросы отдаются без правильного ответа: ленту опрашивают клиенты тестируемых.
+Старые записи журнала удаляет триггер из V0015 при записи, чтение ничего не меняет.
+'''
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+import instruction_store
+
+CHANGES_LIMIT = int(os.environ.get('CHANGES_LIMIT', '1000'))
+# Журнал хранится CATALOG_CHANGES_PRUNE_DAYS дней (V0015); токен старше срока хранения
+# требует полной перезагрузки, поэтому срок не может превышать время хранения журнала
+CATALOG_CHANGES_PRUNE_DAYS = 30
+CHANGES_RETENTION_DAYS = min(int(os.environ.get('CHANGES_RETENTION_DAYS', '30')), CATALOG_CHANGES_PRUNE_DAYS)
+
+
+def parse_token(token: str) -> Tuple[int, int]:
+    '''ValueError для токена не из этого API'''
+    xmin, issued_at = token.split('-', 1)
+    return int(xmin), int(issued_at)
+
+
+def current_token(cur) -> str:
+    cur.execute('SELECT txid_snapshot_xmin(txid_current_snapshot()), EXTRACT(EPOCH FROM NOW())::BIGINT')
+    xmin, issued_at = cur.fetchone()
+    return f'{xmin}-{issued_at}'
+
+
+def fetch_instructions(cur, ids: List[int]) -> Dict[int, Dict[str, Any]]:
+    cur.execute(f'''
+        SELECT {instruction_store.INSTRUCTION_FIELDS}
+        FROM instructions
+        WHERE id = ANY(%s) AND status = 'active'
+    ''', (ids,))
+    return {row[0]: instruction_store.row_to_instruction(row) for row in cur.fetchall()}
+
+
+def fetch_programs(cur, ids: List[int]) -> Dict[int, Dict[str, Any]]:
+    cur.execute('''
+        SELECT id, title, description, duration_hours, passing_score
+        FROM training_programs
+        WHERE id = ANY(%s) AND status = 'active'
+    ''', (ids,))
+    return {
+        row[0]: {
+            'id': row[0],
+            'title': row[1],
+            'description': row[2],
+            'duration': f'{row[3]} часов',
+            'passingScore': row[4]
+        }
+        for row in cur.fetchall()
+    }
+
+
+def fetch_questions(cur, ids: List[int]) -> Dict[int, Dict[str, Any]]:
+    cur.execute('''
+        SELECT id, instruction_id, question, option_a, option_b, option_c, option_d
+        FROM test_questions
+        WHERE id = ANY(%s)
+    ''', (ids,))
+    return {
+        row[0]: {
+            'id': str(row[0]),
+            'instructionId': row[1],
+            'question': row[2],
+            'options': [row[3], row[4], row[5], row[6]]
+        }
+        for row in cur.fetchall()
+    }
+
+
+ENTITIES = (
+    ('instruction', 'instructions', fetch_instructions),
+    ('program', 'programs', fetch_programs),
+    ('question', 'questions', fetch_questions),
+)
+
+
+def get_changes(cur, since: Optional[str]) -> Dict[str, Any]:
+    '''
+    Изменения после токена since. reset=True — клиент должен заново загрузить
+    полные списки (нет токена, токен старше срока хранения журнала или
+    изменений больше CHANGES_LIMIT), а затем продолжить с выданного токена.
+    '''
+    token = current_token(cur)
+    if not since:
+        return {'token': token, 'reset': True}
+    xmin, issued_at = parse_token(since)
+    if issued_at < int(token.split('-', 1)[1]) - CHANGES_RETENTION_DAYS * 86400:
+        return {'token': token, 'reset': True}
+
+    cur.execute('''
+        SELECT entity, entity_id
+        FROM catalog_changes
+        WHERE txid >= %s
+        GROUP BY entity, entity_id
+        ORDER BY MAX(id)
+        LIMIT %s
+    ''', (xmin, CHANGES_LIMIT + 1))
+    rows = cur.fetchall()
+    if len(rows) > CHANGES_LIMIT:
+        return {'token': token, 'reset': True}
+
+    changed: Dict[str, List[int]] = {}
+    for entity, entity_id in rows:
+        changed.setdefault(entity, []).append(entity_id)
+
+    result: Dict[str, Any] = {'token': token, 'reset': False}
+    for entity, key, fetch in ENTITIES:
+        ids = changed.get(entity, [])
+        current = fetch(cur, ids) if ids else {}
+        result[key] = {
+            'upserted': [current[entity_id] for entity_id in ids if entity_id in current],
+            'deleted': [entity_id for entity_id in ids if entity_id not in current]
+        }
+    return result
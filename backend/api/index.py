@@ -1,11 +1,367 @@
 import json
 import os
+import io
+import time
+import random
+import hashlib
+import math
+import threading
+from collections import OrderedDict
+import cProfile
+import pstats
 import psycopg2
-from typing import Dict, Any, List, Optional
+import psycopg2.extensions
+import psycopg2.pool
+import instruction_store
+import change_feed
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime, date
 
-def get_db_connection():
-    return psycopg2.connect(os.environ['DATABASE_URL'])
+PROFILE_TOP_N = int(os.environ.get('PROFILE_TOP_N', '25'))
+PROFILE_SLOW_QUERY_MS = float(os.environ.get('PROFILE_SLOW_QUERY_MS', '50'))
+
+# Экземпляр функции обычно обслуживает один запрос за раз, и каждое его соединение
+# остаётся открытым, пока экземпляр прогрет: соединений к Postgres не больше, чем
+# экземпляров × DB_POOL_SIZE, поэтому по умолчанию одно
+DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', '1'))
+# Сколько прогретых экземпляров делят лимит маршрута: ведро токенов у каждого своё
+RATE_LIMIT_INSTANCES = max(1, int(os.environ.get('RATE_LIMIT_INSTANCES', '1')))
+
+IDEMPOTENT_PATHS = {'test-session', 'assignments'}
+IDEMPOTENCY_TTL_HOURS = int(os.environ.get('IDEMPOTENCY_TTL_HOURS', '24'))
+IDEMPOTENCY_PENDING_TIMEOUT_SECONDS = 300
+IDEMPOTENCY_CLEANUP_PROBABILITY = 0.01
+# Длина столбцов idempotency_key и user_key
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+
+class ProfilingCursor(psycopg2.extensions.cursor):
+    '''
+    Курсор для режима профилирования: замеряет каждый запрос и для медленных
+    SELECT записывает в лог план EXPLAIN (ANALYZE, BUFFERS)
+    '''
+    def execute(self, query, vars=None):
+        started = time.perf_counter()
+        result = super().execute(query, vars)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        if elapsed_ms >= PROFILE_SLOW_QUERY_MS:
+            log_slow_query(self.connection, query, vars, elapsed_ms)
+        return result
+
+def log_slow_query(conn, query: str, vars: Any, elapsed_ms: float) -> None:
+    sql = query.strip()
+    print(f'[profile] slow query {elapsed_ms:.1f} ms: {" ".join(sql.split())[:500]}', flush=True)
+    # EXPLAIN ANALYZE выполняет запрос повторно, поэтому только для SELECT: WITH может
+    # содержать INSERT/UPDATE/DELETE, и записи выполнились бы второй раз
+    if not sql.lower().startswith('select'):
+        return
+    # Ошибка EXPLAIN не должна оставлять транзакцию запроса прерванной: откат до точки сохранения
+    savepoint = not conn.autocommit
+    try:
+        # Обычный курсор: иначе медленный EXPLAIN сам попадёт в лог и запустит ещё один EXPLAIN
+        with conn.cursor(cursor_factory=psycopg2.extensions.cursor) as explain_cur:
+            if savepoint:
+                explain_cur.execute('SAVEPOINT profile_explain')
+            try:
+                explain_cur.execute('EXPLAIN (ANALYZE, BUFFERS) ' + sql, vars)
+                plan = '\n'.join(row[0] for row in explain_cur.fetchall())
+            finally:
+                if savepoint:
+                    explain_cur.execute('ROLLBACK TO SAVEPOINT profile_explain')
+                    explain_cur.execute('RELEASE SAVEPOINT profile_explain')
+        print(f'[profile] plan:\n{plan}', flush=True)
+    except Exception as e:
+        print(f'[profile] explain failed: {e}', flush=True)
+
+def is_profiling_requested(event: Dict[str, Any]) -> bool:
+    '''Профилирование включается переменной PROFILE_HANDLER=1 или заголовком X-Profile с токеном PROFILE_TOKEN'''
+    if os.environ.get('PROFILE_HANDLER') == '1':
+        return True
+    token = os.environ.get('PROFILE_TOKEN')
+    if not token:
+        return False
+    headers = event.get('headers') or {}
+    for name, value in headers.items():
+        if name.lower() == 'x-profile':
+            return value == token
+    return False
+
+def get_header(event: Dict[str, Any], name: str) -> Optional[str]:
+    headers = event.get('headers') or {}
+    for header_name, value in headers.items():
+        if header_name.lower() == name.lower():
+            return value
+    return None
+
+def handle_idempotent_request(event: Dict[str, Any], context: Any, profile: bool, path: str, key: str) -> Dict[str, Any]:
+    '''
+    Выполняет POST не более одного раза на Idempotency-Key пользователя.
+    Ключ занимается INSERT ... ON CONFLICT по первичному ключу (scope, user_key, key), поэтому
+    одновременные дубликаты разводит уникальное ограничение, а не блокировки.
+    Повтор получает сохранённый ответ без повторного выполнения; ключ другого
+    пользователя (get_user_key) с тем же значением — отдельный ключ.
+    Маршрут сохраняет ответ в той же транзакции, что и свои записи (commit_response),
+    поэтому ключ с ответом есть ровно тогда, когда записи зафиксированы.
+    '''
+    key = key.strip()
+    if not key or len(key) > IDEMPOTENCY_KEY_MAX_LENGTH:
+        return {
+            'statusCode': 400,
+            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+            'body': json.dumps({'error': f'Idempotency-Key must be 1-{IDEMPOTENCY_KEY_MAX_LENGTH} characters'}, ensure_ascii=False),
+            'isBase64Encoded': False
+        }
+    scope = f'api:{path}'
+    user_key = get_user_key(event)[:IDEMPOTENCY_KEY_MAX_LENGTH]
+    request_hash = hashlib.sha256((scope + '\n' + (event.get('body') or '')).encode('utf-8')).hexdigest()
+    
+    try:
+        conn = get_db_connection(profile)
+        cur = conn.cursor()
+        cur.execute("""
+            INSERT INTO idempotency_keys (idempotency_key, user_key, scope, request_hash, expires_at)
+            VALUES (%s, %s, %s, %s, NOW() + %s * INTERVAL '1 hour')
+            ON CONFLICT (scope, user_key, idempotency_key) DO UPDATE
+                SET request_hash = EXCLUDED.request_hash, status_code = NULL, response_body = NULL,
+                    created_at = NOW(), expires_at = EXCLUDED.expires_at
+                WHERE idempotency_keys.expires_at < NOW()
+                   OR (idempotency_keys.status_code IS NULL
+                       AND idempotency_keys.created_at < NOW() - %s * INTERVAL '1 second')
+            RETURNING idempotency_key
+        """, (key, user_key, scope, request_hash, IDEMPOTENCY_TTL_HOURS, IDEMPOTENCY_PENDING_TIMEOUT_SECONDS))
+        claimed = cur.fetchone() is not None
+        conn.commit()
+        
+        if not claimed:
+            cur.execute("""
+                SELECT request_hash, status_code, response_body
+                FROM idempotency_keys
+                WHERE scope = %s AND user_key = %s AND idempotency_key = %s
+            """, (scope, user_key, key))
+            row = cur.fetchone()
+            if row and row[0] != request_hash:
+                return return_response(conn, cur, {'error': 'Idempotency-Key already used for a different request'}, 422)
+            if not row or row[1] is None:
+                response = return_response(conn, cur, {'error': 'Request with this Idempotency-Key is in progress'}, 409)
+                response['headers']['Retry-After'] = '1'
+                return response
+            cur.close()
+            release_db_connection(conn)
+            return {
+                'statusCode': row[1],
+                'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*', 'Idempotent-Replayed': 'true'},
+                'body': row[2],
+                'isBase64Encoded': False
+            }
+        
+        # Соединение возвращается в пул на время выполнения запроса
+        cur.close()
+        release_db_connection(conn)
+    except Exception as e:
+        if 'cur' in locals():
+            cur.close()
+        if 'conn' in locals():
+            release_db_connection(conn)
+        if is_connection_limit_error(e):
+            return connection_limit_response()
+        return {
+            'statusCode': 500,
+            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+            'body': json.dumps({'error': str(e)}, ensure_ascii=False),
+            'isBase64Encoded': False
+        }
+    
+    response = None
+    try:
+        response = route_request(event, context, profile, (scope, user_key, key))
+    finally:
+        try:
+            finish_idempotent_request(profile, scope, user_key, key, response)
+        except Exception as e:
+            # Ответ отдаётся клиенту; ключ останется незавершённым и освободится
+            # через IDEMPOTENCY_PENDING_TIMEOUT_SECONDS
+            print(f'[idempotency] failed to release {scope} {key!r}: {e}', flush=True)
+    return response
+
+def finish_idempotent_request(profile: bool, scope: str, user_key: str, key: str, response: Optional[Dict[str, Any]]) -> None:
+    '''
+    Освобождает ключ запроса, который не сохранил ответ: его транзакция откатилась
+    (или до записей не дошло), и повтор выполнится заново. Ключ с сохранённым ответом
+    не трогается — записи запроса уже зафиксированы.
+    '''
+    conn = get_db_connection(profile)
+    cur = conn.cursor()
+    try:
+        if response is None or not 200 <= response['statusCode'] < 300:
+            cur.execute("""
+                DELETE FROM idempotency_keys
+                WHERE scope = %s AND user_key = %s AND idempotency_key = %s AND status_code IS NULL
+            """, (scope, user_key, key))
+        if random.random() < IDEMPOTENCY_CLEANUP_PROBABILITY:
+            cur.execute("""
+                DELETE FROM idempotency_keys
+                WHERE ctid IN (SELECT ctid FROM idempotency_keys WHERE expires_at < NOW() LIMIT 1000)
+            """)
+        conn.commit()
+    finally:
+        cur.close()
+        release_db_connection(conn)
+
+class TokenBucket:
+    '''
+    Ведро токенов: rate токенов в секунду, не больше burst накопленных.
+    Токены могут уходить в минус: запрос, ждущий в очереди, уже занял свой токен,
+    и следующий запрос ждёт дольше.
+    '''
+    __slots__ = ('rate', 'burst', 'tokens', 'updated')
+    
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+    
+    def wait_time(self) -> float:
+        '''Сколько секунд ждать токена, если занять его сейчас (0 — токен есть)'''
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        return max(0.0, (1 - self.tokens) / self.rate)
+    
+    def take(self) -> None:
+        self.tokens -= 1
+    
+    def refund(self) -> None:
+        self.tokens = min(self.burst, self.tokens + 1)
+
+class AdmissionController:
+    '''
+    Контроль допуска запросов к Postgres внутри экземпляра функции:
+    ведро токенов на пару (пользователь, маршрут) и на маршрут целиком,
+    плюс общий лимит одновременных запросов, равный размеру пула соединений.
+    Короткие превышения ждут в очереди до ADMISSION_MAX_WAIT_MS (токен занимается
+    до ожидания), остальные получают 429 без списания токенов.
+    Все лимиты действуют в пределах экземпляра: лимит маршрута на всю функцию — это
+    RATE_LIMIT_ROUTE_RPS, поделённый на RATE_LIMIT_INSTANCES прогретых экземпляров,
+    а число экземпляров платформа не ограничивает. Общий предел соединений держит
+    сам Postgres: роли функции задаётся CONNECTION LIMIT ниже max_connections
+    (ALTER ROLE ... CONNECTION LIMIT n), а отказ в соединении сверх него api
+    возвращает как 429 с Retry-After (is_connection_limit_error).
+    '''
+    def __init__(self, concurrency: int, user_rate: float, user_burst: float, route_rate: float,
+                 route_burst: float, max_wait: float, max_buckets: int = 10000):
+        self.slots = threading.BoundedSemaphore(concurrency)
+        self.user_rate = user_rate
+        self.user_burst = user_burst
+        self.route_rate = route_rate
+        self.route_burst = route_burst
+        self.max_wait = max_wait
+        self.max_buckets = max_buckets
+        self.buckets: 'OrderedDict[str, TokenBucket]' = OrderedDict()
+        self.lock = threading.Lock()
+    
+    def _bucket(self, key: str, rate: float, burst: float) -> TokenBucket:
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            bucket = self.buckets[key] = TokenBucket(rate, burst)
+            if len(self.buckets) > self.max_buckets:
+                self.buckets.popitem(last=False)
+        else:
+            self.buckets.move_to_end(key)
+        return bucket
+    
+    def acquire(self, user_key: str, route: str) -> Optional[float]:
+        '''Возвращает None, если запрос допущен (слот занят), иначе Retry-After в секундах'''
+        with self.lock:
+            buckets = (
+                self._bucket(f'user:{user_key}:{route}', self.user_rate, self.user_burst),
+                self._bucket(f'route:{route}', self.route_rate, self.route_burst)
+            )
+            wait = max(bucket.wait_time() for bucket in buckets)
+            # Токен списывается из обоих вёдер или ни из одного
+            if wait > self.max_wait:
+                return wait
+            for bucket in buckets:
+                bucket.take()
+        if wait:
+            time.sleep(wait)
+        remaining = self.max_wait - wait
+        if not self.slots.acquire(timeout=max(remaining, 0.001)):
+            with self.lock:
+                for bucket in buckets:
+                    bucket.refund()
+            return 1.0
+        return None
+    
+    def release(self) -> None:
+        self.slots.release()
+
+def is_connection_limit_error(error: Exception) -> bool:
+    '''Postgres отказал в соединении: исчерпан CONNECTION LIMIT роли или max_connections'''
+    message = str(error)
+    return isinstance(error, psycopg2.OperationalError) and (
+        'too many connections' in message or 'too many clients' in message
+    )
+
+def connection_limit_response() -> Dict[str, Any]:
+    return {
+        'statusCode': 429,
+        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*', 'Retry-After': '1'},
+        'body': json.dumps({'error': 'Too many requests, retry later'}, ensure_ascii=False),
+        'isBase64Encoded': False
+    }
+
+def get_user_key(event: Dict[str, Any]) -> str:
+    user_id = get_header(event, 'X-User-Id') or (event.get('queryStringParameters') or {}).get('user_id')
+    if not user_id and event.get('httpMethod') == 'POST':
+        try:
+            user_id = json.loads(event.get('body') or '{}').get('user_id')
+        except (ValueError, AttributeError):
+            user_id = None
+    if user_id:
+        return str(user_id)
+    identity = (event.get('requestContext') or {}).get('identity') or {}
+    return identity.get('sourceIp', 'anonymous')
+
+_connection_pool = None
+_connection_pool_lock = threading.Lock()
+
+def get_connection_pool() -> psycopg2.pool.ThreadedConnectionPool:
+    global _connection_pool
+    if _connection_pool is None:
+        with _connection_pool_lock:
+            if _connection_pool is None:
+                _connection_pool = psycopg2.pool.ThreadedConnectionPool(1, DB_POOL_SIZE, os.environ['DATABASE_URL'])
+    return _connection_pool
+
+def get_db_connection(profile: bool = False):
+    if profile:
+        return psycopg2.connect(os.environ['DATABASE_URL'], cursor_factory=ProfilingCursor)
+    conn = get_connection_pool().getconn()
+    if conn.closed:
+        get_connection_pool().putconn(conn, close=True)
+        conn = get_connection_pool().getconn()
+    return conn
+
+def release_db_connection(conn) -> None:
+    '''Возвращает соединение в пул; соединения вне пула (режим профилирования) закрываются'''
+    if not conn.closed:
+        try:
+            conn.rollback()
+        except psycopg2.Error:
+            pass
+    try:
+        get_connection_pool().putconn(conn, close=bool(conn.closed))
+    except psycopg2.pool.PoolError:
+        conn.close()
+
+admission = AdmissionController(
+    concurrency=DB_POOL_SIZE,
+    user_rate=float(os.environ.get('RATE_LIMIT_USER_RPS', '2')),
+    user_burst=float(os.environ.get('RATE_LIMIT_USER_BURST', '10')),
+    route_rate=float(os.environ.get('RATE_LIMIT_ROUTE_RPS', '100')) / RATE_LIMIT_INSTANCES,
+    route_burst=float(os.environ.get('RATE_LIMIT_ROUTE_BURST', '200')) / RATE_LIMIT_INSTANCES,
+    max_wait=float(os.environ.get('ADMISSION_MAX_WAIT_MS', '500')) / 1000
+)
 
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     '''
@@ -13,6 +369,24 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     Args: event с httpMethod, path, queryStringParameters, body
     Returns: JSON ответ с данными
     '''
+    if not is_profiling_requested(event):
+        return handle_request(event, context)
+    
+    params = event.get('queryStringParameters') or {}
+    profiler = cProfile.Profile()
+    started = time.perf_counter()
+    profiler.enable()
+    try:
+        return handle_request(event, context, profile=True)
+    finally:
+        profiler.disable()
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        stats_output = io.StringIO()
+        pstats.Stats(profiler, stream=stats_output).sort_stats('cumulative').print_stats(PROFILE_TOP_N)
+        print(f"[profile] {event.get('httpMethod', 'GET')} path={params.get('path', '')} {elapsed_ms:.1f} ms", flush=True)
+        print(stats_output.getvalue(), flush=True)
+
+def handle_request(event: Dict[str, Any], context: Any, profile: bool = False) -> Dict[str, Any]:
     method: str = event.get('httpMethod', 'GET')
     params = event.get('queryStringParameters') or {}
     path = params.get('path', '')
@@ -23,15 +397,43 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             'headers': {
                 'Access-Control-Allow-Origin': '*',
                 'Access-Control-Allow-Methods': 'GET, POST, PUT, OPTIONS',
-                'Access-Control-Allow-Headers': 'Content-Type',
+                'Access-Control-Allow-Headers': 'Content-Type, Idempotency-Key',
                 'Access-Control-Max-Age': '86400'
             },
             'body': '',
             'isBase64Encoded': False
         }
     
+    retry_after = admission.acquire(get_user_key(event), f'{method} {path}')
+    if retry_after is not None:
+        return {
+            'statusCode': 429,
+            'headers': {
+                'Content-Type': 'application/json',
+                'Access-Control-Allow-Origin': '*',
+                'Retry-After': str(max(1, math.ceil(retry_after)))
+            },
+            'body': json.dumps({'error': 'Too many requests, retry later'}, ensure_ascii=False),
+            'isBase64Encoded': False
+        }
+    
+    try:
+        idempotency_key = get_header(event, 'Idempotency-Key')
+        if idempotency_key and method == 'POST' and path in IDEMPOTENT_PATHS:
+            return handle_idempotent_request(event, context, profile, path, idempotency_key)
+        
+        return route_request(event, context, profile)
+    finally:
+        admission.release()
+
+def route_request(event: Dict[str, Any], context: Any, profile: bool = False,
+                  idempotency: Optional[Tuple[str, str, str]] = None) -> Dict[str, Any]:
+    method: str = event.get('httpMethod', 'GET')
+    params = event.get('queryStringParameters') or {}
+    path = params.get('path', '')
+    
     try:
-        conn = get_db_connection()
+        conn = get_db_connection(profile)
         cur = conn.cursor()
         
         if path == 'users' and method == 'GET':
@@ -52,37 +454,10 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                     'email': row[5]
                 })
             
-            return_response(conn, cur, {'users': users})
+            return return_response(conn, cur, {'users': users})
         
         elif path == 'instructions' and method == 'GET':
-            category = params.get('category')
-            industry = params.get('industry')
-            
-            query = "SELECT id, title, category, industry, profession, created_at, updated_at, status FROM instructions WHERE status = 'active'"
-            query_params = []
-            
-            if category:
-                query += " AND category = %s"
-                query_params.append(category)
-            if industry:
-                query += " AND industry = %s"
-                query_params.append(industry)
-            
-            query += " ORDER BY updated_at DESC"
-            
-            cur.execute(query, query_params)
-            
-            instructions = []
-            for row in cur.fetchall():
-                instructions.append({
-                    'id': row[0],
-                    'title': row[1],
-                    'category': row[2],
-                    'industry': row[3],
-                    'profession': row[4],
-                    'lastUpdated': row[6].strftime('%Y-%m-%d') if row[6] else row[5].strftime('%Y-%m-%d')
-                })
-            
+            instructions = instruction_store.list_instructions(cur, params.get('category'), params.get('industry'))
             return return_response(conn, cur, {'instructions': instructions})
         
         elif path == 'instruction' and method == 'GET':
@@ -90,54 +465,42 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             if not instruction_id:
                 return return_response(conn, cur, {'error': 'Missing instruction id'}, 400)
             
-            cur.execute("""
-                SELECT id, title, category, industry, profession, content, created_at, updated_at
-                FROM instructions
-                WHERE id = %s AND status = 'active'
-            """, (instruction_id,))
-            
-            row = cur.fetchone()
-            if not row:
+            section = params.get('section')
+            if section:
+                sections = instruction_store.get_section(cur, instruction_id, section)
+                if not sections:
+                    return return_response(conn, cur, {'error': 'Instruction not found'}, 404)
+                if section != 'toc' and not sections['section']:
+                    return return_response(conn, cur, {'error': 'Section not found', 'sections': sections['sections']}, 404)
+                return return_response(conn, cur, sections)
+            
+            instruction = instruction_store.get_instruction(cur, instruction_id)
+            if not instruction:
                 return return_response(conn, cur, {'error': 'Instruction not found'}, 404)
             
-            instruction = {
-                'id': row[0],
-                'title': row[1],
-                'category': row[2],
-                'industry': row[3],
-                'profession': row[4],
-                'content': row[5],
-                'createdAt': row[6].strftime('%Y-%m-%d') if row[6] else None,
-                'updatedAt': row[7].strftime('%Y-%m-%d') if row[7] else None
-            }
-            
             return return_response(conn, cur, {'instruction': instruction})
         
         elif path == 'instructions' and method == 'POST':
             body_data = json.loads(event.get('body', '{}'))
-            title = body_data.get('title')
-            category = body_data.get('category')
-            industry = body_data.get('industry')
-            profession = body_data.get('profession')
-            content = body_data.get('content')
             created_by = body_data.get('created_by', 1)
             
-            cur.execute("""
-                INSERT INTO instructions (title, category, industry, profession, content, created_by, status)
-                VALUES (%s, %s, %s, %s, %s, %s, 'active')
-                RETURNING id
-            """, (title, category, industry, profession, content, created_by))
-            
-            instruction_id = cur.fetchone()[0]
+            created = instruction_store.create_instruction(cur, body_data, created_by)
             conn.commit()
             
             cur.execute("""
                 INSERT INTO activity_log (user_id, action, subject)
                 VALUES (%s, 'Создал инструкцию', %s)
-            """, (created_by, title))
+            """, (created_by, body_data.get('title')))
             conn.commit()
             
-            return return_response(conn, cur, {'id': instruction_id, 'message': 'Instruction created'})
+            return return_response(conn, cur, {'id': created['id'], 'version': created['version'], 'message': 'Instruction created'})
+        
+        elif path == 'changes' and method == 'GET':
+            try:
+                changes = change_feed.get_changes(cur, params.get('since'))
+            except ValueError:
+                return return_response(conn, cur, {'error': 'Invalid since token'}, 400)
+            return return_response(conn, cur, changes)
         
         elif path == 'programs' and method == 'GET':
             cur.execute("""
@@ -223,7 +586,6 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             """, (user_id, program_id, assigned_by, deadline))
             
             assignment_id = cur.fetchone()[0]
-            conn.commit()
             
             cur.execute("SELECT full_name FROM users WHERE id = %s", (user_id,))
             user_name = cur.fetchone()[0]
@@ -235,12 +597,11 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                 INSERT INTO activity_log (user_id, action, subject)
                 VALUES (%s, 'Назначено обучение', %s)
             """, (user_id, program_name))
-            conn.commit()
             
-            return return_response(conn, cur, {
+            return commit_response(conn, cur, {
                 'id': assignment_id,
                 'message': f'Assignment created for {user_name}'
-            })
+            }, idempotency)
         
         elif path == 'test-questions' and method == 'GET':
             instruction_id = params.get('instruction_id')
@@ -309,8 +670,6 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                 WHERE id = %s
             """, (score, correct_count, session_id))
             
-            conn.commit()
-            
             cur.execute("SELECT title FROM instructions WHERE id = %s", (instruction_id,))
             instruction_title = cur.fetchone()[0]
             
@@ -318,15 +677,14 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                 INSERT INTO activity_log (user_id, action, subject, details)
                 VALUES (%s, %s, %s, %s)
             """, (user_id, 'Завершил тест' if score >= 80 else 'Провалил тест', instruction_title, f'Результат: {score}%'))
-            conn.commit()
             
-            return return_response(conn, cur, {
+            return commit_response(conn, cur, {
                 'session_id': session_id,
                 'score': score,
                 'correct_answers': correct_count,
                 'total_questions': total_questions,
                 'passed': score >= 80
-            })
+            }, idempotency)
         
         elif path == 'activity' and method == 'GET':
             limit = int(params.get('limit', 10))
@@ -380,7 +738,9 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         if 'cur' in locals():
             cur.close()
         if 'conn' in locals():
-            conn.close()
+            release_db_connection(conn)
+        if is_connection_limit_error(e):
+            return connection_limit_response()
         
         return {
             'statusCode': 500,
@@ -391,10 +751,33 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
 
 def return_response(conn, cur, data: Dict[str, Any], status: int = 200) -> Dict[str, Any]:
     cur.close()
-    conn.close()
+    release_db_connection(conn)
     return {
         'statusCode': status,
         'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
         'body': json.dumps(data, ensure_ascii=False),
         'isBase64Encoded': False
-    }
\ No newline at end of file
+    }
+
+def commit_response(conn, cur, data: Dict[str, Any], idempotency: Optional[Tuple[str, str, str]] = None,
+                    status: int = 200) -> Dict[str, Any]:
+    '''
+    Фиксирует транзакцию запроса и возвращает ответ. Для запроса с Idempotency-Key
+    (scope, user_key, key) ответ сохраняется в той же транзакции: повтор получит его,
+    только если записи запроса зафиксированы, и никогда не выполнит их второй раз.
+    '''
+    body = json.dumps(data, ensure_ascii=False)
+    if idempotency:
+        cur.execute("""
+            UPDATE idempotency_keys SET status_code = %s, response_body = %s
+            WHERE scope = %s AND user_key = %s AND idempotency_key = %s
+        """, (status, body, *idempotency))
+    conn.commit()
+    cur.close()
+    release_db_connection(conn)
+    return {
+        'statusCode': status,
+        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+        'body': body,
+        'isBase64Encoded': False
+    }
@@ -0,0 +1,516 @@
+'''
+Хранилище инструкций, общее для backend/api и backend/manage-instructions.
+
+Копия этого файла лежит в обеих функциях (каждая деплоится отдельно);
+tools/sync_shared.py проверяет, что копии совпадают.
+
+Актуальная версия инструкции хранится в строке instructions и читается одним
+запросом по первичному ключу. Каждое изменение увеличивает instructions.version
+и дописывает строку в instruction_revisions со сжатым содержимым.
+'''
+import hashlib
+import io
+import re
+import tempfile
+import zlib
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+INSTRUCTION_FIELDS = 'id, code, title, category, industry, profession, version, content_hash, created_at, updated_at, status'
+INSTRUCTION_CATEGORIES = ('iot', 'job', 'equipment')
+INSTRUCTION_STATUSES = ('active', 'draft', 'archived')
+
+# Ключи стандартных разделов ИОТ по словам из заголовка
+SECTION_KEYS = (
+    ('перед началом', 'before-work'),
+    ('во время', 'during-work'),
+    ('аварийн', 'emergency'),
+    ('по окончании', 'after-work'),
+    ('общие', 'general'),
+)
+MARKDOWN_SECTION_RE = re.compile(r'^##[ \t]+(.+)$', re.M)
+# Длина столбца instruction_sections.heading
+SECTION_HEADING_MAX_LENGTH = 500
+NUMBERED_SECTION_RE = re.compile(r'^(?:#{1,3}[ \t]*)?(?:\d{1,2}|[IVX]{1,5})\.[ \t]+([^\d\s].{0,150})$', re.M)
+
+
+def content_hash(content: Optional[str]) -> str:
+    return hashlib.sha256((content or '').encode('utf-8')).hexdigest()
+
+
+def compress_content(content: Optional[str]) -> bytes:
+    return zlib.compress((content or '').encode('utf-8'), 6)
+
+
+def decompress_content(data: Optional[bytes], encoding: str) -> str:
+    if data is None:
+        return ''
+    raw = bytes(data)
+    if encoding == 'zlib':
+        raw = zlib.decompress(raw)
+    return raw.decode('utf-8')
+
+
+def format_date(value: Any) -> Optional[str]:
+    return value.strftime('%Y-%m-%d') if value else None
+
+
+def row_to_instruction(row: tuple, content: Optional[str] = None) -> Dict[str, Any]:
+    instruction = {
+        'id': row[0],
+        'code': row[1],
+        'title': row[2],
+        'category': row[3],
+        'industry': row[4],
+        'profession': row[5],
+        'version': row[6],
+        'contentHash': row[7],
+        'createdAt': format_date(row[8]),
+        'updatedAt': format_date(row[9]),
+        'lastUpdated': format_date(row[9] or row[8]),
+        'status': row[10]
+    }
+    if content is not None:
+        instruction['content'] = content
+    return instruction
+
+
+def id_condition(instruction_id: Any) -> tuple:
+    '''Инструкцию можно адресовать числовым id или строковым code (идентификаторы из V0006)'''
+    if isinstance(instruction_id, int) or str(instruction_id).isdigit():
+        return 'id = %s', int(instruction_id)
+    return 'code = %s', str(instruction_id)
+
+
+def section_key(heading: str) -> Optional[str]:
+    lowered = heading.lower()
+    for marker, key in SECTION_KEYS:
+        if marker in lowered:
+            return key
+    return None
+
+
+def split_sections(content: Optional[str]) -> List[Dict[str, Any]]:
+    '''
+    Делит текст инструкции на разделы по заголовкам "## ..." (или "1. ..." / "I. ...",
+    если Markdown заголовков нет). Раздел 0 — преамбула до первого заголовка.
+    Тела разделов идут встык, так что их склейка равна исходному тексту.
+    '''
+    content = content or ''
+    matches = list(MARKDOWN_SECTION_RE.finditer(content)) or list(NUMBERED_SECTION_RE.finditer(content))
+    bounds = [(match.start(), match.group(1).strip()[:SECTION_HEADING_MAX_LENGTH]) for match in matches]
+    if not bounds or bounds[0][0] > 0:
+        bounds.insert(0, (0, None))
+    sections = []
+    for ordinal, (start, heading) in enumerate(bounds):
+        end = bounds[ordinal + 1][0] if ordinal + 1 < len(bounds) else len(content)
+        body = content[start:end]
+        sections.append({
+            'ordinal': ordinal,
+            'key': 'preamble' if heading is None else section_key(heading),
+            'heading': heading,
+            'body': body,
+            'hash': content_hash(body)
+        })
+    return sections
+
+
+def sync_sections(cur, instruction_id: int, content: Optional[str]) -> int:
+    '''Переписывает только разделы с изменившимся хешем; возвращает число записанных разделов'''
+    sections = split_sections(content)
+    cur.execute('SELECT ordinal, content_hash FROM instruction_sections WHERE instruction_id = %s', (instruction_id,))
+    existing = dict(cur.fetchall())
+    changed = [section for section in sections if existing.get(section['ordinal']) != section['hash']]
+    for section in changed:
+        cur.execute('''
+            INSERT INTO instruction_sections (instruction_id, ordinal, section_key, heading, body, content_hash)
+            VALUES (%s, %s, %s, %s, %s, %s)
+            ON CONFLICT (instruction_id, ordinal) DO UPDATE
+                SET section_key = EXCLUDED.section_key, heading = EXCLUDED.heading, body = EXCLUDED.body,
+                    content_hash = EXCLUDED.content_hash, updated_at = NOW()
+        ''', (instruction_id, section['ordinal'], section['key'], section['heading'], section['body'], section['hash']))
+    if any(ordinal >= len(sections) for ordinal in existing):
+        cur.execute('DELETE FROM instruction_sections WHERE instruction_id = %s AND ordinal >= %s',
+                    (instruction_id, len(sections)))
+    return len(changed)
+
+
+def section_to_dict(section: Dict[str, Any], with_body: bool) -> Dict[str, Any]:
+    result = {'ordinal': section['ordinal'], 'key': section['key'], 'heading': section['heading']}
+    if with_body:
+        result['content'] = section['body']
+    return result
+
+
+def get_section(cur, instruction_id: Any, section: str, status: Optional[str] = 'active') -> Optional[Dict[str, Any]]:
+    '''
+    Раздел инструкции по номеру или ключу (before-work, emergency, ...) вместе с оглавлением.
+    section="toc" возвращает только оглавление. Для инструкций, сохранённых до появления
+    instruction_sections, разделы вычисляются из content без записи.
+    '''
+    condition, value = id_condition(instruction_id)
+    query = f'''
+        SELECT s.ordinal, s.section_key, s.heading, s.content_hash
+        FROM instructions i
+        JOIN instruction_sections s ON s.instruction_id = i.id
+        WHERE i.{condition}'''
+    query_params: List[Any] = [value]
+    if status:
+        query += ' AND i.status = %s'
+        query_params.append(status)
+    cur.execute(query + ' ORDER BY s.ordinal', query_params)
+    toc = [{'ordinal': row[0], 'key': row[1], 'heading': row[2], 'hash': row[3]} for row in cur.fetchall()]
+    
+    if not toc:
+        instruction = get_instruction(cur, instruction_id, status)
+        if not instruction:
+            return None
+        parsed = split_sections(instruction['content'])
+        toc = [section_to_dict(item, False) for item in parsed]
+        selected = find_section(parsed, section)
+        result = {'id': instruction['id'], 'version': instruction['version'], 'sections': toc}
+        if section != 'toc':
+            result['section'] = section_to_dict(selected, True) if selected else None
+        return result
+    
+    result = {'sections': [section_to_dict(item, False) for item in toc]}
+    if section == 'toc':
+        return result
+    selected = find_section(toc, section)
+    if not selected:
+        result['section'] = None
+        return result
+    cur.execute(f'''
+        SELECT s.body
+        FROM instruction_sections s
+        JOIN instructions i ON i.id = s.instruction_id
+        WHERE i.{condition} AND s.ordinal = %s
+    ''', (value, selected['ordinal']))
+    row = cur.fetchone()
+    result['section'] = {**section_to_dict(selected, False), 'content': row[0] if row else ''}
+    return result
+
+
+def find_section(sections: List[Dict[str, Any]], section: str) -> Optional[Dict[str, Any]]:
+    for item in sections:
+        if str(item['ordinal']) == section or item['key'] == section:
+            return item
+    return None
+
+
+def list_instructions(cur, category: Optional[str] = None, industry: Optional[str] = None,
+                      status: Optional[str] = 'active') -> List[Dict[str, Any]]:
+    query = f'SELECT {INSTRUCTION_FIELDS} FROM instructions WHERE TRUE'
+    query_params: List[Any] = []
+    if status:
+        query += ' AND status = %s'
+        query_params.append(status)
+    if category:
+        query += ' AND category = %s'
+        query_params.append(category)
+    if industry:
+        query += ' AND industry = %s'
+        query_params.append(industry)
+    query += ' ORDER BY updated_at DESC'
+    cur.execute(query, query_params)
+    return [row_to_instruction(row) for row in cur.fetchall()]
+
+
+def get_instruction(cur, instruction_id: Any, status: Optional[str] = 'active') -> Optional[Dict[str, Any]]:
+    condition, value = id_condition(instruction_id)
+    query = f'SELECT {INSTRUCTION_FIELDS}, content FROM instructions WHERE {condition}'
+    query_params: List[Any] = [value]
+    if status:
+        query += ' AND status = %s'
+        query_params.append(status)
+    cur.execute(query, query_params)
+    row = cur.fetchone()
+    if not row:
+        return None
+    return row_to_instruction(row[:-1], row[-1] or '')
+
+
+def append_revision(cur, instruction_id: int, version: int, title: str, content: Optional[str],
+                    digest: str, author_id: Optional[int]) -> None:
+    cur.execute('''
+        INSERT INTO instruction_revisions
+            (instruction_id, version, title, content_compressed, content_encoding, content_hash, created_by)
+        VALUES (%s, %s, %s, %s, 'zlib', %s, %s)
+    ''', (instruction_id, version, title, compress_content(content), digest, author_id))
+
+
+def create_instruction(cur, data: Dict[str, Any], author_id: Optional[int] = None) -> Dict[str, Any]:
+    content = data.get('content') or ''
+    digest = content_hash(content)
+    cur.execute('''
+        INSERT INTO instructions
+            (code, title, category, industry, profession, content, content_hash, version, created_by, status)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, 1, %s, %s)
+        RETURNING id, version
+    ''', (data.get('code'), data.get('title'), data.get('category'), data.get('industry'),
+          data.get('profession'), content, digest, author_id, data.get('status', 'active')))
+    new_id, version = cur.fetchone()
+    append_revision(cur, new_id, version, data.get('title'), content, digest, author_id)
+    sync_sections(cur, new_id, content)
+    return {'id': new_id, 'version': version}
+
+
+def update_instruction(cur, instruction_id: Any, title: str, content: str,
+                       author_id: Optional[int] = None,
+                       expected_version: Optional[int] = None) -> Optional[Dict[str, Any]]:
+    '''
+    Записывает новую версию; None, если инструкции нет.
+    status в результате: updated, unchanged (тот же заголовок и хеш — запись
+    не выполняется) или conflict (версия уже не expected_version, либо её
+    успел поменять параллельный запрос).
+    '''
+    condition, value = id_condition(instruction_id)
+    cur.execute(f'SELECT id, version, title, content_hash FROM instructions WHERE {condition}', (value,))
+    row = cur.fetchone()
+    if not row:
+        return None
+    current_id, current_version, current_title, current_hash = row
+    if expected_version is not None and expected_version != current_version:
+        return {'id': current_id, 'version': current_version, 'status': 'conflict'}
+
+    digest = content_hash(content)
+    if title == current_title and digest == current_hash:
+        return {'id': current_id, 'version': current_version, 'status': 'unchanged', 'sectionsWritten': 0}
+
+    cur.execute('''
+        UPDATE instructions
+        SET title = %s, content = %s, content_hash = %s, version = version + 1, updated_at = NOW()
+        WHERE id = %s AND version = %s
+        RETURNING version
+    ''', (title, content, digest, current_id, current_version))
+    updated = cur.fetchone()
+    if not updated:
+        cur.execute('SELECT version FROM instructions WHERE id = %s', (current_id,))
+        latest = cur.fetchone()
+        return {'id': current_id, 'version': latest[0] if latest else None, 'status': 'conflict'}
+    append_revision(cur, current_id, updated[0], title, content, digest, author_id)
+    sections_written = sync_sections(cur, current_id, content)
+    return {'id': current_id, 'version': updated[0], 'status': 'updated', 'sectionsWritten': sections_written}
+
+
+def archive_instruction(cur, instruction_id: Any, author_id: Optional[int] = None) -> bool:
+    '''
+    Удаление переводит инструкцию в архив: на неё ссылаются вопросы,
+    сессии и программы, а api показывает только активные инструкции.
+    Архивная версия, как и любая другая, получает строку в instruction_revisions.
+    '''
+    condition, value = id_condition(instruction_id)
+    cur.execute(f'''
+        UPDATE instructions
+        SET status = 'archived', version = version + 1, updated_at = NOW()
+        WHERE {condition} AND status <> 'archived'
+        RETURNING id, version, title, content, content_hash
+    ''', (value,))
+    row = cur.fetchone()
+    if not row:
+        return False
+    archived_id, version, title, content, digest = row
+    append_revision(cur, archived_id, version, title, content, digest or content_hash(content), author_id)
+    return True
+
+
+def list_revisions(cur, instruction_id: Any) -> List[Dict[str, Any]]:
+    condition, value = id_condition(instruction_id)
+    cur.execute(f'''
+        SELECT r.version, r.title, r.content_hash, r.created_by, r.created_at
+        FROM instruction_revisions r
+        JOIN instructions i ON i.id = r.instruction_id
+        WHERE i.{condition}
+        ORDER BY r.version DESC
+    ''', (value,))
+    return [
+        {'version': row[0], 'title': row[1], 'contentHash': row[2], 'createdBy': row[3],
+         'createdAt': row[4].strftime('%Y-%m-%d %H:%M') if row[4] else None}
+        for row in cur.fetchall()
+    ]
+
+
+def get_revision(cur, instruction_id: Any, version: int) -> Optional[Dict[str, Any]]:
+    condition, value = id_condition(instruction_id)
+    cur.execute(f'''
+        SELECT r.version, r.title, r.content_compressed, r.content_encoding, r.content_hash, r.created_at
+        FROM instruction_revisions r
+        JOIN instructions i ON i.id = r.instruction_id
+        WHERE i.{condition} AND r.version = %s
+    ''', (value, version))
+    row = cur.fetchone()
+    if not row:
+        return None
+    return {
+        'version': row[0],
+        'title': row[1],
+        'content': decompress_content(row[2], row[3]),
+        'contentHash': row[4],
+        'createdAt': row[5].strftime('%Y-%m-%d %H:%M') if row[5] else None
+    }
+
+
+def copy_field(value: Any) -> str:
+    if value is None:
+        return '\\N'
+    if isinstance(value, bytes):
+        return '\\\\x' + value.hex()
+    text = str(value)
+    return text.replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n').replace('\r', '\\r')
+
+
+class CopyStream(io.RawIOBase):
+    '''Поток строк для COPY FROM STDIN: строки кодируются по мере чтения, а не заранее'''
+    
+    def __init__(self, rows: Iterator[tuple]):
+        self.rows = rows
+        self.pending = b''
+    
+    def readable(self) -> bool:
+        return True
+    
+    def readinto(self, target) -> int:
+        while len(self.pending) < len(target):
+            row = next(self.rows, None)
+            if row is None:
+                break
+            self.pending += ('\t'.join(copy_field(value) for value in row) + '\n').encode('utf-8')
+        size = min(len(target), len(self.pending))
+        target[:size] = self.pending[:size]
+        self.pending = self.pending[size:]
+        return size
+
+
+def validate_import_record(record: Dict[str, Any]) -> Optional[str]:
+    if not record.get('code'):
+        return 'code is required'
+    if not record.get('title'):
+        return 'title is required'
+    if record.get('category', 'iot') not in INSTRUCTION_CATEGORIES:
+        return f"category must be one of {', '.join(INSTRUCTION_CATEGORIES)}"
+    if record.get('status', 'active') not in INSTRUCTION_STATUSES:
+        return f"status must be one of {', '.join(INSTRUCTION_STATUSES)}"
+    return None
+
+
+def bulk_upsert_instructions(cur, records: Iterable[Dict[str, Any]], author_id: Optional[int] = None) -> Dict[str, int]:
+    '''
+    Массовая загрузка по code: COPY во временную таблицу и один INSERT ... ON CONFLICT.
+    Строки, у которых не изменились title, category, industry, profession, status и
+    content_hash, не переписываются и не получают новую ревизию.
+    Разделы делятся в Python во время COPY инструкций, копятся во временном файле и
+    синхронизируются одним INSERT ... SELECT и одним DELETE ... USING для изменённых инструкций.
+    '''
+    cur.execute('''
+        CREATE TEMP TABLE instruction_import (
+            line_no INT, code VARCHAR(255), title VARCHAR(500), category VARCHAR(50), industry VARCHAR(200),
+            profession VARCHAR(200), content TEXT, content_hash CHAR(64), content_compressed BYTEA, status VARCHAR(50)
+        ) ON COMMIT DROP
+    ''')
+    cur.execute('''
+        CREATE TEMP TABLE instruction_section_import (
+            line_no INT, ordinal INT, section_key VARCHAR(50), heading VARCHAR(500), body TEXT, content_hash CHAR(64)
+        ) ON COMMIT DROP
+    ''')
+    
+    with tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024) as section_rows:
+        def rows() -> Iterator[tuple]:
+            for line_no, record in enumerate(records, start=1):
+                content = record.get('content') or ''
+                for section in split_sections(content):
+                    section_rows.write(('\t'.join(copy_field(value) for value in (
+                        line_no, section['ordinal'], section['key'], section['heading'], section['body'], section['hash']
+                    )) + '\n').encode('utf-8'))
+                yield (line_no, record['code'], record['title'], record.get('category', 'iot'), record.get('industry'),
+                       record.get('profession'), content, content_hash(content), compress_content(content),
+                       record.get('status', 'active'))
+        
+        cur.copy_expert(
+            'COPY instruction_import (line_no, code, title, category, industry, profession, content, content_hash, '
+            'content_compressed, status) FROM STDIN',
+            CopyStream(rows())
+        )
+        section_rows.seek(0)
+        cur.copy_expert(
+            'COPY instruction_section_import (line_no, ordinal, section_key, heading, body, content_hash) FROM STDIN',
+            section_rows
+        )
+    
+    cur.execute('''
+        WITH incoming AS (
+            SELECT DISTINCT ON (code) *
+            FROM instruction_import
+            ORDER BY code, line_no DESC
+        ),
+        upserted AS (
+            INSERT INTO instructions
+                (code, title, category, industry, profession, content, content_hash, version, created_by, status)
+            SELECT code, title, category, industry, profession, content, content_hash, 1, %s, status
+            FROM incoming
+            ON CONFLICT (code) DO UPDATE
+                SET title = EXCLUDED.title, category = EXCLUDED.category, industry = EXCLUDED.industry,
+                    profession = EXCLUDED.profession, content = EXCLUDED.content,
+                    content_hash = EXCLUDED.content_hash, status = EXCLUDED.status,
+                    version = instructions.version + 1, updated_at = NOW()
+                WHERE instructions.content_hash IS DISTINCT FROM EXCLUDED.content_hash
+                   OR instructions.title IS DISTINCT FROM EXCLUDED.title
+                   OR instructions.category IS DISTINCT FROM EXCLUDED.category
+                   OR instructions.industry IS DISTINCT FROM EXCLUDED.industry
+                   OR instructions.profession IS DISTINCT FROM EXCLUDED.profession
+                   OR instructions.status IS DISTINCT FROM EXCLUDED.status
+            RETURNING id, code, version, (xmax = 0) AS inserted
+        ),
+        revisions AS (
+            INSERT INTO instruction_revisions
+                (instruction_id, version, title, content_compressed, content_encoding, content_hash, created_by)
+            SELECT u.id, u.version, i.title, i.content_compressed, 'zlib', i.content_hash, %s
+            FROM upserted u
+            JOIN incoming i ON i.code = u.code
+        )
+        SELECT u.id, u.inserted
+        FROM upserted u
+    ''', (author_id, author_id))
+    changed = cur.fetchall()
+    inserted = sum(1 for _, is_new in changed if is_new)
+    
+    cur.execute('SELECT COUNT(DISTINCT code) FROM instruction_import')
+    total = cur.fetchone()[0]
+    
+    # Разделы пересобираются только у вставленных и изменённых инструкций:
+    # разделы последней строки каждого code, записываются только изменившиеся по хешу
+    changed_ids = [instruction_id for instruction_id, _ in changed]
+    sections_written = 0
+    if changed_ids:
+        cur.execute('''
+            CREATE TEMP TABLE instruction_section_sync ON COMMIT DROP AS
+            SELECT ins.id AS instruction_id, s.ordinal, s.section_key, s.heading, s.body, s.content_hash
+            FROM (
+                SELECT DISTINCT ON (code) code, line_no
+                FROM instruction_import
+                ORDER BY code, line_no DESC
+            ) latest
+            JOIN instructions ins ON ins.code = latest.code
+            JOIN instruction_section_import s ON s.line_no = latest.line_no
+            WHERE ins.id = ANY(%s)
+        ''', (changed_ids,))
+        cur.execute('''
+            INSERT INTO instruction_sections (instruction_id, ordinal, section_key, heading, body, content_hash)
+            SELECT instruction_id, ordinal, section_key, heading, body, content_hash
+            FROM instruction_section_sync
+            ON CONFLICT (instruction_id, ordinal) DO UPDATE
+                SET section_key = EXCLUDED.section_key, heading = EXCLUDED.heading, body = EXCLUDED.body,
+                    content_hash = EXCLUDED.content_hash, updated_at = NOW()
+                WHERE instruction_sections.content_hash IS DISTINCT FROM EXCLUDED.content_hash
+        ''')
+        sections_written = cur.rowcount
+        cur.execute('''
+            DELETE FROM instruction_sections old
+            USING (
+                SELECT instruction_id, COUNT(*) AS sections
+                FROM instruction_section_sync
+                GROUP BY instruction_id
+            ) synced
+            WHERE old.instruction_id = synced.instruction_id AND old.ordinal >= synced.sections
+        ''')
+    
+    return {'total': total, 'inserted': inserted, 'updated': len(changed) - inserted,
+            'unchanged': total - len(changed), 'sectionsWritten': sections_written}
@@ -0,0 +1,143 @@
+'''
+Пакетная генерация документов в ZIP-архив
+
+Спецификации {type, title, category, prompt} рендерятся в пуле из
+BATCH_WORKERS потоков. В работе одновременно не больше 2 * BATCH_WORKERS
+документов: следующая спецификация отправляется в пул, только когда готовый
+документ записан в архив, поэтому память не растёт с размером пакета, кроме
+самого сжатого архива (ограничен MAX_BATCH_DOCUMENTS).
+
+Документы пишутся в архив в порядке готовности под именами
+<номер>-<заголовок>.<расширение>, номер — позиция в запросе. Последним
+записывается manifest.json: для каждого документа имя файла, тип, заголовок,
+размер и sha256 содержимого. Ошибка рендера одного документа не прерывает
+пакет: в манифест попадает error вместо файла.
+
+Архив пишется во временный файл (в памяти до BATCH_SPOOL_BYTES) и прерывается
+ArchiveTooLarge, как только сжатые записи превышают MAX_BATCH_ARCHIVE_BYTES;
+ответ кодируется в base64 кусками прямо из файла.
+'''
+import base64
+import hashlib
+import json
+import os
+import re
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, BinaryIO, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+MAX_BATCH_DOCUMENTS = int(os.environ.get('MAX_BATCH_DOCUMENTS', '200'))
+BATCH_WORKERS = int(os.environ.get('BATCH_WORKERS', '4'))
+MAX_BATCH_ARCHIVE_BYTES = int(os.environ.get('MAX_BATCH_ARCHIVE_MB', '32')) * 1024 * 1024
+BATCH_SPOOL_BYTES = 4 * 1024 * 1024
+# Кратно 3, чтобы куски base64 склеивались без заполнителей
+BASE64_CHUNK = 3 * 256 * 1024
+NAME_RE = re.compile(r'[^\w.-]+')
+
+
+class ArchiveTooLarge(ValueError):
+    pass
+
+
+class DocumentSpec(NamedTuple):
+    type: str
+    title: str
+    category: str
+    prompt: str
+
+
+def parse_specs(items: Any) -> List[DocumentSpec]:
+    '''ValueError с номером первой неверной спецификации'''
+    if not isinstance(items, list) or not items:
+        raise ValueError('documents must be a non-empty list')
+    if len(items) > MAX_BATCH_DOCUMENTS:
+        raise ValueError(f'at most {MAX_BATCH_DOCUMENTS} documents per batch')
+    specs = []
+    for number, item in enumerate(items, 1):
+        if not isinstance(item, dict):
+            raise ValueError(f'document {number}: expected an object')
+        spec = DocumentSpec(*(str(item.get(field) or '') for field in DocumentSpec._fields))
+        if not all([spec.type, spec.title, spec.prompt]):
+            raise ValueError(f'document {number}: type, title and prompt are required')
+        specs.append(spec)
+    return specs
+
+
+def entry_name(number: int, spec: DocumentSpec, extension: str) -> str:
+    slug = NAME_RE.sub('-', spec.title).strip('-.')[:80] or 'document'
+    return f'{number:03d}-{slug}.{extension}'
+
+
+def render_safely(render: Callable[[DocumentSpec], bytes], spec: DocumentSpec) -> Tuple[Optional[bytes], str]:
+    '''(документ, '') или (None, ошибка); FileNotFoundError (нет шрифта и т.п.) касается всего пакета'''
+    try:
+        return render(spec), ''
+    except FileNotFoundError:
+        raise
+    except Exception as e:
+        return None, f'{type(e).__name__}: {e}'
+
+
+def render_concurrently(specs: Iterable[DocumentSpec], render: Callable[[DocumentSpec], bytes],
+                        workers: int = BATCH_WORKERS) -> Iterator[Tuple[int, Optional[bytes], str]]:
+    '''(номер спецификации с 1, документ или None, ошибка) в порядке готовности'''
+    pending: Dict[Future, int] = {}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        try:
+            for number, spec in enumerate(specs, 1):
+                pending[pool.submit(render_safely, render, spec)] = number
+                if len(pending) < 2 * workers:
+                    continue
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield (pending.pop(future), *future.result())
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield (pending.pop(future), *future.result())
+        finally:
+            # Прерванный пакет (ArchiveTooLarge, ошибка) не дорендеривает очередь
+            for future in pending:
+                future.cancel()
+
+
+def write_archive(out: BinaryIO, specs: List[DocumentSpec], render: Callable[[DocumentSpec], bytes],
+                  extension: str, metadata: Dict[str, Any], workers: int = BATCH_WORKERS,
+                  max_bytes: int = MAX_BATCH_ARCHIVE_BYTES) -> List[Dict[str, Any]]:
+    '''Пишет архив в out (поток может быть без seek) и возвращает манифест'''
+    manifest = []
+    written = 0
+    with zipfile.ZipFile(out, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for number, data, error in render_concurrently(specs, render, workers):
+            spec = specs[number - 1]
+            if data is None:
+                manifest.append({'number': number, 'type': spec.type, 'title': spec.title, 'error': error})
+                continue
+            name = entry_name(number, spec, extension)
+            archive.writestr(name, data)
+            written += archive.getinfo(name).compress_size
+            if written > max_bytes:
+                raise ArchiveTooLarge(f'archive exceeds {max_bytes / (1024 * 1024):g} MB, split the batch')
+            manifest.append({
+                'number': number,
+                'file': name,
+                'type': spec.type,
+                'title': spec.title,
+                'bytes': len(data),
+                'sha256': hashlib.sha256(data).hexdigest()
+            })
+        manifest.sort(key=lambda entry: entry['number'])
+        archive.writestr('manifest.json', json.dumps(
+            dict(metadata, failed=sum('error' in entry for entry in manifest), documents=manifest),
+            ensure_ascii=False, indent=2
+        ))
+    return manifest
+
+
+def read_base64(stream: BinaryIO) -> str:
+    '''Содержимое потока в base64 без промежуточной копии всего архива'''
+    stream.seek(0)
+    parts = []
+    for chunk in iter(lambda: stream.read(BASE64_CHUNK), b''):
+        parts.append(base64.b64encode(chunk))
+    return b''.join(parts).decode('ascii')
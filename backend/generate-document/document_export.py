@@ -0,0 +1,31 @@
+'''
+Экспорт Markdown документа generate-document в файл: md, docx или pdf
+
+DOCX и PDF собираются на CPU без сети и внешних библиотек (docx_writer.py,
+pdf_writer.py); для PDF нужен TrueType шрифт с кириллицей. Модули писателей
+импортируются при первом экспорте, чтобы не замедлять холодный старт для md.
+'''
+import io
+from typing import Dict, Tuple
+
+# формат -> (Content-Type, расширение файла)
+FORMATS: Dict[str, Tuple[str, str]] = {
+    'md': ('text/markdown; charset=utf-8', 'md'),
+    'docx': ('application/vnd.openxmlformats-officedocument.wordprocessingml.document', 'docx'),
+    'pdf': ('application/pdf', 'pdf'),
+}
+
+
+def export_document(markdown: str, title: str, export_format: str) -> bytes:
+    if export_format == 'md':
+        return markdown.encode('utf-8')
+    out = io.BytesIO()
+    if export_format == 'docx':
+        import docx_writer
+        docx_writer.write_docx(out, markdown, title)
+    elif export_format == 'pdf':
+        import pdf_writer
+        pdf_writer.write_pdf(out, markdown, title)
+    else:
+        raise ValueError(f'unknown format {export_format!r}')
+    return out.getvalue()
@@ -0,0 +1,159 @@
+'''
+Экспорт документа в DOCX (OOXML) без внешних библиотек
+
+Архив пишется потоково: статические части (стили, нумерация списков,
+связи) — готовые строки, а word/document.xml собирается по блоку из
+markdown_blocks прямо в запись ZIP, поэтому в памяти не держится весь XML.
+Время записей фиксировано, так что одинаковый Markdown даёт одинаковый файл
+(и одинаковый sha256 в манифесте пакета).
+'''
+import re
+import zipfile
+from typing import BinaryIO, Iterable, Tuple
+
+from markdown_blocks import Block, Run, parse_blocks
+
+ZIP_DATE = (1980, 1, 1, 0, 0, 0)
+INVALID_XML_RE = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]')
+XML_ESCAPES = str.maketrans({'&': '&amp;', '<': '&lt;', '>': '&gt;'})
+HEADING_STYLES = {1: 'Heading1', 2: 'Heading2', 3: 'Heading3'}
+CELL_SPACING = '<w:spacing w:after="0"/>'
+NUMBERED_INDENT = '<w:tabs><w:tab w:val="left" w:pos="567"/></w:tabs><w:spacing w:after="60"/><w:ind w:left="567" w:hanging="283"/>'
+# A4 и поля 2 см в twips
+PAGE_SECTION = ('<w:sectPr><w:pgSz w:w="11906" w:h="16838"/>'
+                '<w:pgMar w:top="1134" w:right="1134" w:bottom="1134" w:left="1134" '
+                'w:header="709" w:footer="709" w:gutter="0"/></w:sectPr>')
+
+W_NS = 'xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"'
+
+CONTENT_TYPES = '''<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">
+<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>
+<Default Extension="xml" ContentType="application/xml"/>
+<Override PartName="/word/document.xml" ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>
+<Override PartName="/word/styles.xml" ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.styles+xml"/>
+<Override PartName="/word/numbering.xml" ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.numbering+xml"/>
+<Override PartName="/docProps/core.xml" ContentType="application/vnd.openxmlformats-package.core-properties+xml"/>
+</Types>'''
+
+ROOT_RELS = '''<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="word/document.xml"/>
+<Relationship Id="rId2" Type="http://schemas.openxmlformats.org/package/2006/relationships/metadata/core-properties" Target="docProps/core.xml"/>
+</Relationships>'''
+
+DOCUMENT_RELS = '''<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" Target="styles.xml"/>
+<Relationship Id="rId2" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/numbering" Target="numbering.xml"/>
+</Relationships>'''
+
+STYLES = f'''<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<w:styles {W_NS}>
+<w:docDefaults>
+<w:rPrDefault><w:rPr><w:rFonts w:ascii="Arial" w:hAnsi="Arial" w:cs="Arial" w:eastAsia="Arial"/><w:sz w:val="22"/><w:lang w:val="ru-RU"/></w:rPr></w:rPrDefault>
+<w:pPrDefault><w:pPr><w:spacing w:after="120" w:line="276" w:lineRule="auto"/></w:pPr></w:pPrDefault>
+</w:docDefaults>
+<w:style w:type="paragraph" w:default="1" w:styleId="Normal"><w:name w:val="Normal"/></w:style>
+<w:style w:type="paragraph" w:styleId="Heading1"><w:name w:val="heading 1"/><w:basedOn w:val="Normal"/><w:next w:val="Normal"/><w:pPr><w:keepNext/><w:spacing w:before="240" w:after="240"/><w:outlineLvl w:val="0"/></w:pPr><w:rPr><w:b/><w:sz w:val="36"/></w:rPr></w:style>
+<w:style w:type="paragraph" w:styleId="Heading2"><w:name w:val="heading 2"/><w:basedOn w:val="Normal"/><w:next w:val="Normal"/><w:pPr><w:keepNext/><w:spacing w:before="240" w:after="160"/><w:outlineLvl w:val="1"/></w:pPr><w:rPr><w:b/><w:sz w:val="30"/></w:rPr></w:style>
+<w:style w:type="paragraph" w:styleId="Heading3"><w:name w:val="heading 3"/><w:basedOn w:val="Normal"/><w:next w:val="Normal"/><w:pPr><w:keepNext/><w:spacing w:before="200" w:after="120"/><w:outlineLvl w:val="2"/></w:pPr><w:rPr><w:b/><w:sz w:val="26"/></w:rPr></w:style>
+<w:style w:type="paragraph" w:styleId="Heading4"><w:name w:val="heading 4"/><w:basedOn w:val="Normal"/><w:next w:val="Normal"/><w:pPr><w:keepNext/><w:spacing w:before="160" w:after="80"/><w:outlineLvl w:val="3"/></w:pPr><w:rPr><w:b/><w:sz w:val="24"/></w:rPr></w:style>
+<w:style w:type="paragraph" w:styleId="ListBullet"><w:name w:val="List Bullet"/><w:basedOn w:val="Normal"/><w:pPr><w:numPr><w:numId w:val="1"/></w:numPr><w:spacing w:after="60"/></w:pPr></w:style>
+<w:style w:type="table" w:styleId="TableGrid"><w:name w:val="Table Grid"/><w:tblPr><w:tblBorders>
+<w:top w:val="single" w:sz="4" w:space="0" w:color="000000"/><w:left w:val="single" w:sz="4" w:space="0" w:color="000000"/>
+<w:bottom w:val="single" w:sz="4" w:space="0" w:color="000000"/><w:right w:val="single" w:sz="4" w:space="0" w:color="000000"/>
+<w:insideH w:val="single" w:sz="4" w:space="0" w:color="000000"/><w:insideV w:val="single" w:sz="4" w:space="0" w:color="000000"/>
+</w:tblBorders><w:tblCellMar><w:left w:w="108" w:type="dxa"/><w:right w:w="108" w:type="dxa"/></w:tblCellMar></w:tblPr></w:style>
+</w:styles>'''
+
+NUMBERING = f'''<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<w:numbering {W_NS}>
+<w:abstractNum w:abstractNumId="0"><w:multiLevelType w:val="singleLevel"/>
+<w:lvl w:ilvl="0"><w:start w:val="1"/><w:numFmt w:val="bullet"/><w:lvlText w:val="•"/><w:lvlJc w:val="left"/><w:pPr><w:ind w:left="567" w:hanging="283"/></w:pPr></w:lvl>
+</w:abstractNum>
+<w:num w:numId="1"><w:abstractNumId w:val="0"/></w:num>
+</w:numbering>'''
+
+
+def xml_text(text: str) -> str:
+    return INVALID_XML_RE.sub('', text).translate(XML_ESCAPES)
+
+
+def runs_xml(runs: Iterable[Run]) -> str:
+    parts = []
+    for run in runs:
+        properties = ('<w:b/>' if run.bold else '') + ('<w:i/>' if run.italic else '')
+        properties = f'<w:rPr>{properties}</w:rPr>' if properties else ''
+        lines = run.text.split('\n')
+        for number, line in enumerate(lines):
+            content = f'<w:t xml:space="preserve">{xml_text(line)}</w:t>' if line else ''
+            brk = '<w:br/>' if number < len(lines) - 1 else ''
+            if content or brk:
+                parts.append(f'<w:r>{properties}{content}{brk}</w:r>')
+    return ''.join(parts)
+
+
+def paragraph_xml(runs: Iterable[Run], style: str = '', extra: str = '') -> str:
+    properties = (f'<w:pStyle w:val="{style}"/>' if style else '') + extra
+    properties = f'<w:pPr>{properties}</w:pPr>' if properties else ''
+    return f'<w:p>{properties}{runs_xml(runs)}</w:p>'
+
+
+def table_xml(rows: Tuple[Tuple[Tuple[Run, ...], ...], ...]) -> str:
+    columns = len(rows[0]) if rows else 0
+    grid = ''.join('<w:gridCol/>' for _ in range(columns))
+    body = []
+    for number, row in enumerate(rows):
+        header = '<w:trPr><w:tblHeader/></w:trPr>' if number == 0 else ''
+        cells = ''.join(
+            f'<w:tc><w:tcPr><w:tcW w:w="0" w:type="auto"/></w:tcPr>{paragraph_xml(cell, extra=CELL_SPACING)}</w:tc>'
+            for cell in row
+        )
+        body.append(f'<w:tr>{header}{cells}</w:tr>')
+    return (f'<w:tbl><w:tblPr><w:tblStyle w:val="TableGrid"/><w:tblW w:w="5000" w:type="pct"/></w:tblPr>'
+            f'<w:tblGrid>{grid}</w:tblGrid>{"".join(body)}</w:tbl>' + paragraph_xml(()))
+
+
+def block_xml(block: Block) -> str:
+    if block.kind == 'heading':
+        return paragraph_xml(block.runs, HEADING_STYLES.get(block.level, 'Heading4'))
+    if block.kind == 'bullet':
+        return paragraph_xml(block.runs, 'ListBullet')
+    if block.kind == 'numbered':
+        # Номер из исходного текста, а не автонумерация Word: список может начинаться не с 1
+        return paragraph_xml((Run(f'{block.level}.\t'),) + block.runs, extra=NUMBERED_INDENT)
+    if block.kind == 'table':
+        return table_xml(block.rows)
+    if block.kind == 'rule':
+        return paragraph_xml((), extra='<w:pBdr><w:bottom w:val="single" w:sz="6" w:space="1" w:color="808080"/></w:pBdr>')
+    return paragraph_xml(block.runs)
+
+
+def core_xml(title: str) -> str:
+    return f'''<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<cp:coreProperties xmlns:cp="http://schemas.openxmlformats.org/package/2006/metadata/core-properties" xmlns:dc="http://purl.org/dc/elements/1.1/">
+<dc:title>{xml_text(title)}</dc:title><dc:creator>ГорТех Аттестация</dc:creator>
+</cp:coreProperties>'''
+
+
+def write_entry(archive: zipfile.ZipFile, name: str, text: str) -> None:
+    archive.writestr(zipfile.ZipInfo(name, ZIP_DATE), text.encode('utf-8'), compress_type=zipfile.ZIP_DEFLATED)
+
+
+def write_docx(out: BinaryIO, markdown: str, title: str) -> None:
+    '''DOCX в поток out (seek не нужен)'''
+    with zipfile.ZipFile(out, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        write_entry(archive, '[Content_Types].xml', CONTENT_TYPES)
+        write_entry(archive, '_rels/.rels', ROOT_RELS)
+        write_entry(archive, 'word/_rels/document.xml.rels', DOCUMENT_RELS)
+        write_entry(archive, 'word/styles.xml', STYLES)
+        write_entry(archive, 'word/numbering.xml', NUMBERING)
+        write_entry(archive, 'docProps/core.xml', core_xml(title))
+        info = zipfile.ZipInfo('word/document.xml', ZIP_DATE)
+        info.compress_type = zipfile.ZIP_DEFLATED
+        with archive.open(info, 'w') as document:
+            document.write(f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n<w:document {W_NS}><w:body>'.encode('utf-8'))
+            for block in parse_blocks(markdown):
+                document.write(block_xml(block).encode('utf-8'))
+            document.write(f'{PAGE_SECTION}</w:body></w:document>'.encode('utf-8'))
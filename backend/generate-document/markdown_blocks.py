@@ -0,0 +1,118 @@
+'''
+Разбор Markdown документов generate-document на блоки для экспорта
+
+Поддерживается то, что встречается в шаблонах: заголовки #..######, абзацы
+(строка с двумя пробелами в конце — перенос строки), списки "- " и "1. ", таблицы
+с "|", разделитель "---", **жирный** и *курсив*. Остальное (в том числе текст
+из prompt) выводится как обычный текст.
+'''
+import re
+from typing import Iterator, List, NamedTuple, Tuple
+
+HEADING_RE = re.compile(r'^(#{1,6})\s+(.*?)\s*#*\s*$')
+BULLET_RE = re.compile(r'^\s*[-*+]\s+(.*)$')
+NUMBERED_RE = re.compile(r'^\s*(\d+)\.\s+(.*)$')
+RULE_RE = re.compile(r'^\s*(?:-{3,}|\*{3,}|_{3,})\s*$')
+TABLE_SEPARATOR_RE = re.compile(r'^\s*\|?\s*:?-{2,}:?\s*(\|\s*:?-{2,}:?\s*)*\|?\s*$')
+INLINE_RE = re.compile(r'\*\*(?=\S)(.+?)(?<=\S)\*\*|\*(?=[^\s*])(.+?)(?<=[^\s*])\*')
+
+
+class Run(NamedTuple):
+    text: str
+    bold: bool = False
+    italic: bool = False
+
+
+class Block(NamedTuple):
+    # heading | paragraph | bullet | numbered | table | rule
+    kind: str
+    runs: Tuple[Run, ...] = ()
+    # уровень заголовка или номер пункта списка
+    level: int = 0
+    rows: Tuple[Tuple[Tuple[Run, ...], ...], ...] = ()
+
+
+def parse_inline(text: str, bold: bool = False) -> Tuple[Run, ...]:
+    '''Текст с **жирным** и *курсивом*; "\\n" в тексте — перенос строки'''
+    runs: List[Run] = []
+    position = 0
+    for match in INLINE_RE.finditer(text):
+        if match.start() > position:
+            runs.append(Run(text[position:match.start()], bold))
+        if match.group(1) is not None:
+            runs.append(Run(match.group(1), True))
+        else:
+            runs.append(Run(match.group(2), bold, True))
+        position = match.end()
+    if position < len(text):
+        runs.append(Run(text[position:], bold))
+    return tuple(runs)
+
+
+def split_row(line: str) -> List[str]:
+    cells = line.strip()
+    if cells.startswith('|'):
+        cells = cells[1:]
+    if cells.endswith('|'):
+        cells = cells[:-1]
+    return [cell.strip() for cell in cells.split('|')]
+
+
+def parse_blocks(markdown: str) -> Iterator[Block]:
+    lines = markdown.replace('\r\n', '\n').replace('\r', '\n').split('\n')
+    paragraph: List[str] = []
+
+    def flush() -> Iterator[Block]:
+        if paragraph:
+            text = ''
+            for line in paragraph:
+                hard_break = line.endswith('  ')
+                text += line.strip() + ('\n' if hard_break else ' ')
+            yield Block('paragraph', parse_inline(text.rstrip()))
+            paragraph.clear()
+
+    index = 0
+    while index < len(lines):
+        line = lines[index]
+        index += 1
+        if not line.strip():
+            yield from flush()
+            continue
+        heading = HEADING_RE.match(line)
+        if heading:
+            yield from flush()
+            yield Block('heading', parse_inline(heading.group(2)), level=len(heading.group(1)))
+            continue
+        if RULE_RE.match(line):
+            yield from flush()
+            yield Block('rule')
+            continue
+        if line.lstrip().startswith('|'):
+            yield from flush()
+            rows = [split_row(line)]
+            while index < len(lines) and lines[index].lstrip().startswith('|'):
+                if not TABLE_SEPARATOR_RE.match(lines[index]):
+                    rows.append(split_row(lines[index]))
+                index += 1
+            width = max(len(row) for row in rows)
+            yield Block('table', rows=tuple(
+                tuple(parse_inline(cell, bold=number == 0) for cell in row + [''] * (width - len(row)))
+                for number, row in enumerate(rows)
+            ))
+            continue
+        bullet = BULLET_RE.match(line)
+        if bullet:
+            yield from flush()
+            yield Block('bullet', parse_inline(bullet.group(1).strip()))
+            continue
+        numbered = NUMBERED_RE.match(line)
+        if numbered:
+            yield from flush()
+            yield Block('numbered', parse_inline(numbered.group(2).strip()), level=int(numbered.group(1)))
+            continue
+        paragraph.append(line)
+    yield from flush()
+
+
+def plain_text(runs: Tuple[Run, ...]) -> str:
+    return ''.join(run.text for run in runs)
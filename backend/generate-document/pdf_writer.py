@@ -0,0 +1,564 @@
+'''
+Экспорт документа в PDF без внешних библиотек
+
+Шрифт — TrueType с кириллицей (по умолчанию DejaVu Sans из fonts/ рядом с
+функцией или из системы, путь можно задать в PDF_FONT_PATH и PDF_BOLD_FONT_PATH). В PDF он встраивается как Type0 /
+CIDFontType2 с Identity-H: текст кодируется номерами глифов, а в файл
+попадает подмножество шрифта только с использованными глифами (таблица glyf
+пересобирается, номера глифов сохраняются). ToUnicode позволяет копировать
+и искать текст.
+
+Вёрстка — A4, поля 2 см: заголовки, абзацы с переносом по словам, списки,
+таблицы с рамками, разделители и номер страницы внизу. Страницы пишутся в
+выходной поток по мере вёрстки; шрифты — в конце, когда известен набор глифов.
+'''
+import os
+import struct
+import zlib
+from functools import lru_cache
+from typing import BinaryIO, Dict, Iterable, List, Optional, Set, Tuple
+
+from markdown_blocks import Block, Run, parse_blocks
+
+FONT_DIRS = [
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fonts'),
+    '/usr/share/fonts/truetype/dejavu',
+    '/usr/share/fonts/dejavu',
+    '/usr/share/fonts/TTF',
+]
+REGULAR_FONT = 'DejaVuSans.ttf'
+BOLD_FONT = 'DejaVuSans-Bold.ttf'
+
+PAGE_WIDTH = 595.28
+PAGE_HEIGHT = 841.89
+MARGIN = 56.69
+BODY_SIZE = 10.5
+HEADING_SIZES = {1: 17.0, 2: 14.5, 3: 12.5, 4: 11.5}
+LEADING = 1.35
+BULLET_INDENT = 16.0
+CELL_PADDING = 4.0
+# Подмножества шрифта по набору глифов: в пакете документы одного шаблона дают одинаковые наборы
+SUBSET_CACHE_SIZE = int(os.environ.get('PDF_SUBSET_CACHE_SIZE', '64'))
+
+# Таблицы, нужные для CIDFontType2 (cmap не нужен: глифы адресуются напрямую)
+SUBSET_TABLES = (b'head', b'hhea', b'maxp', b'hmtx', b'loca', b'glyf', b'cvt ', b'fpgm', b'prep')
+
+
+class TrueTypeFont:
+    '''Метрики, cmap и подмножества TrueType шрифта (только outline glyf)'''
+
+    __slots__ = ('name', 'data', 'tables', 'units_per_em', 'ascent', 'descent', 'cap_height',
+                 'bbox', 'italic_angle', 'cmap', 'advances', 'offsets', 'widths', 'codes')
+
+    def __init__(self, path: str):
+        with open(path, 'rb') as f:
+            self.data = f.read()
+        self.name = os.path.splitext(os.path.basename(path))[0].replace(' ', '')
+        count = struct.unpack_from('>H', self.data, 4)[0]
+        self.tables: Dict[bytes, Tuple[int, int]] = {}
+        for number in range(count):
+            tag, _, offset, length = struct.unpack_from('>4sIII', self.data, 12 + 16 * number)
+            self.tables[tag] = (offset, length)
+        if b'glyf' not in self.tables:
+            raise ValueError(f'{path}: only TrueType outlines (glyf) are supported')
+
+        head = self.tables[b'head'][0]
+        self.units_per_em = struct.unpack_from('>H', self.data, head + 18)[0]
+        self.bbox = struct.unpack_from('>4h', self.data, head + 36)
+        long_offsets = struct.unpack_from('>h', self.data, head + 50)[0] == 1
+        hhea = self.tables[b'hhea'][0]
+        self.ascent, self.descent = struct.unpack_from('>hh', self.data, hhea + 4)
+        metrics_count = struct.unpack_from('>H', self.data, hhea + 34)[0]
+        glyph_count = struct.unpack_from('>H', self.data, self.tables[b'maxp'][0] + 4)[0]
+
+        hmtx = self.tables[b'hmtx'][0]
+        advances = [struct.unpack_from('>H', self.data, hmtx + 4 * i)[0] for i in range(metrics_count)]
+        self.advances = advances + [advances[-1]] * (glyph_count - metrics_count)
+
+        loca = self.tables[b'loca'][0]
+        if long_offsets:
+            self.offsets = list(struct.unpack_from(f'>{glyph_count + 1}I', self.data, loca))
+        else:
+            self.offsets = [2 * value for value in struct.unpack_from(f'>{glyph_count + 1}H', self.data, loca)]
+
+        self.cap_height = self.ascent
+        if b'OS/2' in self.tables:
+            os2, length = self.tables[b'OS/2']
+            if struct.unpack_from('>H', self.data, os2)[0] >= 2 and length >= 90:
+                self.cap_height = struct.unpack_from('>h', self.data, os2 + 88)[0]
+        self.italic_angle = 0.0
+        if b'post' in self.tables:
+            self.italic_angle = struct.unpack_from('>i', self.data, self.tables[b'post'][0] + 4)[0] / 65536
+        self.cmap = self.read_cmap()
+        # Ширина символа в тысячных кегля, кешируется по мере вёрстки
+        self.widths: Dict[str, float] = {}
+        # Символ -> id глифа в hex для строк Identity-H, так же кешируется
+        self.codes: Dict[str, str] = {}
+
+    def read_cmap(self) -> Dict[int, int]:
+        base = self.tables[b'cmap'][0]
+        count = struct.unpack_from('>H', self.data, base + 2)[0]
+        subtables = {}
+        for number in range(count):
+            platform, encoding, offset = struct.unpack_from('>HHI', self.data, base + 4 + 8 * number)
+            subtables[(platform, encoding)] = base + offset
+        cmap: Dict[int, int] = {}
+        if (3, 10) in subtables and struct.unpack_from('>H', self.data, subtables[(3, 10)])[0] == 12:
+            start = subtables[(3, 10)]
+            groups = struct.unpack_from('>I', self.data, start + 12)[0]
+            for number in range(groups):
+                first, last, glyph = struct.unpack_from('>III', self.data, start + 16 + 12 * number)
+                for code in range(first, last + 1):
+                    cmap[code] = glyph + code - first
+            return cmap
+        start = subtables.get((3, 1)) or subtables.get((0, 3))
+        if start is None or struct.unpack_from('>H', self.data, start)[0] != 4:
+            raise ValueError(f'{self.name}: no Unicode cmap (format 4 or 12)')
+        segments = struct.unpack_from('>H', self.data, start + 6)[0] // 2
+        ends = struct.unpack_from(f'>{segments}H', self.data, start + 14)
+        starts = struct.unpack_from(f'>{segments}H', self.data, start + 16 + 2 * segments)
+        deltas = struct.unpack_from(f'>{segments}h', self.data, start + 16 + 4 * segments)
+        range_base = start + 16 + 6 * segments
+        range_offsets = struct.unpack_from(f'>{segments}H', self.data, range_base)
+        for number in range(segments):
+            for code in range(starts[number], ends[number] + 1):
+                if code == 0xFFFF:
+                    continue
+                if range_offsets[number] == 0:
+                    glyph = (code + deltas[number]) & 0xFFFF
+                else:
+                    address = range_base + 2 * number + range_offsets[number] + 2 * (code - starts[number])
+                    glyph = struct.unpack_from('>H', self.data, address)[0]
+                    glyph = (glyph + deltas[number]) & 0xFFFF if glyph else 0
+                if glyph:
+                    cmap[code] = glyph
+        return cmap
+
+    def width(self, text: str, size: float) -> float:
+        widths = self.widths
+        total = 0.0
+        for char in text:
+            width = widths.get(char)
+            if width is None:
+                width = widths[char] = self.advances[self.cmap.get(ord(char), 0)] * 1000 / self.units_per_em
+            total += width
+        return total * size / 1000
+
+    def glyph_width(self, glyph: int) -> int:
+        return round(self.advances[glyph] * 1000 / self.units_per_em)
+
+    def components(self, glyph: int) -> List[int]:
+        '''Глифы, из которых составлен составной глиф'''
+        start, end = self.offsets[glyph], self.offsets[glyph + 1]
+        glyf = self.tables[b'glyf'][0]
+        if end - start < 10 or struct.unpack_from('>h', self.data, glyf + start)[0] >= 0:
+            return []
+        result = []
+        position = glyf + start + 10
+        while True:
+            flags, component = struct.unpack_from('>HH', self.data, position)
+            result.append(component)
+            position += 4 + (4 if flags & 0x0001 else 2)
+            if flags & 0x0008:
+                position += 2
+            elif flags & 0x0040:
+                position += 4
+            elif flags & 0x0080:
+                position += 8
+            if not flags & 0x0020:
+                return result
+
+    @lru_cache(maxsize=SUBSET_CACHE_SIZE)
+    def subset(self, glyphs: Tuple[int, ...]) -> bytes:
+        '''Файл шрифта, где у неиспользованных глифов пустые контуры'''
+        keep = {0} | set(glyphs)
+        pending = list(keep)
+        while pending:
+            for component in self.components(pending.pop()):
+                if component not in keep:
+                    keep.add(component)
+                    pending.append(component)
+
+        glyf_base = self.tables[b'glyf'][0]
+        glyf = bytearray()
+        loca = []
+        for glyph in range(len(self.offsets) - 1):
+            loca.append(len(glyf))
+            if glyph in keep:
+                glyf += self.data[glyf_base + self.offsets[glyph]:glyf_base + self.offsets[glyph + 1]]
+                glyf += b'\0' * (-len(glyf) % 4)
+        loca.append(len(glyf))
+
+        tables = {}
+        for tag in SUBSET_TABLES:
+            if tag in self.tables:
+                offset, length = self.tables[tag]
+                tables[tag] = self.data[offset:offset + length]
+        head = bytearray(tables[b'head'])
+        head[8:12] = b'\0\0\0\0'
+        struct.pack_into('>h', head, 50, 1)
+        tables[b'head'] = bytes(head)
+        tables[b'loca'] = struct.pack(f'>{len(loca)}I', *loca)
+        tables[b'glyf'] = bytes(glyf)
+        font, head_offset = build_font_file(tables)
+        struct.pack_into('>I', font, head_offset + 8, (0xB1B0AFBA - checksum(bytes(font))) & 0xFFFFFFFF)
+        return bytes(font)
+
+
+def checksum(data: bytes) -> int:
+    padded = data + b'\0' * (-len(data) % 4)
+    return sum(struct.unpack(f'>{len(padded) // 4}I', padded)) & 0xFFFFFFFF
+
+
+def build_font_file(tables: Dict[bytes, bytes]) -> Tuple[bytearray, int]:
+    '''Файл шрифта из таблиц и смещение таблицы head в нём'''
+    tags = sorted(tables)
+    count = len(tags)
+    power = 1
+    while power * 2 <= count:
+        power *= 2
+    header = struct.pack('>IHHHH', 0x00010000, count, power * 16, power.bit_length() - 1, count * 16 - power * 16)
+    directory = bytearray()
+    body = bytearray()
+    offset = 12 + 16 * count
+    head_offset = 0
+    for tag in tags:
+        data = tables[tag]
+        if tag == b'head':
+            head_offset = offset + len(body)
+        directory += struct.pack('>4sIII', tag, checksum(data), offset + len(body), len(data))
+        body += data + b'\0' * (-len(data) % 4)
+    return bytearray(header) + directory + body, head_offset
+
+
+def find_font(file_name: str, env_name: str) -> Optional[str]:
+    path = os.environ.get(env_name)
+    if path:
+        return path
+    for directory in FONT_DIRS:
+        candidate = os.path.join(directory, file_name)
+        if os.path.exists(candidate):
+            return candidate
+    return None
+
+
+_fonts: Optional[Tuple[TrueTypeFont, TrueTypeFont]] = None
+
+
+def load_fonts() -> Tuple[TrueTypeFont, TrueTypeFont]:
+    '''(обычный, жирный) шрифт; FileNotFoundError, если обычного нет'''
+    global _fonts
+    if _fonts is None:
+        regular_path = find_font(REGULAR_FONT, 'PDF_FONT_PATH')
+        if not regular_path:
+            raise FileNotFoundError(f'{REGULAR_FONT} not found: set PDF_FONT_PATH')
+        regular = TrueTypeFont(regular_path)
+        bold_path = find_font(BOLD_FONT, 'PDF_BOLD_FONT_PATH')
+        _fonts = (regular, TrueTypeFont(bold_path) if bold_path else regular)
+    return _fonts
+
+
+class UsedFont:
+    '''Шрифт в конкретном PDF: ресурс /Fn и набор использованных символов'''
+
+    __slots__ = ('font', 'resource', 'chars')
+
+    def __init__(self, font: TrueTypeFont, resource: str):
+        self.font = font
+        self.resource = resource
+        self.chars: Set[str] = set()
+
+    def encode(self, text: str) -> str:
+        codes = self.font.codes
+        self.chars.update(text)
+        try:
+            return ''.join([codes[char] for char in text])
+        except KeyError:
+            cmap = self.font.cmap
+            for char in text:
+                if char not in codes:
+                    codes[char] = f'{cmap.get(ord(char), 0):04X}'
+            return ''.join([codes[char] for char in text])
+
+    @property
+    def glyphs(self) -> Dict[int, str]:
+        '''id глифа -> символ для ToUnicode'''
+        cmap = self.font.cmap
+        return {cmap.get(ord(char), 0): char for char in sorted(self.chars, reverse=True)}
+
+
+def pdf_string(text: str) -> str:
+    return '(' + text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)') + ')'
+
+
+class PdfWriter:
+    '''Нумерация объектов и таблица смещений; объекты пишутся сразу в out'''
+
+    def __init__(self, out: BinaryIO):
+        self.out = out
+        self.position = 0
+        self.offsets: Dict[int, int] = {}
+        self.count = 0
+        self.write(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+
+    def write(self, data: bytes) -> None:
+        self.out.write(data)
+        self.position += len(data)
+
+    def reserve(self) -> int:
+        self.count += 1
+        return self.count
+
+    def add(self, body: str, number: Optional[int] = None) -> int:
+        number = number or self.reserve()
+        self.offsets[number] = self.position
+        self.write(f'{number} 0 obj\n{body}\nendobj\n'.encode('latin-1'))
+        return number
+
+    def add_stream(self, data: bytes, extra: str = '', number: Optional[int] = None) -> int:
+        number = number or self.reserve()
+        data = zlib.compress(data, 6)
+        self.offsets[number] = self.position
+        self.write(f'{number} 0 obj\n<< /Length {len(data)} /Filter /FlateDecode {extra}>>\nstream\n'.encode('latin-1'))
+        self.write(data)
+        self.write(b'\nendstream\nendobj\n')
+        return number
+
+    def finish(self, root: int, info: int) -> None:
+        xref = self.position
+        lines = [f'xref\n0 {self.count + 1}\n', '0000000000 65535 f \n']
+        lines += [f'{self.offsets[number]:010d} 00000 n \n' for number in range(1, self.count + 1)]
+        lines.append(f'trailer\n<< /Size {self.count + 1} /Root {root} 0 R /Info {info} 0 R >>\nstartxref\n{xref}\n%%EOF\n')
+        self.write(''.join(lines).encode('latin-1'))
+
+
+def write_font(writer: PdfWriter, used: UsedFont, number: int) -> None:
+    font = used.font
+    to_unicode = used.glyphs
+    glyphs = sorted(to_unicode)
+    scale = 1000 / font.units_per_em
+    # Подмножество помечается шестибуквенным префиксом, производным от набора глифов
+    digest = zlib.crc32(repr(glyphs).encode('ascii'))
+    tag = ''.join(chr(65 + (digest >> (5 * number)) % 26) for number in range(6))
+    name = f'{tag}+{font.name}'
+    file_data = font.subset(tuple(glyphs))
+    file_number = writer.add_stream(file_data, f'/Length1 {len(file_data)} ')
+    descriptor = writer.add(
+        f'<< /Type /FontDescriptor /FontName /{name} /Flags 32 '
+        f'/FontBBox [{" ".join(str(round(value * scale)) for value in font.bbox)}] '
+        f'/ItalicAngle {font.italic_angle:g} /Ascent {round(font.ascent * scale)} /Descent {round(font.descent * scale)} '
+        f'/CapHeight {round(font.cap_height * scale)} /StemV 80 /FontFile2 {file_number} 0 R >>'
+    )
+    widths = ' '.join(f'{glyph} [{font.glyph_width(glyph)}]' for glyph in glyphs)
+    cid_font = writer.add(
+        f'<< /Type /Font /Subtype /CIDFontType2 /BaseFont /{name} '
+        '/CIDSystemInfo << /Registry (Adobe) /Ordering (Identity) /Supplement 0 >> '
+        f'/FontDescriptor {descriptor} 0 R /DW 1000 /W [{widths}] /CIDToGIDMap /Identity >>'
+    )
+    mappings = ''.join(
+        f'<{glyph:04X}> <{char.encode("utf-16-be").hex().upper()}>\n'
+        for glyph, char in sorted(to_unicode.items())
+    )
+    cmap = (
+        '/CIDInit /ProcSet findresource begin\n12 dict begin\nbegincmap\n'
+        '/CIDSystemInfo << /Registry (Adobe) /Ordering (UCS) /Supplement 0 >> def\n'
+        '/CMapName /Adobe-Identity-UCS def\n/CMapType 2 def\n'
+        '1 begincodespacerange\n<0000> <FFFF>\nendcodespacerange\n'
+    )
+    items = mappings.splitlines(keepends=True)
+    for start in range(0, len(items), 100):
+        chunk = items[start:start + 100]
+        cmap += f'{len(chunk)} beginbfchar\n{"".join(chunk)}endbfchar\n'
+    cmap += 'endcmap\nCMapName currentdict /CMap defineresource pop\nend\nend\n'
+    to_unicode = writer.add_stream(cmap.encode('latin-1'))
+    writer.add(
+        f'<< /Type /Font /Subtype /Type0 /BaseFont /{name} /Encoding /Identity-H '
+        f'/DescendantFonts [{cid_font} 0 R] /ToUnicode {to_unicode} 0 R >>',
+        number
+    )
+
+
+Word = Tuple[str, bool]
+Line = List[Tuple[str, bool]]
+
+
+class Layout:
+    '''Вёрстка блоков по страницам; готовые страницы сразу уходят в PdfWriter'''
+
+    def __init__(self, writer: PdfWriter, fonts: Tuple[TrueTypeFont, TrueTypeFont], pages_number: int):
+        self.writer = writer
+        self.regular = UsedFont(fonts[0], 'F1')
+        self.bold = UsedFont(fonts[1], 'F2') if fonts[1] is not fonts[0] else self.regular
+        self.pages_number = pages_number
+        self.font_numbers = {self.regular.resource: writer.reserve()}
+        if self.bold is not self.regular:
+            self.font_numbers[self.bold.resource] = writer.reserve()
+        self.pages: List[int] = []
+        self.commands: List[str] = []
+        self.y = 0.0
+
+    def used(self, bold: bool) -> UsedFont:
+        return self.bold if bold else self.regular
+
+    def new_page(self) -> None:
+        if self.pages:
+            self.flush_page()
+        self.pages.append(0)
+        self.commands = []
+        self.y = PAGE_HEIGHT - MARGIN
+
+    def flush_page(self) -> None:
+        number = len(self.pages)
+        label = str(number)
+        width = self.regular.font.width(label, 9)
+        self.text_line([(label, False)], (PAGE_WIDTH - width) / 2, MARGIN / 2, 9)
+        content = self.writer.add_stream('\n'.join(self.commands).encode('latin-1'))
+        fonts = ' '.join(f'/{resource} {font} 0 R' for resource, font in self.font_numbers.items())
+        self.pages[-1] = self.writer.add(
+            f'<< /Type /Page /Parent {self.pages_number} 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] '
+            f'/Resources << /Font << {fonts} >> >> /Contents {content} 0 R >>'
+        )
+
+    def ensure(self, height: float) -> None:
+        if not self.pages or self.y - height < MARGIN:
+            self.new_page()
+
+    def text_line(self, line: Line, x: float, y: float, size: float) -> None:
+        parts = [f'BT {x:.2f} {y:.2f} Td']
+        current = None
+        for text, bold in line:
+            used = self.used(bold)
+            if used is not current:
+                parts.append(f'/{used.resource} {size:g} Tf')
+                current = used
+            parts.append(f'<{used.encode(text)}> Tj')
+        parts.append('ET')
+        self.commands.append(' '.join(parts))
+
+    def wrap(self, runs: Iterable[Run], size: float, width: float, force_bold: bool = False) -> List[Line]:
+        '''Строки из кусков (текст, жирный); перенос по пробелам и "\\n"'''
+        lines: List[Line] = [[]]
+        line_width = 0.0
+        for run in runs:
+            bold = force_bold or run.bold
+            font = self.used(bold).font
+            for paragraph_number, paragraph in enumerate(run.text.split('\n')):
+                if paragraph_number:
+                    lines.append([])
+                    line_width = 0.0
+                for word_number, word in enumerate(paragraph.split(' ')):
+                    piece = (' ' if word_number else '') + word
+                    piece_width = font.width(piece, size)
+                    if line_width + piece_width > width and lines[-1]:
+                        piece = word
+                        piece_width = font.width(piece, size)
+                        lines.append([])
+                        line_width = 0.0
+                    while piece_width > width and len(piece) > 1:
+                        # Слово длиннее строки режется посимвольно
+                        cut = len(piece)
+                        while cut > 1 and font.width(piece[:cut], size) > width:
+                            cut -= 1
+                        lines[-1].append((piece[:cut], bold))
+                        lines.append([])
+                        piece = piece[cut:]
+                        piece_width = font.width(piece, size)
+                    if piece:
+                        lines[-1].append((piece, bold))
+                        line_width += piece_width
+        return [line for line in lines if line] or [[]]
+
+    def paragraph(self, runs: Iterable[Run], size: float, indent: float = 0.0, bold: bool = False,
+                  before: float = 0.0, after: float = 4.0, marker: str = '') -> None:
+        lines = self.wrap(runs, size, PAGE_WIDTH - 2 * MARGIN - indent, bold)
+        leading = size * LEADING
+        # Заголовок не остаётся в конце страницы без следующей строки
+        self.ensure(before + leading * (min(len(lines), 2) if not bold else len(lines) + 2))
+        self.y -= before
+        for number, line in enumerate(lines):
+            self.ensure(leading)
+            self.y -= leading
+            if marker and number == 0:
+                self.text_line([(marker, False)], MARGIN + indent - BULLET_INDENT * 0.7, self.y, size)
+            self.text_line(line, MARGIN + indent, self.y, size)
+        self.y -= after
+
+    def table(self, rows: Tuple[Tuple[Tuple[Run, ...], ...], ...], size: float) -> None:
+        if not rows:
+            return
+        available = PAGE_WIDTH - 2 * MARGIN
+        columns = len(rows[0])
+        natural = [
+            max(self.used(any(run.bold for run in row[column])).font.width(
+                ''.join(run.text for run in row[column]), size) for row in rows) + 2 * CELL_PADDING
+            for column in range(columns)
+        ]
+        total = sum(natural) or 1.0
+        widths = natural if total <= available else [
+            max(available * value / total, 30.0) for value in natural
+        ]
+        scale = available / sum(widths) if sum(widths) > available else 1.0
+        widths = [width * scale for width in widths]
+        leading = size * LEADING
+        self.ensure(leading + 2 * CELL_PADDING)
+        self.y -= 4
+        for row in rows:
+            cells = [self.wrap(cell, size, widths[column] - 2 * CELL_PADDING) for column, cell in enumerate(row)]
+            height = max(len(lines) for lines in cells) * leading + 2 * CELL_PADDING
+            self.ensure(height)
+            x = MARGIN
+            for column, lines in enumerate(cells):
+                self.commands.append(f'0.5 w {x:.2f} {self.y - height:.2f} {widths[column]:.2f} {height:.2f} re S')
+                baseline = self.y - CELL_PADDING
+                for line in lines:
+                    baseline -= leading
+                    self.text_line(line, x + CELL_PADDING, baseline + (leading - size) / 2, size)
+                x += widths[column]
+            self.y -= height
+        self.y -= 8
+
+    def rule(self) -> None:
+        self.ensure(12)
+        self.y -= 6
+        self.commands.append(f'0.6 G 0.5 w {MARGIN:.2f} {self.y:.2f} m {PAGE_WIDTH - MARGIN:.2f} {self.y:.2f} l S 0 G')
+        self.y -= 6
+
+    def block(self, block: Block) -> None:
+        if block.kind == 'heading':
+            size = HEADING_SIZES.get(block.level, BODY_SIZE + 1)
+            self.paragraph(block.runs, size, bold=True, before=size * 0.6, after=size * 0.35)
+        elif block.kind == 'bullet':
+            self.paragraph(block.runs, BODY_SIZE, indent=BULLET_INDENT, after=2.0, marker='•')
+        elif block.kind == 'numbered':
+            self.paragraph(block.runs, BODY_SIZE, indent=BULLET_INDENT, after=2.0, marker=f'{block.level}.')
+        elif block.kind == 'table':
+            self.table(block.rows, BODY_SIZE - 0.5)
+        elif block.kind == 'rule':
+            self.rule()
+        else:
+            self.paragraph(block.runs, BODY_SIZE, after=5.0)
+
+    def finish(self) -> List[UsedFont]:
+        if not self.pages:
+            self.new_page()
+        self.flush_page()
+        return [self.regular] + ([self.bold] if self.bold is not self.regular else [])
+
+
+def write_pdf(out: BinaryIO, markdown: str, title: str) -> int:
+    '''PDF в поток out (seek не нужен); возвращает число страниц'''
+    fonts = load_fonts()
+    writer = PdfWriter(out)
+    catalog = writer.reserve()
+    pages = writer.reserve()
+    layout = Layout(writer, fonts, pages)
+    for block in parse_blocks(markdown):
+        layout.block(block)
+    for used in layout.finish():
+        write_font(writer, used, layout.font_numbers[used.resource])
+    writer.add(f'<< /Type /Pages /Kids [{" ".join(f"{page} 0 R" for page in layout.pages)}] /Count {len(layout.pages)} >>', pages)
+    writer.add(f'<< /Type /Catalog /Pages {pages} 0 R >>', catalog)
+    title_hex = 'FEFF' + title.encode('utf-16-be').hex().upper()
+    info = writer.add(f'<< /Title <{title_hex}> /Producer {pdf_string("GorTech Attestation")} >>')
+    writer.finish(catalog, info)
+    return len(layout.pages)
@@ -0,0 +1,138 @@
+'''
+Кеш отрендеренных документов generate-document
+
+Ключ — версия шаблонов и нормализованные type, title, category, prompt
+(normalize_inputs): в памяти это кортеж (словарь хеширует его сам, дешевле
+sha256 на каждый запрос), на диске — sha256 от него (key_digest). Значение — куски документа между слотами {date}
+(TemplateRegistry.render_chunks), поэтому закешированный документ не
+устаревает со сменой даты: она вставляется после чтения из кеша.
+
+Уровни:
+- память прогретого экземпляра: LRU на RENDER_CACHE_SIZE документов;
+- диск (если задан RENDER_CACHE_DIR, например общий том): JSON-файл на ключ,
+  запись через os.replace. Ошибки диска не ломают рендер и считаются промахом.
+
+Счётчики попаданий — в stats(); они относятся к одному экземпляру функции.
+Кеш потокобезопасен: пакетная генерация рендерит документы в нескольких потоках.
+'''
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+RENDER_CACHE_SIZE = int(os.environ.get('RENDER_CACHE_SIZE', '256'))
+RENDER_CACHE_DIR = os.environ.get('RENDER_CACHE_DIR') or None
+
+Chunks = Tuple[str, ...]
+Key = Tuple[str, str, str, str, str]
+
+
+def normalize_inputs(doc_type: str, title: str, category: str, prompt: str) -> Tuple[str, str, str, str]:
+    '''
+    Пробелы по краям type, лишние пробелы в title, category и по краям строк prompt не
+    меняют ключ; документ рендерится из тех же нормализованных значений
+    '''
+    prompt_lines = prompt.replace('\r\n', '\n').replace('\r', '\n').split('\n')
+    return (
+        doc_type.strip(),
+        ' '.join(title.split()),
+        ' '.join(category.split()),
+        '\n'.join(line.rstrip() for line in prompt_lines).strip()
+    )
+
+
+def cache_key(template_version: str, doc_type: str, title: str, category: str, prompt: str) -> Key:
+    return (template_version, doc_type, title, category, prompt)
+
+
+def key_digest(key: Key) -> str:
+    return hashlib.sha256(json.dumps(key, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+class RenderCache:
+    __slots__ = ('capacity', 'directory', 'entries', 'lock', 'hits', 'persistent_hits', 'misses', 'evictions', 'errors')
+
+    def __init__(self, capacity: int = RENDER_CACHE_SIZE, directory: Optional[str] = RENDER_CACHE_DIR):
+        self.capacity = capacity
+        self.directory = directory
+        self.entries: 'OrderedDict[Key, Chunks]' = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.persistent_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.errors = 0
+
+    def path(self, digest: str) -> str:
+        return os.path.join(self.directory, digest[:2], f'{digest}.json')
+
+    def get(self, key: Key) -> Tuple[Optional[Chunks], str]:
+        '''(куски или None, откуда: memory | persistent | miss)'''
+        with self.lock:
+            chunks = self.entries.get(key)
+            if chunks is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return chunks, 'memory'
+        if self.directory:
+            digest = key_digest(key)
+            try:
+                with open(self.path(digest), encoding='utf-8') as f:
+                    chunks = tuple(json.load(f))
+            except FileNotFoundError:
+                pass
+            except (OSError, ValueError) as e:
+                with self.lock:
+                    self.errors += 1
+                print(f'[render-cache] read {digest}: {e}')
+            if chunks is not None:
+                self.remember(key, chunks, persistent_hit=True)
+                return chunks, 'persistent'
+        with self.lock:
+            self.misses += 1
+        return None, 'miss'
+
+    def remember(self, key: Key, chunks: Chunks, persistent_hit: bool = False) -> None:
+        with self.lock:
+            if persistent_hit:
+                self.persistent_hits += 1
+            self.entries[key] = chunks
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.capacity:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def put(self, key: Key, chunks: Chunks) -> None:
+        self.remember(key, chunks)
+        if not self.directory:
+            return
+        digest = key_digest(key)
+        path = self.path(digest)
+        temporary = f'{path}.tmp-{os.getpid()}-{threading.get_ident()}'
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(temporary, 'w', encoding='utf-8') as f:
+                json.dump(list(chunks), f, ensure_ascii=False)
+            os.replace(temporary, path)
+        except OSError as e:
+            with self.lock:
+                self.errors += 1
+            print(f'[render-cache] write {digest}: {e}')
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            lookups = self.hits + self.persistent_hits + self.misses
+            return {
+                'entries': len(self.entries),
+                'capacity': self.capacity,
+                'persistent': bool(self.directory),
+                'lookups': lookups,
+                'hits': self.hits,
+                'persistentHits': self.persistent_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'errors': self.errors,
+                'hitRate': round((self.hits + self.persistent_hits) / lookups, 4) if lookups else 0.0
+            }
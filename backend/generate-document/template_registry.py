@@ -0,0 +1,107 @@
+'''
+Реестр шаблонов generate-document
+
+Шаблоны лежат в templates/<тип>.md (тип — поле type запроса), неизвестные
+типы получают DEFAULT_TEMPLATE. Подстановки — {title}, {category}, {prompt},
+{date}; остальные фигурные скобки остаются текстом. При импорте каждый шаблон
+один раз разбивается на статические сегменты и слоты, а render выбирает части
+документа из сегментов и значений одним itemgetter и склеивает их join.
+
+render_chunks подставляет всё, кроме даты, и возвращает куски между слотами
+{date}: такой результат не устаревает и кешируется (render_cache.py), а дата
+вставляется через date.join(chunks). Версия реестра — хеш содержимого
+шаблонов, она входит в ключ кеша.
+'''
+import hashlib
+import os
+import re
+from operator import itemgetter
+from typing import Callable, Dict, List, NamedTuple, Tuple
+
+TEMPLATES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'templates')
+DEFAULT_TEMPLATE = 'generic'
+SLOTS = ('title', 'category', 'prompt', 'date')
+SLOT_RE = re.compile(r'\{(' + '|'.join(SLOTS) + r')\}')
+
+Picker = Callable[[Tuple[str, ...]], Tuple[str, ...]]
+
+
+def make_picker(order: List[int]) -> Picker:
+    '''itemgetter, который всегда возвращает кортеж'''
+    if len(order) == 1:
+        index = order[0]
+        return lambda parts: (parts[index],)
+    return itemgetter(*order)
+
+
+class Template(NamedTuple):
+    name: str
+    segments: Tuple[str, ...]
+    slots: Tuple[str, ...]
+    # segments + значения слотов -> части документа по порядку
+    pick: Picker
+    # то же для каждого куска между слотами {date}
+    chunk_picks: Tuple[Picker, ...]
+
+    def render(self, values: Tuple[str, ...]) -> str:
+        '''values — значения в порядке SLOTS'''
+        return ''.join(self.pick(self.segments + values))
+
+    def render_chunks(self, values: Tuple[str, ...]) -> Tuple[str, ...]:
+        '''values — значения SLOTS без даты; дата вставляется между кусками'''
+        parts = self.segments + values
+        return tuple(''.join(pick(parts)) for pick in self.chunk_picks)
+
+
+def compile_template(name: str, text: str) -> Template:
+    pieces = SLOT_RE.split(text)
+    segments = tuple(pieces[0::2])
+    slots = tuple(pieces[1::2])
+    order = [0]
+    chunks: List[List[int]] = [[0]]
+    for position, slot in enumerate(slots, 1):
+        order += [len(segments) + SLOTS.index(slot), position]
+        if slot == 'date':
+            chunks.append([position])
+        else:
+            chunks[-1] += [len(segments) + SLOTS.index(slot), position]
+    return Template(
+        name=name,
+        segments=segments,
+        slots=slots,
+        pick=make_picker(order),
+        chunk_picks=tuple(make_picker(chunk) for chunk in chunks),
+    )
+
+
+class TemplateRegistry:
+    __slots__ = ('templates', 'version')
+
+    def __init__(self, templates: Dict[str, Template], version: str):
+        if DEFAULT_TEMPLATE not in templates:
+            raise ValueError(f'template {DEFAULT_TEMPLATE!r} is required')
+        self.templates = templates
+        self.version = version
+
+    def get(self, doc_type: str) -> Template:
+        return self.templates.get(doc_type) or self.templates[DEFAULT_TEMPLATE]
+
+    def render(self, doc_type: str, values: Tuple[str, ...]) -> str:
+        # То же, что get(doc_type).render(values), без лишних вызовов на горячем пути
+        template = self.templates.get(doc_type) or self.templates[DEFAULT_TEMPLATE]
+        return ''.join(template.pick(template.segments + values))
+
+    def render_chunks(self, doc_type: str, values: Tuple[str, ...]) -> Tuple[str, ...]:
+        return self.get(doc_type).render_chunks(values)
+
+
+def load_registry(directory: str = TEMPLATES_DIR) -> TemplateRegistry:
+    templates: Dict[str, Template] = {}
+    digest = hashlib.sha256()
+    names: List[str] = sorted(entry[:-3] for entry in os.listdir(directory) if entry.endswith('.md'))
+    for name in names:
+        with open(os.path.join(directory, f'{name}.md'), encoding='utf-8') as f:
+            text = f.read()
+        templates[name] = compile_template(name, text)
+        digest.update(f'{name}\0{text}\0'.encode('utf-8'))
+    return TemplateRegistry(templates, digest.hexdigest()[:12])
@@ -1,7 +1,6 @@
 import json
 import os
 from typing import Dict, Any
-from openai import OpenAI
 
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     '''
@@ -47,6 +46,8 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                 'isBase64Encoded': False
             }
         
+        # SDK импортируется только здесь, чтобы OPTIONS и ошибки валидации не платили за его загрузку
+        from openai import OpenAI
         client = OpenAI(api_key=os.environ.get('OPENAI_API_KEY'))
         
         type_labels = {
@@ -0,0 +1,111 @@
+'''
+Адаптивный экзамен по модели Раша (1PL IRT)
+
+Вероятность верного ответа P = 1 / (1 + exp(b - θ)), где b — трудность
+вопроса, θ — уровень подготовки работника. Трудность оценивается по
+накопленным test_answers; после каждого ответа θ пересчитывается (MAP с
+априорным N(0, 1)), следующим выбирается вопрос с максимальной информацией
+Фишера P(1 - P) при текущем θ. Экзамен заканчивается, когда доверительный
+интервал θ целиком выше или ниже порога сдачи.
+'''
+import math
+from typing import Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+PRIOR_SD = 1.0
+CONFIDENCE_Z = 1.96
+
+
+class Item(NamedTuple):
+    id: int
+    difficulty: float
+
+
+def probability(theta: float, difficulty: float) -> float:
+    return 1.0 / (1.0 + math.exp(difficulty - theta))
+
+
+def estimate_difficulty(attempts: int, correct: int) -> float:
+    '''
+    Трудность по доле верных ответов: logit с поправкой 0.5, чтобы вопросы
+    без ответов или со 100% верных получали конечную оценку (0 при отсутствии данных)
+    '''
+    return math.log((attempts - correct + 0.5) / (correct + 0.5))
+
+
+def estimate_ability(responses: Sequence[Tuple[float, bool]], iterations: int = 20) -> Tuple[float, float]:
+    '''
+    (θ, стандартная ошибка) по ответам [(трудность, верно)] методом Ньютона.
+    Априорное N(0, PRIOR_SD²) даёт конечный θ и при всех верных/неверных ответах.
+    '''
+    theta = 0.0
+    information = 1.0 / PRIOR_SD ** 2
+    for _ in range(iterations):
+        gradient = -theta / PRIOR_SD ** 2
+        information = 1.0 / PRIOR_SD ** 2
+        for difficulty, correct in responses:
+            p = probability(theta, difficulty)
+            gradient += (1.0 if correct else 0.0) - p
+            information += p * (1.0 - p)
+        step = gradient / information
+        theta += max(-1.0, min(1.0, step))
+        if abs(step) < 1e-4:
+            break
+    return theta, 1.0 / math.sqrt(information)
+
+
+def cut_score(difficulties: Iterable[float], proportion: float) -> float:
+    '''
+    Порог θ, при котором ожидаемая доля верных ответов по всему пулу равна
+    проходному баллу (proportion от 0 до 1), — бисекция по характеристической кривой
+    '''
+    difficulties = list(difficulties)
+    low, high = -6.0, 6.0
+    for _ in range(50):
+        middle = (low + high) / 2
+        expected = sum(probability(middle, b) for b in difficulties) / len(difficulties)
+        if expected < proportion:
+            low = middle
+        else:
+            high = middle
+    return (low + high) / 2
+
+
+def select_next(items: Iterable[Item], theta: float, answered: Iterable[int]) -> Optional[Item]:
+    '''Неотвеченный вопрос с максимальной информацией при θ'''
+    answered = set(answered)
+    best, best_information = None, -1.0
+    for item in items:
+        if item.id in answered:
+            continue
+        p = probability(theta, item.difficulty)
+        if p * (1.0 - p) > best_information:
+            best, best_information = item, p * (1.0 - p)
+    return best
+
+
+def decision(theta: float, standard_error: float, cut: float) -> Optional[bool]:
+    '''True/False — сдал/не сдал с заданной уверенностью, None — нужны ещё вопросы'''
+    if theta - CONFIDENCE_Z * standard_error > cut:
+        return True
+    if theta + CONFIDENCE_Z * standard_error < cut:
+        return False
+    return None
+
+
+def next_step(items: List[Item], responses: Sequence[Tuple[Item, bool]], passing_proportion: float,
+              min_items: int, max_items: int) -> dict:
+    '''
+    Состояние экзамена после ответов: {theta, standardError, cut, passed, next}.
+    passed = None и next = Item, пока решение не принято.
+    '''
+    theta, standard_error = estimate_ability([(item.difficulty, correct) for item, correct in responses])
+    cut = cut_score((item.difficulty for item in items), passing_proportion)
+    passed = decision(theta, standard_error, cut) if len(responses) >= min_items else None
+    next_item = None
+    if passed is None:
+        if len(responses) < max_items:
+            next_item = select_next(items, theta, (item.id for item, _ in responses))
+        if next_item is None:
+            # Вопросы или лимит закончились: решение по точечной оценке
+            passed = theta >= cut
+    return {'theta': theta, 'standardError': standard_error, 'cut': cut, 'passed': passed, 'next': next_item}
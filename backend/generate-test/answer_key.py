@@ -0,0 +1,112 @@
+'''
+Подписанный ключ ответов для проверки билета без базы данных
+
+В режиме secure клиент получает вопросы без признаков правильности, со
+случайными id вопросов и ответов и перемешанными ответами, и токен
+<payload>.<подпись>: payload — base64url JSON {"q": [[id вопроса, обязательство,
+баллы, число ответов], ...], "exp": unix-время}, подпись — HMAC-SHA256 от
+payload на ANSWER_KEY_SECRET. Ответы нумеруются в порядке показа: бит j маски
+правильных ответов соответствует ответу <id>-a<j+1>. Сама маска в токен не
+попадает: обязательство — HMAC от "<id вопроса>:<маска>" на том же секрете,
+поэтому без секрета его нельзя ни прочитать, ни подобрать. Id билета не
+совпадают с id банка, поэтому обычная выдача (с isCorrect) по тому же seed
+не подсказывает ответы к нему. Проверка сверяет подпись и срок, считает маску
+выбранных ответов и сравнивает её обязательство с ключом.
+
+Ключ не одноразовый: одну и ту же сдачу можно проверить повторно, а сохранять
+результат (и отсекать повторы) должен вызывающий код.
+'''
+import base64
+import hashlib
+import hmac
+import json
+import secrets
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+
+def b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode('ascii')
+
+
+def b64decode(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + '=' * (-len(text) % 4))
+
+
+def signature(payload: str, secret: str) -> str:
+    return b64encode(hmac.new(secret.encode('utf-8'), payload.encode('ascii'), hashlib.sha256).digest())
+
+
+def commitment(question_id: str, mask: int, secret: str) -> str:
+    '''HMAC маски правильных ответов; payload в base64url не содержит ":", поэтому с подписью не пересекается'''
+    return signature(f'{question_id}:{mask}', secret)
+
+
+def seal(questions: List[Dict[str, Any]], secret: str, ttl_seconds: int, now: Optional[float] = None) -> str:
+    '''
+    Готовит вопросы билета (формат shape_questions) к выдаче: заменяет id на
+    случайные, перемешивает ответы, убирает isCorrect и пояснения и возвращает
+    ключ ответов
+    '''
+    rng = secrets.SystemRandom()
+    entries = []
+    for question in questions:
+        question_id = secrets.token_urlsafe(9)
+        rng.shuffle(question['answers'])
+        mask = 0
+        for j, answer in enumerate(question['answers']):
+            if answer.pop('isCorrect', False):
+                mask |= 1 << j
+            answer['id'] = f'{question_id}-a{j + 1}'
+        question['id'] = question_id
+        question.pop('explanation', None)
+        entries.append([question_id, commitment(question_id, mask, secret), question['points'], len(question['answers'])])
+    body = {'q': entries, 'exp': int((now or time.time()) + ttl_seconds)}
+    payload = b64encode(json.dumps(body, separators=(',', ':'), ensure_ascii=False).encode('utf-8'))
+    return f'{payload}.{signature(payload, secret)}'
+
+
+def verify(token: str, secret: str, now: Optional[float] = None) -> Dict[str, Any]:
+    '''Содержимое ключа; ValueError, если подпись неверна или срок истёк'''
+    payload, _, signed = token.partition('.')
+    if not signed or not hmac.compare_digest(signed, signature(payload, secret)):
+        raise ValueError('invalid answer key signature')
+    body = json.loads(b64decode(payload))
+    if body['exp'] < (now or time.time()):
+        raise ValueError('answer key expired')
+    return body
+
+
+def answer_mask(question_id: str, answer_ids: Iterable[str], answer_count: int) -> int:
+    '''Маска выбранных ответов; ValueError для ответа чужого вопроса или номера вне 1..answer_count'''
+    mask = 0
+    prefix = f'{question_id}-a'
+    for answer_id in answer_ids:
+        number = answer_id[len(prefix):]
+        if not answer_id.startswith(prefix) or not number.isdigit() or not 1 <= int(number) <= answer_count:
+            raise ValueError(f'answer {answer_id} does not belong to question {question_id}')
+        mask |= 1 << (int(number) - 1)
+    return mask
+
+
+def grade(key: Dict[str, Any], answers: Dict[str, List[str]], secret: str) -> Dict[str, Any]:
+    '''
+    Баллы по ответам {id вопроса: [id выбранных ответов]}: вопрос засчитывается,
+    если выбраны ровно все правильные ответы
+    '''
+    results = []
+    earned = total = 0
+    for question_id, committed, points, answer_count in key['q']:
+        chosen = answer_mask(question_id, answers.get(question_id) or [], answer_count)
+        is_correct = hmac.compare_digest(commitment(question_id, chosen, secret), committed)
+        total += points
+        earned += points if is_correct else 0
+        results.append({'id': question_id, 'correct': is_correct})
+    return {
+        'earnedPoints': earned,
+        'totalPoints': total,
+        'score': round(earned * 100 / total) if total else 0,
+        'correctAnswers': sum(1 for result in results if result['correct']),
+        'totalQuestions': len(results),
+        'results': results
+    }
@@ -0,0 +1,133 @@
+'''
+Сборка билета из банка вопросов generate-test
+
+Вопросы выбираются без повторов (random.Random.sample — O(k) на выборку),
+все случайные решения идут через переданный Random, поэтому одинаковый seed
+даёт одинаковый билет. Билет можно стратифицировать по типу вопроса
+(квоты single/multiple) и по баллам (целевая сумма баллов). Если в банке не
+хватает вопросов или нужную сумму баллов не набрать, вместо повторов
+возвращается shortfall с тем, чего не хватило.
+
+Для экзамена в группе assemble_cohort собирает N равноценных вариантов:
+у всех столько же вопросов каждого типа и каждого веса в баллах, что и у
+первого, а seed места зависит только от общего seed и номера места.
+'''
+import hashlib
+import random
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from question_bank import Question, QuestionBank
+
+
+class Paper(NamedTuple):
+    questions: List[Question]
+    points: int
+    shortfall: Dict[str, Any]
+
+
+def point_compositions(capacity: Dict[int, int], k: int, rng: random.Random) -> Dict[int, Dict[int, int]]:
+    '''
+    Все достижимые суммы баллов при выборе ровно k вопросов из уровней
+    {баллы: сколько вопросов есть}; для каждой суммы — одна раскладка
+    {баллы: сколько взять}, выбранная случайно среди найденных первыми.
+    '''
+    states: Dict[tuple, Dict[int, int]] = {(0, 0): {}}
+    levels = list(capacity)
+    rng.shuffle(levels)
+    for points in levels:
+        counts = list(range(min(capacity[points], k) + 1))
+        rng.shuffle(counts)
+        next_states: Dict[tuple, Dict[int, int]] = {}
+        for (taken, total), composition in states.items():
+            for n in counts:
+                if taken + n <= k:
+                    next_states.setdefault((taken + n, total + n * points), {**composition, points: n} if n else composition)
+        states = next_states
+    return {total: composition for (taken, total), composition in states.items() if taken == k}
+
+
+def assemble_paper(bank: QuestionBank, topic: str, count: int, rng: random.Random,
+                   type_quota: Optional[Dict[str, int]] = None,
+                   target_points: Optional[int] = None) -> Paper:
+    '''
+    Билет из count вопросов темы (или по квотам type_quota) с суммой баллов
+    target_points, если она задана и достижима; иначе ближайшая достижимая
+    '''
+    if count < 0 or any(quota < 0 for quota in (type_quota or {}).values()):
+        raise ValueError('question count and type quotas must be non-negative')
+    shortfall: Dict[str, Any] = {}
+    groups: Dict[Optional[str], Tuple[Question, ...]] = {}
+    quotas: Dict[Optional[str], int] = {}
+    if type_quota:
+        for question_type, quota in type_quota.items():
+            groups[question_type] = bank.select(topic, question_type)
+            quotas[question_type] = quota
+    else:
+        groups[None] = bank.pool(topic)
+        quotas[None] = count
+
+    requested = sum(quotas.values())
+    for group, quota in quotas.items():
+        if quota > len(groups[group]):
+            quotas[group] = len(groups[group])
+            if group is not None:
+                shortfall.setdefault('types', {})[group] = {'requested': quota, 'available': len(groups[group])}
+    if sum(quotas.values()) < requested:
+        shortfall['questions'] = {'requested': requested, 'available': sum(quotas.values())}
+
+    selected: List[Question] = []
+    if target_points is None:
+        for group, quota in quotas.items():
+            selected.extend(rng.sample(groups[group], quota))
+    else:
+        # Раскладка по баллам внутри каждой группы, затем сочетание групп с суммой ближе всего к цели
+        combined: Dict[int, Dict[Optional[str], Dict[int, int]]] = {0: {}}
+        for group, quota in quotas.items():
+            capacity: Dict[int, int] = {}
+            for question in groups[group]:
+                capacity[question.points] = capacity.get(question.points, 0) + 1
+            options = point_compositions(capacity, quota, rng)
+            next_combined: Dict[int, Dict[Optional[str], Dict[int, int]]] = {}
+            for total, chosen in combined.items():
+                for points, composition in options.items():
+                    next_combined.setdefault(total + points, {**chosen, group: composition})
+            combined = next_combined
+        achieved = min(combined, key=lambda total: (abs(total - target_points), total))
+        if achieved != target_points:
+            shortfall['points'] = {'requested': target_points, 'selected': achieved}
+        for group, composition in combined[achieved].items():
+            for points, n in composition.items():
+                selected.extend(rng.sample(bank.select(topic, group, points), n))
+
+    rng.shuffle(selected)
+    return Paper(selected, sum(question.points for question in selected), shortfall)
+
+
+def seat_seed(seed: int, seat: int) -> int:
+    '''Seed варианта для места: не зависит от размера группы'''
+    return int.from_bytes(hashlib.sha256(f'{seed}:{seat}'.encode()).digest()[:4], 'big')
+
+
+def assemble_cohort(bank: QuestionBank, topic: str, count: int, seed: int, size: int,
+                    type_quota: Optional[Dict[str, int]] = None,
+                    target_points: Optional[int] = None) -> List[Tuple[int, Paper]]:
+    '''
+    size вариантов [(seed места, билет)]. Первый собирается по условиям
+    запроса, остальные выбирают из тех же ячеек (тип, баллы) индекса банка
+    столько же вопросов, поэтому сложность и сумма баллов у всех одинаковые.
+    '''
+    first_seed = seat_seed(seed, 1)
+    template = assemble_paper(bank, topic, count, random.Random(first_seed), type_quota, target_points)
+    cells: Dict[Tuple[str, int], int] = {}
+    for question in template.questions:
+        cells[(question.type, question.points)] = cells.get((question.type, question.points), 0) + 1
+
+    variants = [(first_seed, template)]
+    for seat in range(2, size + 1):
+        rng = random.Random(seat_seed(seed, seat))
+        selected: List[Question] = []
+        for (question_type, points), n in cells.items():
+            selected.extend(rng.sample(bank.select(topic, question_type, points), n))
+        rng.shuffle(selected)
+        variants.append((seat_seed(seed, seat), Paper(selected, template.points, template.shortfall)))
+    return variants
@@ -1,11 +1,40 @@
 import json
+import os
 import random
-from typing import Dict, Any, List
+import time
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
+import question_bank
+import assembly
+import question_store
+import adaptive
+import answer_key
+import near_duplicates
+
+MAX_COHORT_SIZE = 500
+ADAPTIVE_MIN_ITEMS = 5
+ADAPTIVE_MAX_ITEMS = int(os.environ.get('ADAPTIVE_MAX_ITEMS', '40'))
+ITEM_POOL_TTL_SECONDS = 600
+ITEM_POOL_CACHE_SIZE = int(os.environ.get('ITEM_POOL_CACHE_SIZE', '64'))
+ANSWER_KEY_TTL_SECONDS = int(os.environ.get('ANSWER_KEY_TTL_SECONDS', str(24 * 3600)))
+
+QUESTION_BANK_PATH = os.environ.get('QUESTION_BANK_PATH') or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'questions.bank')
+QUESTION_BANK_CHECK_SECONDS = float(os.environ.get('QUESTION_BANK_CHECK_SECONDS', '30'))
+
+_question_bank: Optional[question_bank.QuestionBank] = None
+_question_bank_stamp: Optional[Tuple[int, int, int]] = None
+_question_bank_checked_at = 0.0
+
+# Пулы вопросов адаптивного режима по instruction_id: (время загрузки, строки, Item);
+# LRU на ITEM_POOL_CACHE_SIZE инструкций
+_item_pools: 'OrderedDict[int, Tuple[float, Dict[int, Tuple], List[adaptive.Item]]]' = OrderedDict()
 
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     '''
     Генерация тестов по охране труда с использованием базы знаний по актуальным стандартам
-    Args: event - dict с httpMethod, body (title, category, topic, questionCount)
+    Args: event - dict с httpMethod, body (title, category, topic, questionCount, seed, types, totalPoints, cohortSize,
+                persist, instructionId, secure) или mode=adaptive с instructionId, passingScore, responses,
+                или mode=grade с answerKey, answers, или mode=duplicates с instructionId, threshold
           context - объект с атрибутами request_id, function_name
     Returns: HTTP response с сгенерированными вопросами по нормативам
     '''
@@ -31,6 +60,16 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         }
     
     body_data = json.loads(event.get('body', '{}'))
+    
+    if body_data.get('mode') == 'adaptive':
+        return handle_adaptive(body_data)
+    
+    if body_data.get('mode') == 'grade':
+        return handle_grade(body_data)
+    
+    if body_data.get('mode') == 'duplicates':
+        return handle_duplicates(body_data)
+    
     title: str = body_data.get('title', '')
     category: str = body_data.get('category', 'iot')
     topic: str = body_data.get('topic', 'occupational-safety')
@@ -43,7 +82,83 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             'body': json.dumps({'error': 'Title is required'})
         }
     
-    questions = generate_questions_by_topic(title, category, topic, question_count)
+    try:
+        seed = int(body_data['seed']) if body_data.get('seed') is not None else random.randrange(2 ** 31)
+        type_quota = parse_type_quota(body_data.get('types'))
+        target_points = int(body_data['totalPoints']) if body_data.get('totalPoints') is not None else None
+        question_count = parse_count(question_count, 'questionCount')
+        if type_quota and 'questionCount' in body_data and sum(type_quota.values()) > question_count:
+            raise ValueError('types quotas exceed questionCount')
+        persist_to = int(body_data['instructionId']) if body_data.get('persist') else None
+        cohort_size = int(body_data.get('cohortSize') or 0)
+        if not 0 <= cohort_size <= MAX_COHORT_SIZE:
+            raise ValueError(f'cohortSize must be between 0 (no cohort) and {MAX_COHORT_SIZE}')
+    except (KeyError, TypeError, ValueError) as e:
+        return {
+            'statusCode': 400,
+            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+            'body': json.dumps({'error': f'Invalid parameters: {e}'})
+        }
+    
+    secure = bool(body_data.get('secure'))
+    secret = os.environ.get('ANSWER_KEY_SECRET')
+    if secure and not secret:
+        return {
+            'statusCode': 500,
+            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+            'body': json.dumps({'error': 'ANSWER_KEY_SECRET not configured'})
+        }
+    
+    if cohort_size:
+        variants, papers = generate_cohort(topic, question_count, seed, cohort_size, type_quota, target_points)
+        paper = papers[0]
+        result = {
+            'variants': variants,
+            'seed': seed,
+            'cohortSize': cohort_size,
+            'distinctPapers': len({frozenset(q['id'] for q in variant['questions']) for variant in variants}),
+            'totalPoints': paper.points,
+            'message': f'Сгенерировано {cohort_size} вариантов по {len(paper.questions)} вопросов'
+        }
+    else:
+        questions, paper = generate_questions_by_topic(
+            title, category, topic, question_count, random.Random(seed), type_quota, target_points
+        )
+        result = {
+            'questions': questions,
+            'seed': seed,
+            'totalPoints': paper.points,
+            'message': f'Сгенерировано {len(questions)} вопросов на основе актуальных нормативов'
+        }
+    result['bankVersion'] = get_question_bank().version
+    if secure:
+        # Случайные id, без признаков правильности, пояснений и seed: проверка идёт по answerKey (mode=grade)
+        result.pop('seed')
+        targets = variants if cohort_size else [result]
+        for target in targets:
+            target.pop('seed', None)
+            target['answerKey'] = answer_key.seal(target['questions'], secret, ANSWER_KEY_TTL_SECONDS)
+    if persist_to is not None:
+        selected = paper.questions
+        if cohort_size:
+            selected = list({question.id: question for variant in papers for question in variant.questions}.values())
+        try:
+            result.update(persist_paper(persist_to, selected))
+        except LookupError as e:
+            return {
+                'statusCode': 404,
+                'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                'body': json.dumps({'error': str(e)})
+            }
+        except Exception as e:
+            return {
+                'statusCode': 500,
+                'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                'body': json.dumps({'error': f'Failed to persist questions: {e}'})
+            }
+    if paper.shortfall:
+        result['shortfall'] = paper.shortfall
+        result['message'] = f'Сгенерировано {len(paper.questions)} вопросов: в банке темы недостаточно вопросов для заданных условий'
     
     return {
         'statusCode': 200,
@@ -51,395 +166,297 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             'Content-Type': 'application/json',
             'Access-Control-Allow-Origin': '*'
         },
-        'body': json.dumps({
-            'questions': questions,
-            'message': f'Сгенерировано {len(questions)} вопросов на основе актуальных нормативов'
-        })
+        'body': json.dumps(result)
     }
 
-def generate_questions_by_topic(title: str, category: str, topic: str, count: int) -> List[Dict]:
-    """Генерация вопросов на основе темы с использованием базы знаний"""
+def get_question_bank() -> question_bank.QuestionBank:
+    """
+    Банк вопросов из QUESTION_BANK_PATH. Прогретый экземпляр не чаще раза в
+    QUESTION_BANK_CHECK_SECONDS проверяет файл и, если он заменён, открывает
+    новый; запрос получает либо старый, либо новый банк целиком.
+    """
+    global _question_bank, _question_bank_stamp, _question_bank_checked_at
+    now = time.monotonic()
+    if _question_bank is not None and now - _question_bank_checked_at < QUESTION_BANK_CHECK_SECONDS:
+        return _question_bank
+    _question_bank_checked_at = now
+    try:
+        stat = os.stat(QUESTION_BANK_PATH)
+        stamp = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        if stamp != _question_bank_stamp:
+            _question_bank = question_bank.open_bank(QUESTION_BANK_PATH)
+            _question_bank_stamp = stamp
+    except (OSError, ValueError) as e:
+        if _question_bank is None:
+            raise
+        print(f'[question-bank] keeping version {_question_bank.version}: {e}')
+    return _question_bank
+
+def handle_grade(body_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Проверка билета, выданного с secure: answerKey и answers {id вопроса: [id ответов]}.
+    База данных не нужна: правильные ответы и баллы лежат в подписанном ключе.
+    """
+    secret = os.environ.get('ANSWER_KEY_SECRET')
+    if not secret:
+        return {
+            'statusCode': 500,
+            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+            'body': json.dumps({'error': 'ANSWER_KEY_SECRET not configured'})
+        }
     
-    question_pools = {
-        'occupational-safety': get_occupational_safety_questions(),
-        'first-aid': get_first_aid_questions(),
-        'fire-safety': get_fire_safety_questions(),
-        'work-at-height': get_work_at_height_questions(),
-        'explosives': get_explosives_questions(),
-        'underground-mining': get_underground_mining_questions(),
-        'other': get_general_safety_questions()
+    answers = body_data.get('answers') or {}
+    try:
+        key = answer_key.verify(str(body_data.get('answerKey') or ''), secret)
+        if not isinstance(answers, dict):
+            raise ValueError('answers must map question ids to answer id lists')
+        graded = answer_key.grade(key, {str(k): [str(a) for a in (v if isinstance(v, list) else [v])] for k, v in answers.items()}, secret)
+    except (TypeError, ValueError, KeyError) as e:
+        return {
+            'statusCode': 400,
+            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+            'body': json.dumps({'error': f'Cannot grade: {e}'})
+        }
+    
+    return {
+        'statusCode': 200,
+        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+        'body': json.dumps(graded)
     }
+
+def handle_duplicates(body_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Отчёт о почти одинаковых вопросах инструкции в test_questions"""
+    try:
+        instruction_id = int(body_data['instructionId'])
+        threshold = float(body_data.get('threshold', near_duplicates.NEAR_DUPLICATE_THRESHOLD))
+        if not 0 < threshold <= 1:
+            raise ValueError('threshold must be in (0, 1]')
+    except (KeyError, TypeError, ValueError) as e:
+        return {
+            'statusCode': 400,
+            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+            'body': json.dumps({'error': f'Invalid parameters: {e}'})
+        }
     
-    pool = question_pools.get(topic, get_general_safety_questions())
+    database_url = os.environ.get('DATABASE_URL')
+    if not database_url:
+        return {
+            'statusCode': 500,
+            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+            'body': json.dumps({'error': 'DATABASE_URL not configured'})
+        }
     
-    if count > len(pool):
-        pool = pool * (count // len(pool) + 1)
+    import psycopg2
+    conn = psycopg2.connect(database_url)
+    try:
+        with conn.cursor() as cur:
+            pairs = question_store.near_duplicate_pairs(cur, instruction_id, threshold)
+        # Сохраняем подписи, досчитанные для старых строк
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        return {
+            'statusCode': 500,
+            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+            'body': json.dumps({'error': f'Failed to build duplicates report: {e}'})
+        }
+    finally:
+        conn.close()
     
-    selected = random.sample(pool, min(count, len(pool)))
+    return {
+        'statusCode': 200,
+        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+        'body': json.dumps({'instructionId': instruction_id, 'threshold': threshold, 'pairs': pairs})
+    }
+
+def handle_adaptive(body_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Шаг адаптивного экзамена. Клиент присылает все ответы сессии
+    (responses: [{questionId, answer}], answer — id ответа из next, <questionId>-a<n>)
+    и получает следующий вопрос без правильного ответа либо итог, когда решение
+    о сдаче принято.
+    """
+    try:
+        instruction_id = int(body_data['instructionId'])
+        passing_proportion = int(body_data.get('passingScore', 80)) / 100
+        submitted = [(int(r['questionId']), str(r['answer'])) for r in body_data.get('responses') or []]
+    except (KeyError, TypeError, ValueError) as e:
+        return {
+            'statusCode': 400,
+            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+            'body': json.dumps({'error': f'Invalid parameters: {e}'})
+        }
     
-    questions = []
-    for i, q_template in enumerate(selected):
-        question_id = f"q_{i+1}_{random.randint(1000, 9999)}"
-        questions.append({
-            'id': question_id,
-            'text': q_template['text'],
-            'type': q_template['type'],
-            'answers': [
-                {
-                    'id': f"{question_id}_a{j+1}",
-                    'text': ans['text'],
-                    'isCorrect': ans['correct']
-                }
-                for j, ans in enumerate(q_template['answers'])
-            ],
-            'explanation': q_template.get('explanation', ''),
-            'points': q_template.get('points', 1)
-        })
+    try:
+        rows, items = get_item_pool(instruction_id)
+    except Exception as e:
+        return {
+            'statusCode': 500,
+            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+            'body': json.dumps({'error': f'Failed to load questions: {e}'})
+        }
     
-    return questions
-
-def get_occupational_safety_questions() -> List[Dict]:
-    """Вопросы по охране труда согласно ТК РФ и Правилам по охране труда"""
-    return [
-        {
-            'text': 'Какова максимальная продолжительность рабочего времени в неделю согласно ТК РФ?',
-            'type': 'single',
-            'answers': [
-                {'text': '40 часов', 'correct': True},
-                {'text': '48 часов', 'correct': False},
-                {'text': '36 часов', 'correct': False},
-                {'text': '44 часа', 'correct': False}
-            ],
-            'explanation': 'Согласно ст. 91 ТК РФ нормальная продолжительность рабочего времени не может превышать 40 часов в неделю',
-            'points': 1
-        },
-        {
-            'text': 'Что обязан сделать работник при несчастном случае на производстве?',
-            'type': 'multiple',
-            'answers': [
-                {'text': 'Немедленно известить своего непосредственного руководителя', 'correct': True},
-                {'text': 'Обеспечить сохранность обстановки места происшествия', 'correct': True},
-                {'text': 'Оказать первую помощь пострадавшему', 'correct': True},
-                {'text': 'Составить акт формы Н-1', 'correct': False}
-            ],
-            'explanation': 'Согласно ст. 214 ТК РФ работник обязан немедленно известить руководителя, оказать помощь и сохранить обстановку. Акт составляет комиссия.',
-            'points': 2
-        },
-        {
-            'text': 'Кто проводит вводный инструктаж по охране труда?',
-            'type': 'single',
-            'answers': [
-                {'text': 'Специалист по охране труда', 'correct': True},
-                {'text': 'Непосредственный руководитель работ', 'correct': False},
-                {'text': 'Инженер по технике безопасности цеха', 'correct': False},
-                {'text': 'Директор предприятия', 'correct': False}
-            ],
-            'explanation': 'Вводный инструктаж проводит специалист по охране труда или работник, на которого приказом возложены эти обязанности (п. 10 Постановления № 2464)',
-            'points': 1
-        },
-        {
-            'text': 'Какова периодичность обязательных медицинских осмотров для работников вредных условий труда?',
-            'type': 'single',
-            'answers': [
-                {'text': 'Не реже 1 раза в год', 'correct': True},
-                {'text': 'Не реже 1 раза в 2 года', 'correct': False},
-                {'text': 'Не реже 1 раза в 6 месяцев', 'correct': False},
-                {'text': 'По требованию работодателя', 'correct': False}
-            ],
-            'explanation': 'Согласно Приказу Минздрава России от 28.01.2021 № 29н периодические осмотры работников вредных условий проводятся не реже 1 раза в год',
-            'points': 1
-        },
-        {
-            'text': 'Что входит в обязанности работодателя в области охраны труда?',
-            'type': 'multiple',
-            'answers': [
-                {'text': 'Обеспечение безопасности работников при эксплуатации зданий, оборудования', 'correct': True},
-                {'text': 'Проведение специальной оценки условий труда', 'correct': True},
-                {'text': 'Обучение по охране труда и проверка знаний требований охраны труда', 'correct': True},
-                {'text': 'Контроль за соблюдением работниками режима труда и отдыха', 'correct': False}
-            ],
-            'explanation': 'Обязанности работодателя установлены ст. 214 ТК РФ. Контроль режима - это право, а не обязанность.',
-            'points': 2
+    by_id = {item.id: item for item in items}
+    if not items or len({question_id for question_id, _ in submitted}) != len(submitted) \
+            or any(question_id not in by_id for question_id, _ in submitted):
+        return {
+            'statusCode': 404 if not items else 400,
+            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+            'body': json.dumps({'error': 'No questions for instruction' if not items else 'Unknown or repeated questionId'})
         }
-    ]
-
-def get_first_aid_questions() -> List[Dict]:
-    """Вопросы по первой помощи согласно Приказу Минздрава 1269н"""
-    return [
-        {
-            'text': 'Какова правильная последовательность оказания первой помощи?',
-            'type': 'single',
-            'answers': [
-                {'text': 'Оценка обстановки → вызов скорой помощи → оказание первой помощи', 'correct': True},
-                {'text': 'Оказание первой помощи → оценка обстановки → вызов скорой помощи', 'correct': False},
-                {'text': 'Вызов скорой помощи → оценка обстановки → оказание первой помощи', 'correct': False},
-                {'text': 'Оценка обстановки → оказание первой помощи → вызов скорой помощи', 'correct': False}
-            ],
-            'explanation': 'Согласно алгоритму оказания первой помощи необходимо: 1) оценить безопасность, 2) вызвать 112/103, 3) оказать первую помощь',
-            'points': 1
-        },
-        {
-            'text': 'Какова правильная частота компрессий грудной клетки при сердечно-легочной реанимации?',
-            'type': 'single',
-            'answers': [
-                {'text': '100-120 компрессий в минуту', 'correct': True},
-                {'text': '60-80 компрессий в минуту', 'correct': False},
-                {'text': '80-100 компрессий в минуту', 'correct': False},
-                {'text': '120-140 компрессий в минуту', 'correct': False}
-            ],
-            'explanation': 'По рекомендациям ERC 2021 и Приказа Минздрава оптимальная частота компрессий составляет 100-120 в минуту',
-            'points': 1
-        },
-        {
-            'text': 'Что необходимо сделать при артериальном кровотечении?',
-            'type': 'multiple',
-            'answers': [
-                {'text': 'Наложить жгут выше места ранения', 'correct': True},
-                {'text': 'Зафиксировать время наложения жгута', 'correct': True},
-                {'text': 'Обработать рану йодом', 'correct': False},
-                {'text': 'Наложить стерильную повязку', 'correct': True}
-            ],
-            'explanation': 'При артериальном кровотечении накладывается жгут выше раны, фиксируется время (не более 1 часа зимой, 2 часов летом), затем стерильная повязка',
-            'points': 2
-        },
-        {
-            'text': 'Какое положение придать пострадавшему без сознания при отсутствии травм?',
-            'type': 'single',
-            'answers': [
-                {'text': 'Устойчивое боковое положение', 'correct': True},
-                {'text': 'На спине с приподнятыми ногами', 'correct': False},
-                {'text': 'Полусидя', 'correct': False},
-                {'text': 'На животе', 'correct': False}
-            ],
-            'explanation': 'Устойчивое боковое положение предотвращает западение языка и обеспечивает свободное дыхание',
-            'points': 1
-        },
-        {
-            'text': 'Что входит в состав аптечки первой помощи на производстве?',
-            'type': 'multiple',
-            'answers': [
-                {'text': 'Жгут кровоостанавливающий', 'correct': True},
-                {'text': 'Бинты стерильные', 'correct': True},
-                {'text': 'Анальгин, аспирин', 'correct': False},
-                {'text': 'Устройство для искусственного дыхания', 'correct': True}
-            ],
-            'explanation': 'Согласно Приказу Минздрава 1331н в аптечке не должно быть лекарственных средств, только перевязочные и вспомогательные материалы',
-            'points': 2
+    
+    try:
+        # Номер ответа n в id <questionId>-a<n> — позиция варианта с единицы, correct_answer — с нуля
+        chosen = [(question_id, answer_key.answer_mask(str(question_id), [answer], len(rows[question_id][2])).bit_length() - 1)
+                  for question_id, answer in submitted]
+    except ValueError as e:
+        return {
+            'statusCode': 400,
+            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+            'body': json.dumps({'error': f'Invalid parameters: {e}'})
         }
-    ]
-
-def get_fire_safety_questions() -> List[Dict]:
-    """Вопросы по пожарной безопасности согласно ППР РФ"""
-    return [
-        {
-            'text': 'Какой класс пожара обозначается буквой "А"?',
-            'type': 'single',
-            'answers': [
-                {'text': 'Пожар твердых горючих веществ', 'correct': True},
-                {'text': 'Пожар жидких горючих веществ', 'correct': False},
-                {'text': 'Пожар газообразных веществ', 'correct': False},
-                {'text': 'Пожар металлов', 'correct': False}
-            ],
-            'explanation': 'Согласно ГОСТ 27331-87: класс А - твердые вещества, В - жидкости, С - газы, D - металлы, Е - электроустановки',
-            'points': 1
-        },
-        {
-            'text': 'Каким огнетушителем нельзя тушить электроустановки под напряжением?',
-            'type': 'single',
-            'answers': [
-                {'text': 'Пенным', 'correct': True},
-                {'text': 'Углекислотным', 'correct': False},
-                {'text': 'Порошковым', 'correct': False},
-                {'text': 'Хладоновым', 'correct': False}
-            ],
-            'explanation': 'Пенные огнетушители содержат воду, которая проводит электрический ток. Запрещены для тушения электроустановок.',
-            'points': 1
-        },
-        {
-            'text': 'Какова периодичность проверки огнетушителей в производственных помещениях?',
-            'type': 'single',
-            'answers': [
-                {'text': 'Не реже 1 раза в год', 'correct': True},
-                {'text': 'Не реже 1 раза в 6 месяцев', 'correct': False},
-                {'text': 'Не реже 1 раза в 2 года', 'correct': False},
-                {'text': 'Не реже 1 раза в 3 месяца', 'correct': False}
-            ],
-            'explanation': 'Согласно СП 9.13130.2009 огнетушители проверяются не реже 1 раза в год с занесением в журнал',
-            'points': 1
-        },
-        {
-            'text': 'Что необходимо сделать при обнаружении пожара?',
-            'type': 'multiple',
-            'answers': [
-                {'text': 'Немедленно сообщить в пожарную охрану по телефону 101', 'correct': True},
-                {'text': 'Принять меры по эвакуации людей', 'correct': True},
-                {'text': 'Приступить к тушению пожара', 'correct': True},
-                {'text': 'Собрать ценные вещи', 'correct': False}
-            ],
-            'explanation': 'ППР в РФ (Постановление № 1479): вызов пожарных, эвакуация, тушение доступными средствами',
-            'points': 2
-        },
-        {
-            'text': 'На каком расстоянии от эвакуационных выходов можно размещать оборудование?',
+    
+    responses = [(by_id[question_id], index == rows[question_id][3]) for question_id, index in chosen]
+    step = adaptive.next_step(items, responses, passing_proportion, ADAPTIVE_MIN_ITEMS, ADAPTIVE_MAX_ITEMS)
+    next_question = None
+    if step['next'] is not None:
+        row = rows[step['next'].id]
+        next_question = {
+            'id': str(row[0]),
+            'text': row[1],
             'type': 'single',
-            'answers': [
-                {'text': 'Не менее 1 метра', 'correct': True},
-                {'text': 'Не менее 0,5 метра', 'correct': False},
-                {'text': 'Не менее 1,5 метра', 'correct': False},
-                {'text': 'Не регламентируется', 'correct': False}
-            ],
-            'explanation': 'Согласно ППР в РФ ширина эвакуационных путей должна быть не менее 1 метра',
+            'answers': [{'id': f'{row[0]}-a{j+1}', 'text': text} for j, text in enumerate(row[2])],
             'points': 1
         }
-    ]
+    
+    return {
+        'statusCode': 200,
+        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+        'body': json.dumps({
+            'finished': step['passed'] is not None,
+            'passed': step['passed'],
+            'answered': len(responses),
+            'correct': sum(1 for _, correct in responses if correct),
+            'ability': round(step['theta'], 3),
+            'standardError': round(step['standardError'], 3),
+            'next': next_question
+        })
+    }
 
-def get_work_at_height_questions() -> List[Dict]:
-    """Вопросы по работам на высоте согласно Правилам по охране труда № 782н"""
-    return [
-        {
-            'text': 'С какой высоты работы относятся к работам на высоте?',
-            'type': 'single',
-            'answers': [
-                {'text': 'С высоты 1,8 метра и более', 'correct': True},
-                {'text': 'С высоты 2 метров и более', 'correct': False},
-                {'text': 'С высоты 1,5 метра и более', 'correct': False},
-                {'text': 'С высоты 3 метров и более', 'correct': False}
-            ],
-            'explanation': 'Согласно Приказу Минтруда № 782н работы на высоте - это работы на высоте 1,8 м и более над поверхностью земли',
-            'points': 1
-        },
-        {
-            'text': 'Какие группы по безопасности работ на высоте существуют?',
-            'type': 'single',
-            'answers': [
-                {'text': '1, 2 и 3 группы', 'correct': True},
-                {'text': '1 и 2 группы', 'correct': False},
-                {'text': 'А, Б и В группы', 'correct': False},
-                {'text': 'Начальная, основная и высшая', 'correct': False}
-            ],
-            'explanation': 'Приказ № 782н устанавливает 3 группы: 1 группа - работники, 2 группа - мастера и бригадиры, 3 группа - руководители',
-            'points': 1
-        },
-        {
-            'text': 'Какова максимальная продолжительность работы в страховочной системе без перерыва?',
-            'type': 'single',
-            'answers': [
-                {'text': 'Не более 15 минут', 'correct': True},
-                {'text': 'Не более 30 минут', 'correct': False},
-                {'text': 'Не более 10 минут', 'correct': False},
-                {'text': 'Не регламентируется', 'correct': False}
-            ],
-            'explanation': 'Согласно правилам работы на высоте непрерывное нахождение в страховочной системе не должно превышать 15 минут',
-            'points': 1
-        },
-        {
-            'text': 'Что должно входить в систему обеспечения безопасности работ на высоте?',
-            'type': 'multiple',
-            'answers': [
-                {'text': 'Страховочная привязь', 'correct': True},
-                {'text': 'Соединительные элементы (стропы, карабины)', 'correct': True},
-                {'text': 'Анкерное устройство', 'correct': True},
-                {'text': 'Монтажный пояс', 'correct': False}
-            ],
-            'explanation': 'Система включает: привязь, соединительные элементы и анкерное устройство. Монтажные пояса запрещены с 2015 года',
-            'points': 2
-        },
-        {
-            'text': 'Каков срок действия удостоверения для работ на высоте с 1 группой?',
-            'type': 'single',
-            'answers': [
-                {'text': '3 года', 'correct': True},
-                {'text': '5 лет', 'correct': False},
-                {'text': '1 год', 'correct': False},
-                {'text': 'Бессрочно', 'correct': False}
-            ],
-            'explanation': 'Периодическое обучение работников 1 группы проводится не реже 1 раза в 3 года (Приказ № 782н)',
-            'points': 1
-        }
-    ]
+def get_item_pool(instruction_id: int) -> Tuple[Dict[int, Tuple], List[adaptive.Item]]:
+    """Вопросы инструкции и их трудность; кешируется в прогретом экземпляре на ITEM_POOL_TTL_SECONDS, не больше ITEM_POOL_CACHE_SIZE инструкций"""
+    cached = _item_pools.get(instruction_id)
+    if cached and time.monotonic() - cached[0] < ITEM_POOL_TTL_SECONDS:
+        _item_pools.move_to_end(instruction_id)
+        return cached[1], cached[2]
+    
+    database_url = os.environ.get('DATABASE_URL')
+    if not database_url:
+        raise RuntimeError('DATABASE_URL not configured')
+    
+    import psycopg2
+    conn = psycopg2.connect(database_url)
+    try:
+        with conn.cursor() as cur:
+            pool = question_store.load_item_pool(cur, instruction_id)
+    finally:
+        conn.close()
+    
+    rows = {row[0]: row for row in pool}
+    items = [adaptive.Item(row[0], adaptive.estimate_difficulty(row[4], row[5])) for row in pool]
+    _item_pools[instruction_id] = (time.monotonic(), rows, items)
+    _item_pools.move_to_end(instruction_id)
+    while len(_item_pools) > ITEM_POOL_CACHE_SIZE:
+        _item_pools.popitem(last=False)
+    return rows, items
 
-def get_explosives_questions() -> List[Dict]:
-    """Вопросы по взрывному делу"""
-    return [
-        {
-            'text': 'Какие виды взрывчатых материалов применяются в горном деле?',
-            'type': 'multiple',
-            'answers': [
-                {'text': 'Промышленные взрывчатые вещества', 'correct': True},
-                {'text': 'Средства инициирования', 'correct': True},
-                {'text': 'Детонирующий шнур', 'correct': True},
-                {'text': 'Пиротехнические составы', 'correct': False}
-            ],
-            'explanation': 'В горном деле применяются ВВ, СИ и детонирующий шнур. Пиротехника не относится к промышленным ВМ',
-            'points': 2
-        },
-        {
-            'text': 'На каком расстоянии должна находиться опасная зона при взрывных работах?',
-            'type': 'single',
-            'answers': [
-                {'text': 'Определяется проектом на взрывные работы', 'correct': True},
-                {'text': 'Не менее 100 метров', 'correct': False},
-                {'text': 'Не менее 200 метров', 'correct': False},
-                {'text': 'Не менее 500 метров', 'correct': False}
-            ],
-            'explanation': 'Опасная зона определяется проектом в зависимости от условий, типа ВВ и масштаба взрыва',
-            'points': 1
-        },
-        {
-            'text': 'Кто имеет право производить взрывные работы?',
-            'type': 'single',
-            'answers': [
-                {'text': 'Лица, имеющие Единую книжку взрывника', 'correct': True},
-                {'text': 'Любой работник с допуском', 'correct': False},
-                {'text': 'Лица с высшим техническим образованием', 'correct': False},
-                {'text': 'Мастера-взрывники и инженеры', 'correct': False}
-            ],
-            'explanation': 'Право на ведение взрывных работ имеют только лица с Единой книжкой взрывника',
-            'points': 1
-        }
-    ]
+def parse_count(value: Any, name: str) -> int:
+    """Неотрицательное целое число вопросов: 5 или "5", но не -2 и не 2.5"""
+    if isinstance(value, bool) or (isinstance(value, float) and not value.is_integer()):
+        raise ValueError(f'{name} must be a non-negative integer')
+    count = int(value)
+    if count < 0:
+        raise ValueError(f'{name} must be a non-negative integer')
+    return count
 
-def get_underground_mining_questions() -> List[Dict]:
-    """Вопросы по безопасности в подземных выработках"""
-    return [
-        {
-            'text': 'Какая минимальная высота горных выработок для прохода людей?',
-            'type': 'single',
-            'answers': [
-                {'text': '1,8 метра в свету', 'correct': True},
-                {'text': '2,0 метра в свету', 'correct': False},
-                {'text': '1,5 метра в свету', 'correct': False},
-                {'text': '2,2 метра в свету', 'correct': False}
-            ],
-            'explanation': 'Минимальная высота проходных выработок составляет 1,8 м согласно Правилам безопасности',
-            'points': 1
-        },
-        {
-            'text': 'Что обязан иметь при себе каждый работник в подземной выработке?',
-            'type': 'multiple',
-            'answers': [
-                {'text': 'Самоспасатель', 'correct': True},
-                {'text': 'Головной светильник', 'correct': True},
-                {'text': 'Именной жетон', 'correct': True},
-                {'text': 'Средства связи', 'correct': False}
-            ],
-            'explanation': 'Обязательны: самоспасатель, головной светильник и именной жетон для учета спуска-подъема',
-            'points': 2
-        },
-        {
-            'text': 'Какова максимально допустимая температура воздуха в подземных выработках?',
-            'type': 'single',
-            'answers': [
-                {'text': '+26°C', 'correct': True},
-                {'text': '+30°C', 'correct': False},
-                {'text': '+28°C', 'correct': False},
-                {'text': '+24°C', 'correct': False}
-            ],
-            'explanation': 'Максимальная температура в рабочих выработках не должна превышать +26°C',
-            'points': 1
-        }
-    ]
+def parse_type_quota(value: Any) -> Optional[Dict[str, int]]:
+    """Квоты по типам вопросов: {"single": 6, "multiple": 4}"""
+    if not value:
+        return None
+    if not isinstance(value, dict) or not set(value) <= {'single', 'multiple'}:
+        raise ValueError('types must map single/multiple to question counts')
+    return {question_type: parse_count(count, f'types.{question_type}') for question_type, count in value.items()}
 
-def get_general_safety_questions() -> List[Dict]:
-    """Общие вопросы по охране труда"""
-    return get_occupational_safety_questions()[:3] + get_first_aid_questions()[:2]
+def generate_questions_by_topic(title: str, category: str, topic: str, count: int,
+                                rng: Optional[random.Random] = None,
+                                type_quota: Optional[Dict[str, int]] = None,
+                                target_points: Optional[int] = None) -> Tuple[List[Dict], assembly.Paper]:
+    """Генерация вопросов на основе темы с использованием базы знаний"""
+    
+    rng = rng or random.Random()
+    paper = assembly.assemble_paper(get_question_bank(), topic, count, rng, type_quota, target_points)
+    return shape_questions(paper.questions), paper
+
+def generate_cohort(topic: str, count: int, seed: int, size: int,
+                    type_quota: Optional[Dict[str, int]] = None,
+                    target_points: Optional[int] = None) -> Tuple[List[Dict], List[assembly.Paper]]:
+    """Варианты для группы: по одному на место, с перемешанным порядком ответов"""
+    
+    variants = []
+    seats = assembly.assemble_cohort(get_question_bank(), topic, count, seed, size, type_quota, target_points)
+    for seat, (variant_seed, paper) in enumerate(seats, start=1):
+        variants.append({
+            'seat': seat,
+            'seed': variant_seed,
+            'questions': shape_questions(paper.questions, random.Random(variant_seed)),
+            'totalPoints': paper.points
+        })
+    return variants, [paper for _, paper in seats]
+
+def persist_paper(instruction_id: int, selected: List[question_bank.Question]) -> Dict[str, Any]:
+    """Сохраняет вопросы билета в test_questions инструкции; LookupError, если её нет"""
+    
+    database_url = os.environ.get('DATABASE_URL')
+    if not database_url:
+        raise RuntimeError('DATABASE_URL not configured')
+    
+    import psycopg2
+    conn = psycopg2.connect(database_url)
+    try:
+        with conn.cursor() as cur:
+            cur.execute('SELECT 1 FROM instructions WHERE id = %s', (instruction_id,))
+            if not cur.fetchone():
+                raise LookupError(f'Instruction {instruction_id} not found')
+            saved = question_store.persist_questions(cur, instruction_id, selected)
+        conn.commit()
+        return saved
+    finally:
+        conn.close()
+
+def shape_questions(selected: List[question_bank.Question], answer_rng: Optional[random.Random] = None) -> List[Dict]:
+    """
+    Вопросы банка в формате ответа. id вопросов и ответов берутся из банка и
+    не зависят от порядка, поэтому при перемешивании ответов не меняются.
+    """
+    questions = []
+    for q_template in selected:
+        answers = [
+            {
+                'id': f"{q_template.id}-a{j+1}",
+                'text': ans.text,
+                'isCorrect': ans.correct
+            }
+            for j, ans in enumerate(q_template.answers)
+        ]
+        if answer_rng is not None:
+            answer_rng.shuffle(answers)
+        questions.append({
+            'id': q_template.id,
+            'text': q_template.text,
+            'type': q_template.type,
+            'answers': answers,
+            'explanation': q_template.explanation,
+            'points': q_template.points
+        })
+    
+    return questions
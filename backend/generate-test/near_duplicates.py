@@ -0,0 +1,110 @@
+'''
+Поиск почти одинаковых вопросов: MinHash + LSH
+
+Нормализованный текст вопроса вместе с ответами (question_store.signature_text)
+режется на символьные 5-граммы. Подпись — one permutation hashing: каждая
+5-грамма хешируется один раз, старшие биты хеша выбирают одну из
+SIGNATURE_SIZE корзин, в корзине остаётся минимум; пустые корзины
+заполняются из соседних (densification). Доля совпавших позиций двух подписей
+оценивает коэффициент Жаккара множеств 5-грамм.
+
+LSH: подпись делится на BANDS полос по ROWS значений; вопросы с совпавшей хотя
+бы одной полосой — кандидаты, для них сравниваются подписи целиком. При 16x4
+пара с похожестью 0.75 становится кандидатом с вероятностью > 99.8%, а
+работа растёт почти линейно от числа вопросов.
+'''
+import hashlib
+import os
+from array import array
+from typing import Dict, Hashable, List, Optional, Sequence, Set, Tuple
+
+SHINGLE_SIZE = 5
+SIGNATURE_SIZE = 64
+BANDS = 16
+ROWS = SIGNATURE_SIZE // BANDS
+BIN_BITS = 6
+VALUE_MASK = (1 << (64 - BIN_BITS)) - 1
+DENSIFY_STEP = 0x9E3779B97F4A7C15
+UINT64_MASK = (1 << 64) - 1
+NEAR_DUPLICATE_THRESHOLD = float(os.environ.get('NEAR_DUPLICATE_THRESHOLD', '0.75'))
+
+
+def shingles(text: str) -> Set[str]:
+    if len(text) <= SHINGLE_SIZE:
+        return {text}
+    return {text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)}
+
+
+def signature(text: str) -> Tuple[int, ...]:
+    bins: List[Optional[int]] = [None] * SIGNATURE_SIZE
+    for shingle in shingles(text):
+        value = int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=8).digest(), 'big')
+        position, value = value >> (64 - BIN_BITS), value & VALUE_MASK
+        if bins[position] is None or value < bins[position]:
+            bins[position] = value
+    if all(value is None for value in bins):
+        return tuple([0] * SIGNATURE_SIZE)
+    # Пустая корзина берёт значение ближайшей непустой справа со сдвигом на расстояние
+    result = list(bins)
+    for position, value in enumerate(bins):
+        if value is None:
+            distance = 1
+            while bins[(position + distance) % SIGNATURE_SIZE] is None:
+                distance += 1
+            result[position] = (bins[(position + distance) % SIGNATURE_SIZE] + distance * DENSIFY_STEP) & UINT64_MASK
+    return tuple(result)
+
+
+def similarity(a: Sequence[int], b: Sequence[int]) -> float:
+    return sum(1 for x, y in zip(a, b) if x == y) / SIGNATURE_SIZE
+
+
+def band_keys(sig: Sequence[int]) -> List[Tuple[int, int]]:
+    '''(номер полосы, хеш полосы как signed BIGINT)'''
+    keys = []
+    for band in range(BANDS):
+        chunk = array('Q', sig[band * ROWS:(band + 1) * ROWS]).tobytes()
+        keys.append((band, int.from_bytes(hashlib.blake2b(chunk, digest_size=8).digest(), 'big', signed=True)))
+    return keys
+
+
+def to_bytes(sig: Sequence[int]) -> bytes:
+    return array('Q', sig).tobytes()
+
+
+def from_bytes(data: bytes) -> Tuple[int, ...]:
+    values = array('Q')
+    values.frombytes(bytes(data))
+    return tuple(values)
+
+
+class MinHashIndex:
+    '''Инкрементальный LSH индекс в памяти: add по мере добавления вопросов'''
+
+    __slots__ = ('signatures', 'buckets')
+
+    def __init__(self):
+        self.signatures: Dict[Hashable, Tuple[int, ...]] = {}
+        self.buckets: Dict[Tuple[int, int], List[Hashable]] = {}
+
+    def add(self, key: Hashable, sig: Tuple[int, ...]) -> None:
+        self.signatures[key] = sig
+        for band_key in band_keys(sig):
+            self.buckets.setdefault(band_key, []).append(key)
+
+    def query(self, sig: Sequence[int], threshold: float = NEAR_DUPLICATE_THRESHOLD) -> List[Tuple[Hashable, float]]:
+        '''Ключи с похожестью не ниже threshold, самые похожие первыми'''
+        candidates = {key for band_key in band_keys(sig) for key in self.buckets.get(band_key, ())}
+        matches = [(key, similarity(sig, self.signatures[key])) for key in candidates]
+        return sorted([match for match in matches if match[1] >= threshold], key=lambda match: -match[1])
+
+    def duplicates(self, threshold: float = NEAR_DUPLICATE_THRESHOLD) -> List[Tuple[Hashable, Hashable, float]]:
+        '''Все пары с похожестью не ниже threshold'''
+        pairs: Set[Tuple[Hashable, Hashable]] = set()
+        for keys in self.buckets.values():
+            for i, a in enumerate(keys):
+                for b in keys[i + 1:]:
+                    if a != b:
+                        pairs.add((a, b) if str(a) < str(b) else (b, a))
+        found = [(a, b, similarity(self.signatures[a], self.signatures[b])) for a, b in pairs]
+        return sorted([pair for pair in found if pair[2] >= threshold], key=lambda pair: -pair[2])
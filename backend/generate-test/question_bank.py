@@ -0,0 +1,135 @@
+'''
+Банк вопросов generate-test в неизменяемом компактном виде
+
+Вопросы хранятся не в коде, а в файле questions.bank, который собирает
+tools/build_question_bank.py из questions.json. Файл отображается в память
+(mmap); при загрузке читается только заголовок со смещениями тем, а JSON
+темы разбирается при первом обращении к ней. Вопросы и ответы — NamedTuple,
+темы — кортежи вопросов.
+
+Формат файла:
+    b'QBNK' | версия формата (uint16 BE) | длина заголовка (uint32 BE) | заголовок JSON |
+    JSON-массивы вопросов тем подряд
+Заголовок: {"version": ..., "defaultTopic": ..., "topics": {тема: [смещение, длина]}},
+смещения считаются от конца заголовка.
+'''
+import json
+import mmap
+import os
+import struct
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+MAGIC = b'QBNK'
+FORMAT_VERSION = 1
+PREFIX = struct.Struct('>4sHI')
+
+
+class Answer(NamedTuple):
+    text: str
+    correct: bool
+
+
+class Question(NamedTuple):
+    id: str
+    text: str
+    type: str
+    answers: Tuple[Answer, ...]
+    explanation: str
+    points: int
+
+
+class QuestionBank:
+    '''
+    Вопросы по темам с индексом по (тема, тип, баллы). Тема загружается
+    функцией loader при первом обращении и дальше не меняется.
+    '''
+
+    __slots__ = ('version', 'topic_names', 'default_topic', 'loader', 'topics', 'index')
+
+    def __init__(self, topic_names: Tuple[str, ...], default_topic: str,
+                 loader: Callable[[str], Tuple[Question, ...]], version: str = ''):
+        self.version = version
+        self.topic_names = topic_names
+        self.default_topic = default_topic
+        self.loader = loader
+        self.topics: Dict[str, Tuple[Question, ...]] = {}
+        self.index: Dict[Tuple[str, str, int], Tuple[Question, ...]] = {}
+
+    def pool(self, topic: str) -> Tuple[Question, ...]:
+        if topic not in self.topic_names:
+            topic = self.default_topic
+        questions = self.topics.get(topic)
+        if questions is None:
+            questions = self.loader(topic)
+            index: Dict[Tuple[str, str, int], List[Question]] = {}
+            for question in questions:
+                index.setdefault((topic, question.type, question.points), []).append(question)
+            self.index.update((key, tuple(value)) for key, value in index.items())
+            self.topics[topic] = questions
+        return questions
+
+    def select(self, topic: str, question_type: Optional[str] = None,
+               points: Optional[int] = None) -> Tuple[Question, ...]:
+        '''Вопросы темы с заданным типом и/или количеством баллов'''
+        if topic not in self.topic_names:
+            topic = self.default_topic
+        pool = self.pool(topic)
+        if question_type is not None and points is not None:
+            return self.index.get((topic, question_type, points), ())
+        return tuple(
+            question for question in pool
+            if (question_type is None or question.type == question_type)
+            and (points is None or question.points == points)
+        )
+
+
+def compile_question(raw: Dict) -> Question:
+    return Question(
+        id=raw['id'],
+        text=raw['text'],
+        type=raw['type'],
+        answers=tuple(Answer(answer['text'], bool(answer['correct'])) for answer in raw['answers']),
+        explanation=raw.get('explanation', ''),
+        points=int(raw.get('points', 1)),
+    )
+
+
+def open_bank(path: str) -> QuestionBank:
+    '''Читает заголовок файла банка; темы разбираются из mmap по требованию'''
+    with open(path, 'rb') as f:
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if len(data) < PREFIX.size:
+        raise ValueError(f'{path}: truncated question bank file')
+    magic, format_version, header_length = PREFIX.unpack_from(data, 0)
+    if magic != MAGIC or format_version != FORMAT_VERSION or PREFIX.size + header_length > len(data):
+        raise ValueError(f'{path}: not a question bank file (format {format_version})')
+    header = json.loads(data[PREFIX.size:PREFIX.size + header_length])
+    base = PREFIX.size + header_length
+    offsets = {topic: (base + offset, base + offset + length) for topic, (offset, length) in header['topics'].items()}
+
+    def load_topic(topic: str) -> Tuple[Question, ...]:
+        start, end = offsets[topic]
+        return tuple(compile_question(raw) for raw in json.loads(data[start:end]))
+
+    return QuestionBank(tuple(offsets), header['defaultTopic'], load_topic, header['version'])
+
+
+def write_bank(path: str, topics: Dict[str, List[Dict]], default_topic: str, version: str) -> None:
+    '''Записывает файл банка атомарно: читатели видят либо старый, либо новый файл целиком'''
+    blobs: List[bytes] = []
+    offsets: Dict[str, List[int]] = {}
+    position = 0
+    for topic, questions in topics.items():
+        blob = json.dumps(questions, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        offsets[topic] = [position, len(blob)]
+        blobs.append(blob)
+        position += len(blob)
+    header = json.dumps({'version': version, 'defaultTopic': default_topic, 'topics': offsets},
+                        ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    temporary = f'{path}.tmp-{os.getpid()}'
+    with open(temporary, 'wb') as f:
+        f.write(PREFIX.pack(MAGIC, FORMAT_VERSION, len(header)))
+        f.write(header)
+        for blob in blobs:
+            f.write(blob)
+    os.replace(temporary, path)
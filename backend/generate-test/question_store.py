@@ -0,0 +1,253 @@
+'''
+Сохранение сгенерированных вопросов в test_questions
+
+Билет записывается одним INSERT на много строк (execute_values). Вопросы
+дедуплицируются по хешу нормализованного текста в пределах инструкции:
+повторная генерация возвращает id уже сохранённых строк вместо новых.
+Почти одинаковые вопросы (переформулированные в одно-два слова, похожесть
+MinHash-подписей не ниже NEAR_DUPLICATE_THRESHOLD) не сохраняются: кандидаты
+ищутся по LSH-полосам в test_question_lsh, см. near_duplicates.py.
+
+В test_questions помещаются только вопросы с одним правильным ответом из
+четырёх вариантов (option_a..option_d, correct_answer); остальные
+возвращаются в notPersisted с причиной.
+'''
+import hashlib
+import re
+from typing import Any, Dict, Iterable, List, Tuple
+
+import near_duplicates
+from question_bank import Question
+
+NON_WORD_RE = re.compile(r'[\W_]+')
+
+
+def normalize_text(text: str) -> str:
+    return NON_WORD_RE.sub(' ', text.lower().replace('ё', 'е')).strip()
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(normalize_text(text).encode('utf-8')).hexdigest()
+
+
+def signature_text(question: str, answers: Iterable[str]) -> str:
+    '''Вопрос и ответы одной строкой для MinHash; порядок ответов не важен'''
+    return ' '.join([normalize_text(question), *sorted(normalize_text(answer) for answer in answers)])
+
+
+def question_signature(question: str, answers: Iterable[str]) -> Tuple[int, ...]:
+    return near_duplicates.signature(signature_text(question, answers))
+
+
+def index_signatures(cur, instruction_id: int, signatures: Dict[int, Tuple[int, ...]]) -> None:
+    '''LSH-полосы вопросов {test_questions.id: подпись} в test_question_lsh'''
+    from psycopg2.extras import execute_values
+
+    bands = [
+        (instruction_id, band, bucket, question_id)
+        for question_id, sig in signatures.items()
+        for band, bucket in near_duplicates.band_keys(sig)
+    ]
+    if bands:
+        execute_values(cur, '''
+            INSERT INTO test_question_lsh (instruction_id, band, bucket, question_id) VALUES %s
+            ON CONFLICT DO NOTHING
+        ''', bands, page_size=1000)
+
+
+def backfill_signatures(cur, instruction_id: int) -> None:
+    '''Подписи и LSH-полосы для строк инструкции, созданных до V0013 или вручную'''
+    from psycopg2.extras import execute_values
+
+    cur.execute('''
+        SELECT id, question, option_a, option_b, option_c, option_d
+        FROM test_questions WHERE instruction_id = %s AND minhash IS NULL
+    ''', (instruction_id,))
+    signatures = {row[0]: question_signature(row[1], row[2:6]) for row in cur.fetchall()}
+    if not signatures:
+        return
+    execute_values(cur, '''
+        UPDATE test_questions q SET minhash = v.minhash
+        FROM (VALUES %s) AS v(id, minhash)
+        WHERE q.id = v.id
+    ''', [(question_id, near_duplicates.to_bytes(sig)) for question_id, sig in signatures.items()],
+        template='(%s::int, %s::bytea)', page_size=1000)
+    index_signatures(cur, instruction_id, signatures)
+
+
+def find_similar(cur, instruction_id: int,
+                 signatures: Dict[str, Tuple[int, ...]]) -> near_duplicates.MinHashIndex:
+    '''
+    Сохранённые вопросы инструкции, у которых с подписью хотя бы одного из
+    signatures совпала LSH-полоса: индекс с ключами (test_questions.id, text_hash)
+    '''
+    from psycopg2.extras import execute_values
+
+    index = near_duplicates.MinHashIndex()
+    keys = sorted({
+        (instruction_id, band, bucket)
+        for sig in signatures.values()
+        for band, bucket in near_duplicates.band_keys(sig)
+    })
+    if not keys:
+        return index
+    candidates = execute_values(cur, '''
+        SELECT DISTINCT q.id, q.text_hash, q.minhash
+        FROM (VALUES %s) AS v(instruction_id, band, bucket)
+        JOIN test_question_lsh l ON l.instruction_id = v.instruction_id AND l.band = v.band AND l.bucket = v.bucket
+        JOIN test_questions q ON q.id = l.question_id
+    ''', keys, template='(%s::int, %s::smallint, %s::bigint)', page_size=len(keys), fetch=True)
+    for question_id, digest, minhash in candidates:
+        index.add((question_id, digest), near_duplicates.from_bytes(minhash))
+    return index
+
+
+def backfill_text_hashes(cur, instruction_id: int) -> None:
+    '''Хеши для строк инструкции, созданных до V0012 или вручную'''
+    from psycopg2.extras import execute_values
+
+    cur.execute('SELECT id, question FROM test_questions WHERE instruction_id = %s AND text_hash IS NULL', (instruction_id,))
+    rows = cur.fetchall()
+    if not rows:
+        return
+    seen = set()
+    updates = []
+    for question_id, question in rows:
+        digest = text_hash(question)
+        # Уже существующие дубликаты оставляем без хеша, чтобы не нарушить уникальный индекс
+        if digest not in seen:
+            seen.add(digest)
+            updates.append((question_id, digest))
+    execute_values(cur, '''
+        UPDATE test_questions q SET text_hash = v.text_hash
+        FROM (VALUES %s) AS v(id, text_hash)
+        WHERE q.id = v.id AND NOT EXISTS (
+            SELECT 1 FROM test_questions d WHERE d.instruction_id = q.instruction_id AND d.text_hash = v.text_hash
+        )
+    ''', updates, template='(%s::int, %s)', page_size=len(updates))
+
+
+def persist_questions(cur, instruction_id: int, questions: List[Question],
+                      threshold: float = near_duplicates.NEAR_DUPLICATE_THRESHOLD) -> Dict[str, Any]:
+    '''
+    {persisted: [{id, questionId, created}], notPersisted: [{id, reason, duplicateOf?, similarity?}]};
+    id — идентификатор вопроса в банке, questionId и duplicateOf — test_questions.id
+    (или id вопроса банка, если похожий вопрос есть в том же билете)
+    '''
+    from psycopg2.extras import execute_values
+
+    not_persisted = []
+    rows = []
+    bank_ids: Dict[str, str] = {}
+    signatures: Dict[str, Tuple[int, ...]] = {}
+    for question in questions:
+        correct = [index for index, answer in enumerate(question.answers) if answer.correct]
+        if question.type != 'single' or len(question.answers) != 4 or len(correct) != 1:
+            not_persisted.append({'id': question.id, 'reason': 'only single-choice questions with 4 answers fit test_questions'})
+            continue
+        digest = text_hash(question.text)
+        if digest in bank_ids:
+            continue
+        bank_ids[digest] = question.id
+        signatures[digest] = question_signature(question.text, (answer.text for answer in question.answers))
+        rows.append((instruction_id, question.text, *(answer.text for answer in question.answers),
+                     correct[0], question.explanation, digest, near_duplicates.to_bytes(signatures[digest])))
+
+    persisted = []
+    if rows:
+        backfill_text_hashes(cur, instruction_id)
+        backfill_signatures(cur, instruction_id)
+        stored = find_similar(cur, instruction_id, signatures)
+        batch = near_duplicates.MinHashIndex()
+        accepted = []
+        for row in rows:
+            digest = row[8]
+            # Точные повторы не блокируем: ON CONFLICT вернёт id уже сохранённой строки
+            matches = [(key[0], score) for key, score in stored.query(signatures[digest], threshold) if key[1] != digest]
+            matches += [(bank_ids[key], score) for key, score in batch.query(signatures[digest], threshold)]
+            if matches:
+                duplicate_of, score = max(matches, key=lambda match: match[1])
+                not_persisted.append({'id': bank_ids[digest], 'reason': 'near-duplicate of an existing question',
+                                      'duplicateOf': duplicate_of, 'similarity': round(score, 3)})
+                continue
+            batch.add(digest, signatures[digest])
+            accepted.append(row)
+        rows = accepted
+
+    if rows:
+        # Вторая половина UNION видит таблицу до INSERT, поэтому возвращает только старые строки
+        result = execute_values(cur, '''
+            WITH incoming (instruction_id, question, option_a, option_b, option_c, option_d,
+                           correct_answer, explanation, text_hash, minhash) AS (VALUES %s),
+            inserted AS (
+                INSERT INTO test_questions (instruction_id, question, option_a, option_b, option_c, option_d,
+                                            correct_answer, explanation, text_hash, minhash)
+                SELECT * FROM incoming
+                ON CONFLICT (instruction_id, text_hash) DO NOTHING
+                RETURNING id, text_hash
+            )
+            SELECT id, text_hash, TRUE FROM inserted
+            UNION ALL
+            SELECT q.id, q.text_hash, FALSE
+            FROM test_questions q
+            JOIN incoming i ON i.instruction_id = q.instruction_id AND i.text_hash = q.text_hash
+        ''', rows, template='(%s::int, %s, %s, %s, %s, %s, %s::int, %s, %s, %s::bytea)', page_size=len(rows), fetch=True)
+        index_signatures(cur, instruction_id, {
+            question_id: signatures[digest] for question_id, digest, created in result if created
+        })
+        persisted = [
+            {'id': bank_ids[digest], 'questionId': question_id, 'created': created}
+            for question_id, digest, created in result
+        ]
+    return {'persisted': persisted, 'notPersisted': not_persisted}
+
+
+def near_duplicate_pairs(cur, instruction_id: int,
+                         threshold: float = near_duplicates.NEAR_DUPLICATE_THRESHOLD) -> List[Dict[str, Any]]:
+    '''
+    Пары почти одинаковых вопросов инструкции, самые похожие первыми. Сравниваются
+    только пары с общей LSH-полосой, а не все n² пар.
+    '''
+    backfill_signatures(cur, instruction_id)
+    cur.execute('''
+        SELECT DISTINCT a.question_id, b.question_id
+        FROM test_question_lsh a
+        JOIN test_question_lsh b ON b.instruction_id = a.instruction_id AND b.band = a.band
+                                 AND b.bucket = a.bucket AND b.question_id > a.question_id
+        WHERE a.instruction_id = %s
+    ''', (instruction_id,))
+    candidates = cur.fetchall()
+    if not candidates:
+        return []
+    cur.execute('SELECT id, question, minhash FROM test_questions WHERE id = ANY(%s)',
+                (sorted({question_id for pair in candidates for question_id in pair}),))
+    rows = {row[0]: (row[1], near_duplicates.from_bytes(row[2])) for row in cur.fetchall()}
+    pairs = []
+    for a, b in candidates:
+        if a not in rows or b not in rows:
+            continue
+        score = near_duplicates.similarity(rows[a][1], rows[b][1])
+        if score >= threshold:
+            pairs.append({
+                'a': {'id': a, 'question': rows[a][0]},
+                'b': {'id': b, 'question': rows[b][0]},
+                'similarity': round(score, 3)
+            })
+    return sorted(pairs, key=lambda pair: -pair['similarity'])
+
+
+def load_item_pool(cur, instruction_id: int) -> List[Tuple]:
+    '''
+    Вопросы инструкции со статистикой ответов:
+    [(id, question, (option_a..option_d), correct_answer, attempts, correct)]
+    '''
+    cur.execute('''
+        SELECT q.id, q.question, q.option_a, q.option_b, q.option_c, q.option_d, q.correct_answer,
+               COUNT(a.id), COUNT(a.id) FILTER (WHERE a.is_correct)
+        FROM test_questions q
+        LEFT JOIN test_answers a ON a.question_id = q.id
+        WHERE q.instruction_id = %s
+        GROUP BY q.id
+        ORDER BY q.id
+    ''', (instruction_id,))
+    return [(row[0], row[1], tuple(row[2:6]), row[6], row[7], row[8]) for row in cur.fetchall()]
@@ -1,12 +1,16 @@
 import json
 import os
-from typing import Dict, Any
-import psycopg2
+import io
+import re
+import base64
+import zipfile
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+import instruction_store
 
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     '''
-    Управление инструкциями: получение, создание, обновление
-    Args: event с httpMethod, queryStringParameters (path, id), body
+    Управление инструкциями: получение, обновление, архивирование и история версий
+    Args: event с httpMethod, queryStringParameters (path, id, version, section), body
     Returns: JSON с результатом операции
     '''
     method: str = event.get('httpMethod', 'GET')
@@ -17,7 +21,7 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             'headers': {
                 'Access-Control-Allow-Origin': '*',
                 'Access-Control-Allow-Methods': 'GET, POST, DELETE, OPTIONS',
-                'Access-Control-Allow-Headers': 'Content-Type',
+                'Access-Control-Allow-Headers': 'Content-Type, If-Match',
                 'Access-Control-Max-Age': '86400'
             },
             'body': '',
@@ -41,28 +45,15 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                 'isBase64Encoded': False
             }
         
+        import psycopg2
         conn = psycopg2.connect(database_url)
         cursor = conn.cursor()
         
         if method == 'GET':
             if path == 'instructions':
-                cursor.execute('''
-                    SELECT id, title, category, industry, profession, last_updated 
-                    FROM instructions 
-                    ORDER BY last_updated DESC
-                ''')
-                rows = cursor.fetchall()
-                
-                instructions = []
-                for row in rows:
-                    instructions.append({
-                        'id': row[0],
-                        'title': row[1],
-                        'category': row[2],
-                        'industry': row[3],
-                        'profession': row[4],
-                        'lastUpdated': row[5]
-                    })
+                instructions = instruction_store.list_instructions(
+                    cursor, query_params.get('category'), query_params.get('industry'), status=None
+                )
                 
                 return {
                     'statusCode': 200,
@@ -71,15 +62,21 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                     'isBase64Encoded': False
                 }
             
+            elif path == 'instruction' and instruction_id and query_params.get('section'):
+                sections = instruction_store.get_section(cursor, instruction_id, query_params['section'], status=None)
+                found = sections is not None and (query_params['section'] == 'toc' or sections['section'] is not None)
+                
+                return {
+                    'statusCode': 200 if found else 404,
+                    'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                    'body': json.dumps(sections if found else {'error': 'Section not found'}, ensure_ascii=False),
+                    'isBase64Encoded': False
+                }
+            
             elif path == 'instruction' and instruction_id:
-                cursor.execute('''
-                    SELECT id, title, category, industry, profession, content, last_updated 
-                    FROM instructions 
-                    WHERE id = %s
-                ''', (instruction_id,))
-                row = cursor.fetchone()
+                instruction = instruction_store.get_instruction(cursor, instruction_id, status=None)
                 
-                if not row:
+                if not instruction:
                     return {
                         'statusCode': 404,
                         'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
@@ -87,23 +84,75 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                         'isBase64Encoded': False
                     }
                 
-                instruction = {
-                    'id': row[0],
-                    'title': row[1],
-                    'category': row[2],
-                    'industry': row[3],
-                    'profession': row[4],
-                    'content': row[5],
-                    'lastUpdated': row[6]
+                return {
+                    'statusCode': 200,
+                    'headers': {
+                        'Content-Type': 'application/json',
+                        'Access-Control-Allow-Origin': '*',
+                        'Access-Control-Expose-Headers': 'ETag',
+                        'ETag': make_etag(instruction['version'])
+                    },
+                    'body': json.dumps({'instruction': instruction}, ensure_ascii=False),
+                    'isBase64Encoded': False
                 }
+            
+            elif path == 'revisions' and instruction_id:
+                version = query_params.get('version')
+                if version:
+                    if not version.isdigit():
+                        return {
+                            'statusCode': 400,
+                            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                            'body': json.dumps({'error': 'Invalid version'}, ensure_ascii=False),
+                            'isBase64Encoded': False
+                        }
+                    revision = instruction_store.get_revision(cursor, instruction_id, int(version))
+                    if not revision:
+                        return {
+                            'statusCode': 404,
+                            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                            'body': json.dumps({'error': 'Revision not found'}, ensure_ascii=False),
+                            'isBase64Encoded': False
+                        }
+                    result = {'revision': revision}
+                else:
+                    result = {'revisions': instruction_store.list_revisions(cursor, instruction_id)}
                 
                 return {
                     'statusCode': 200,
                     'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-                    'body': json.dumps({'instruction': instruction}, ensure_ascii=False),
+                    'body': json.dumps(result, ensure_ascii=False),
                     'isBase64Encoded': False
                 }
         
+        elif method == 'POST' and path == 'import-instructions':
+            body = event.get('body') or ''
+            payload = base64.b64decode(body) if event.get('isBase64Encoded') else body.encode('utf-8')
+            records = iter_markdown_zip(payload) if payload[:4] == b'PK\x03\x04' else iter_ndjson(payload)
+            
+            errors: List[Dict[str, Any]] = []
+            
+            def valid_records() -> Iterator[Dict[str, Any]]:
+                for source, record in records:
+                    if isinstance(record, dict):
+                        error = instruction_store.validate_import_record(record)
+                    else:
+                        error = record if isinstance(record, str) else 'not a JSON object'
+                    if error:
+                        errors.append({'source': source, 'error': error})
+                        continue
+                    yield record
+            
+            counts = instruction_store.bulk_upsert_instructions(cursor, valid_records(), query_params.get('user_id'))
+            conn.commit()
+            
+            return {
+                'statusCode': 200,
+                'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                'body': json.dumps({**counts, 'skipped': len(errors), 'errors': errors[:100]}, ensure_ascii=False),
+                'isBase64Encoded': False
+            }
+        
         elif method == 'POST':
             body_data = json.loads(event.get('body', '{}'))
             request_path = body_data.get('path', '')
@@ -121,17 +170,56 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                         'isBase64Encoded': False
                     }
                 
-                cursor.execute('''
-                    UPDATE instructions 
-                    SET title = %s, content = %s, last_updated = NOW() 
-                    WHERE id = %s
-                ''', (title, content, instruction_id))
-                conn.commit()
+                try:
+                    expected_version = get_expected_version(event, body_data)
+                except ValueError:
+                    return {
+                        'statusCode': 400,
+                        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                        'body': json.dumps({'error': 'Invalid version or If-Match'}, ensure_ascii=False),
+                        'isBase64Encoded': False
+                    }
+                
+                updated = instruction_store.update_instruction(
+                    cursor, instruction_id, title, content, body_data.get('user_id'), expected_version
+                )
+                if not updated:
+                    return {
+                        'statusCode': 404,
+                        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                        'body': json.dumps({'error': 'Instruction not found'}, ensure_ascii=False),
+                        'isBase64Encoded': False
+                    }
+                
+                headers = {
+                    'Content-Type': 'application/json',
+                    'Access-Control-Allow-Origin': '*',
+                    'Access-Control-Expose-Headers': 'ETag',
+                    'ETag': make_etag(updated['version'])
+                }
+                if updated['status'] == 'conflict':
+                    conn.rollback()
+                    return {
+                        'statusCode': 409,
+                        'headers': headers,
+                        'body': json.dumps({
+                            'error': 'Instruction was modified by another user',
+                            'currentVersion': updated['version']
+                        }, ensure_ascii=False),
+                        'isBase64Encoded': False
+                    }
+                if updated['status'] == 'updated':
+                    conn.commit()
                 
                 return {
                     'statusCode': 200,
-                    'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-                    'body': json.dumps({'success': True, 'message': 'Instruction updated'}, ensure_ascii=False),
+                    'headers': headers,
+                    'body': json.dumps({
+                        'success': True,
+                        'message': 'Instruction updated' if updated['status'] == 'updated' else 'Instruction unchanged',
+                        'version': updated['version'],
+                        'unchanged': updated['status'] == 'unchanged'
+                    }, ensure_ascii=False),
                     'isBase64Encoded': False
                 }
         
@@ -147,7 +235,13 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                     'isBase64Encoded': False
                 }
             
-            cursor.execute('DELETE FROM instructions WHERE id = %s', (instruction_id,))
+            if not instruction_store.archive_instruction(cursor, instruction_id, body_data.get('user_id')):
+                return {
+                    'statusCode': 404,
+                    'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                    'body': json.dumps({'error': 'Instruction not found'}, ensure_ascii=False),
+                    'isBase64Encoded': False
+                }
             conn.commit()
             
             return {
@@ -176,4 +270,60 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         if cursor:
             cursor.close()
         if conn:
-            conn.close()
\ No newline at end of file
+            conn.close()
+
+def make_etag(version: int) -> str:
+    return f'"v{version}"'
+
+
+def get_expected_version(event: Dict[str, Any], body_data: Dict[str, Any]) -> Optional[int]:
+    '''
+    Версия, от которой клиент начинал правку: заголовок If-Match с ETag из
+    GET path=instruction либо поле version в теле. None — без проверки.
+    '''
+    headers = event.get('headers') or {}
+    if_match = next((value for name, value in headers.items() if name.lower() == 'if-match'), None)
+    if if_match and if_match.strip() != '*':
+        tag = if_match.split(',')[0].strip()
+        if tag.startswith('W/'):
+            tag = tag[2:]
+        return int(tag.strip('"').lstrip('v'))
+    version = body_data.get('version')
+    return int(version) if version is not None else None
+
+
+def iter_ndjson(payload: bytes) -> Iterator[Tuple[str, Any]]:
+    '''NDJSON: одна инструкция на строку, поля code, title, category, industry, profession, content, status'''
+    for line_no, line in enumerate(io.TextIOWrapper(io.BytesIO(payload), encoding='utf-8'), start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield f'line {line_no}', json.loads(line)
+        except json.JSONDecodeError as e:
+            yield f'line {line_no}', f'invalid JSON: {e}'
+
+
+def iter_markdown_zip(payload: bytes) -> Iterator[Tuple[str, Any]]:
+    '''
+    ZIP с Markdown файлами: code — путь файла без расширения, title — первый заголовок "# ".
+    Остальные поля берутся из front matter между строками "---" в начале файла.
+    '''
+    with zipfile.ZipFile(io.BytesIO(payload)) as archive:
+        for info in archive.infolist():
+            if info.is_dir() or not info.filename.lower().endswith('.md'):
+                continue
+            text = archive.read(info).decode('utf-8-sig')
+            record: Dict[str, Any] = {'code': re.sub(r'[\\/]+', '-', info.filename[:-3]).strip('-')}
+            front_matter = re.match(r'---\r?\n(.*?)\r?\n---\r?\n', text, re.S)
+            if front_matter:
+                for line in front_matter.group(1).splitlines():
+                    if ':' in line:
+                        key, value = line.split(':', 1)
+                        record[key.strip()] = value.strip().strip('"\'')
+                text = text[front_matter.end():]
+            if 'title' not in record:
+                heading = re.search(r'^#\s+(.+)$', text, re.M)
+                record['title'] = heading.group(1).strip() if heading else record['code']
+            record['content'] = text
+            yield info.filename, record
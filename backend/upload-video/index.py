@@ -1,7 +1,6 @@
 import json
 import os
 import base64
-import boto3
 from typing import Dict, Any
 
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
@@ -48,6 +47,8 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             filename = body_json.get('filename', 'video.mp4')
             video_data = base64.b64decode(video_base64)
         
+        # boto3 импортируется только на пути загрузки: OPTIONS не платит за его холодный импорт
+        import boto3
         s3_client = boto3.client(
             's3',
             endpoint_url='https://bucket.poehali.dev',
@@ -0,0 +1,15 @@
+-- Ключи идемпотентности для POST запросов, которые клиенты повторяют при обрыве связи
+-- (test-session, assignments). Первичный ключ разводит одновременные дубликаты.
+CREATE TABLE IF NOT EXISTS idempotency_keys (
+    scope VARCHAR(100) NOT NULL,
+    idempotency_key VARCHAR(255) NOT NULL,
+    request_hash CHAR(64) NOT NULL,
+    status_code INT,
+    response_body TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    expires_at TIMESTAMP NOT NULL,
+    PRIMARY KEY (scope, idempotency_key)
+);
+
+-- Индекс для очистки просроченных ключей
+CREATE INDEX IF NOT EXISTS idx_idempotency_keys_expires_at ON idempotency_keys(expires_at);
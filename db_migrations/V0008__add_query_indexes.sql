@@ -0,0 +1,34 @@
+-- Индексы под запросы backend/api/index.py. Каждый индекс подписан маршрутом, который его использует.
+
+-- path=users&role=...: фильтр по роли и сортировка по ФИО без отдельной сортировки
+CREATE INDEX IF NOT EXISTS idx_users_role_full_name ON users(role, full_name);
+
+-- path=instructions: status = 'active' [AND category] [AND industry] ORDER BY updated_at DESC
+CREATE INDEX IF NOT EXISTS idx_instructions_status_updated_at ON instructions(status, updated_at DESC);
+CREATE INDEX IF NOT EXISTS idx_instructions_status_category_updated_at ON instructions(status, category, updated_at DESC);
+
+-- path=test-questions: WHERE instruction_id = ? ORDER BY id
+CREATE INDEX IF NOT EXISTS idx_test_questions_instruction_id ON test_questions(instruction_id, id);
+
+-- path=programs: соединение назначений с программой и слушателем (покрывающий индекс)
+CREATE INDEX IF NOT EXISTS idx_user_assignments_program_id ON user_assignments(program_id) INCLUDE (user_id);
+
+-- path=assignments&user_id=...: назначения слушателя в порядке дедлайна
+CREATE INDEX IF NOT EXISTS idx_user_assignments_user_id_deadline ON user_assignments(user_id, deadline);
+DROP INDEX IF EXISTS idx_user_assignments_user_id;
+
+-- path=programs, path=assignments&user_id=...: сессии слушателя с фильтром по статусу и баллом без обращения к таблице
+CREATE INDEX IF NOT EXISTS idx_test_sessions_user_id_status ON test_sessions(user_id, status) INCLUDE (score);
+DROP INDEX IF EXISTS idx_test_sessions_user_id;
+
+-- path=stats: COUNT и AVG(score) по завершённым сессиям через index-only scan
+CREATE INDEX IF NOT EXISTS idx_test_sessions_status_score ON test_sessions(status) INCLUDE (score);
+DROP INDEX IF EXISTS idx_test_sessions_status;
+
+-- Отчёты по инструкции и каскадные проверки внешних ключей
+CREATE INDEX IF NOT EXISTS idx_test_sessions_instruction_id ON test_sessions(instruction_id);
+CREATE INDEX IF NOT EXISTS idx_test_answers_session_id ON test_answers(session_id);
+CREATE INDEX IF NOT EXISTS idx_test_answers_question_id ON test_answers(question_id);
+
+-- Дашборд: сертификаты с истекающим сроком действия
+CREATE INDEX IF NOT EXISTS idx_certificates_valid_until ON certificates(valid_until);
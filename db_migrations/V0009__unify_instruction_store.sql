@@ -0,0 +1,31 @@
+-- Единая схема инструкций для backend/api и backend/manage-instructions.
+-- V0006 не создал свою таблицу (IF NOT EXISTS), поэтому основой остаётся таблица из V0001;
+-- строковые идентификаторы из V0006 хранятся в колонке code.
+ALTER TABLE instructions ADD COLUMN IF NOT EXISTS code VARCHAR(255);
+ALTER TABLE instructions ADD COLUMN IF NOT EXISTS version INT NOT NULL DEFAULT 1;
+ALTER TABLE instructions ADD COLUMN IF NOT EXISTS content_hash CHAR(64);
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_instructions_code ON instructions(code);
+
+UPDATE instructions
+SET content_hash = encode(sha256(convert_to(COALESCE(content, ''), 'UTF8')), 'hex')
+WHERE content_hash IS NULL;
+
+-- История изменений: каждая правка дописывает строку, содержимое хранится сжатым (zlib)
+CREATE TABLE IF NOT EXISTS instruction_revisions (
+    instruction_id INT NOT NULL REFERENCES instructions(id),
+    version INT NOT NULL,
+    title VARCHAR(500) NOT NULL,
+    content_compressed BYTEA,
+    content_encoding VARCHAR(10) NOT NULL DEFAULT 'zlib' CHECK (content_encoding IN ('zlib', 'none')),
+    content_hash CHAR(64),
+    created_by INT REFERENCES users(id),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (instruction_id, version)
+);
+
+-- Первая ревизия существующих инструкций: SQL не умеет zlib, поэтому без сжатия
+INSERT INTO instruction_revisions (instruction_id, version, title, content_compressed, content_encoding, content_hash, created_by, created_at)
+SELECT id, version, title, convert_to(COALESCE(content, ''), 'UTF8'), 'none', content_hash, created_by, COALESCE(updated_at, created_at)
+FROM instructions
+ON CONFLICT (instruction_id, version) DO NOTHING;
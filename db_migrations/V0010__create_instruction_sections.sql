@@ -0,0 +1,16 @@
+-- Содержимое инструкций по разделам (общие требования, перед началом работы, во время работы,
+-- в аварийных ситуациях, по окончании работы). Тело раздела включает его заголовок, поэтому
+-- склейка разделов по ordinal даёт исходный текст instructions.content.
+CREATE TABLE IF NOT EXISTS instruction_sections (
+    instruction_id INT NOT NULL REFERENCES instructions(id),
+    ordinal INT NOT NULL,
+    section_key VARCHAR(50),
+    heading VARCHAR(500),
+    body TEXT NOT NULL,
+    content_hash CHAR(64) NOT NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (instruction_id, ordinal)
+);
+
+-- Загрузка раздела по ключу: path=instruction&section=before-work
+CREATE INDEX IF NOT EXISTS idx_instruction_sections_key ON instruction_sections(instruction_id, section_key);
@@ -0,0 +1,47 @@
+-- Журнал изменений каталога для инкрементальной синхронизации клиентов (api path=changes).
+-- Триггеры записывают только сущность и id; актуальное состояние или удаление
+-- определяется при чтении. txid — транзакция изменения: токен клиента хранит
+-- txid_snapshot_xmin, поэтому изменения из незавершённых транзакций не теряются.
+CREATE TABLE IF NOT EXISTS catalog_changes (
+    id BIGSERIAL PRIMARY KEY,
+    entity VARCHAR(20) NOT NULL CHECK (entity IN ('instruction', 'program', 'question')),
+    entity_id INT NOT NULL,
+    txid BIGINT NOT NULL DEFAULT txid_current(),
+    changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_catalog_changes_txid ON catalog_changes(txid);
+CREATE INDEX IF NOT EXISTS idx_catalog_changes_changed_at ON catalog_changes(changed_at);
+
+CREATE OR REPLACE FUNCTION log_catalog_change() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        INSERT INTO catalog_changes (entity, entity_id) VALUES (TG_ARGV[0], OLD.id);
+    ELSE
+        INSERT INTO catalog_changes (entity, entity_id) VALUES (TG_ARGV[0], NEW.id);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- UPDATE без фактических изменений не попадает в журнал
+DROP TRIGGER IF EXISTS trg_instructions_changes ON instructions;
+CREATE TRIGGER trg_instructions_changes AFTER INSERT OR DELETE ON instructions
+    FOR EACH ROW EXECUTE PROCEDURE log_catalog_change('instruction');
+DROP TRIGGER IF EXISTS trg_instructions_changes_update ON instructions;
+CREATE TRIGGER trg_instructions_changes_update AFTER UPDATE ON instructions
+    FOR EACH ROW WHEN (OLD.* IS DISTINCT FROM NEW.*) EXECUTE PROCEDURE log_catalog_change('instruction');
+
+DROP TRIGGER IF EXISTS trg_training_programs_changes ON training_programs;
+CREATE TRIGGER trg_training_programs_changes AFTER INSERT OR DELETE ON training_programs
+    FOR EACH ROW EXECUTE PROCEDURE log_catalog_change('program');
+DROP TRIGGER IF EXISTS trg_training_programs_changes_update ON training_programs;
+CREATE TRIGGER trg_training_programs_changes_update AFTER UPDATE ON training_programs
+    FOR EACH ROW WHEN (OLD.* IS DISTINCT FROM NEW.*) EXECUTE PROCEDURE log_catalog_change('program');
+
+DROP TRIGGER IF EXISTS trg_test_questions_changes ON test_questions;
+CREATE TRIGGER trg_test_questions_changes AFTER INSERT OR DELETE ON test_questions
+    FOR EACH ROW EXECUTE PROCEDURE log_catalog_change('question');
+DROP TRIGGER IF EXISTS trg_test_questions_changes_update ON test_questions;
+CREATE TRIGGER trg_test_questions_changes_update AFTER UPDATE ON test_questions
+    FOR EACH ROW WHEN (OLD.* IS DISTINCT FROM NEW.*) EXECUTE PROCEDURE log_catalog_change('question');
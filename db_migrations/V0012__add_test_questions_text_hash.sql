@@ -0,0 +1,7 @@
+-- Хеш нормализованного текста вопроса для дедупликации при сохранении билетов generate-test.
+-- Нормализацию (регистр, пробелы, пунктуация) выполняет функция на Python, поэтому
+-- существующие строки получают хеш при первом сохранении вопросов их инструкции.
+ALTER TABLE test_questions ADD COLUMN IF NOT EXISTS text_hash CHAR(64);
+
+-- NULL не конфликтуют, поэтому индекс не мешает строкам без хеша
+CREATE UNIQUE INDEX IF NOT EXISTS idx_test_questions_text_hash ON test_questions(instruction_id, text_hash);
@@ -0,0 +1,14 @@
+-- MinHash-подпись вопроса (64 x uint64) и LSH-полосы для поиска почти одинаковых вопросов
+-- в generate-test (near_duplicates.py). Подписи считаются на Python; существующие строки
+-- получают их при первом сохранении вопросов или отчёте duplicates по их инструкции.
+ALTER TABLE test_questions ADD COLUMN IF NOT EXISTS minhash BYTEA;
+
+CREATE TABLE IF NOT EXISTS test_question_lsh (
+    instruction_id INT NOT NULL,
+    band SMALLINT NOT NULL,
+    bucket BIGINT NOT NULL,
+    question_id INT NOT NULL REFERENCES test_questions(id) ON DELETE CASCADE,
+    PRIMARY KEY (instruction_id, band, bucket, question_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_test_question_lsh_question_id ON test_question_lsh(question_id);
@@ -0,0 +1,7 @@
+-- Ключ идемпотентности принадлежит пользователю: одинаковый Idempotency-Key
+-- разных пользователей не должен возвращать чужой сохранённый ответ.
+-- user_key — идентификатор из get_user_key (X-User-Id, user_id или IP клиента).
+ALTER TABLE idempotency_keys ADD COLUMN IF NOT EXISTS user_key VARCHAR(255) NOT NULL DEFAULT '';
+
+ALTER TABLE idempotency_keys DROP CONSTRAINT IF EXISTS idempotency_keys_pkey;
+ALTER TABLE idempotency_keys ADD PRIMARY KEY (scope, user_key, idempotency_key);
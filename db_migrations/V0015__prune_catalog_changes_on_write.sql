@@ -0,0 +1,21 @@
+-- Очистка журнала catalog_changes на стороне записи: GET path=changes только читает.
+-- Триггер срабатывает на каждую вставку в журнал (то есть на любое изменение каталога
+-- из api, manage-instructions или generate-test) и примерно в одном случае из ста
+-- удаляет до 1000 записей старше 30 дней (CATALOG_CHANGES_PRUNE_DAYS в change_feed.py).
+CREATE OR REPLACE FUNCTION prune_catalog_changes() RETURNS trigger AS $$
+BEGIN
+    IF random() < 0.01 THEN
+        DELETE FROM catalog_changes
+        WHERE id IN (
+            SELECT id FROM catalog_changes
+            WHERE changed_at < NOW() - INTERVAL '30 days'
+            LIMIT 1000
+        );
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_catalog_changes_prune ON catalog_changes;
+CREATE TRIGGER trg_catalog_changes_prune AFTER INSERT ON catalog_changes
+    FOR EACH STATEMENT EXECUTE PROCEDURE prune_catalog_changes();
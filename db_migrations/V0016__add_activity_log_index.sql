@@ -0,0 +1,4 @@
+-- path=activity: ORDER BY created_at DESC LIMIT без сортировки всей activity_log.
+-- Индекс с этим именем создаёт V0001; здесь он закреплён за маршрутом вместе с
+-- остальными индексами V0008 и создаётся, если в базе его нет.
+CREATE INDEX IF NOT EXISTS idx_activity_log_created_at ON activity_log(created_at DESC);
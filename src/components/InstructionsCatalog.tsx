@@ -18,6 +18,7 @@ interface Instruction {
   profession: string;
   content?: string;
   lastUpdated: string;
+  version?: number;
 }
 
 interface InstructionsCatalogProps {
@@ -100,17 +101,24 @@ export default function InstructionsCatalog({
           path: 'update-instruction',
           id: selectedInstruction.id,
           title: editedTitle,
-          content: editedContent
+          content: editedContent,
+          version: selectedInstruction.version
         })
       });
 
       const data = await response.json();
       
+      if (response.status === 409) {
+        alert('Инструкцию уже изменил другой пользователь. Откройте её заново, чтобы увидеть актуальную версию');
+        return;
+      }
+
       if (data.success) {
         setSelectedInstruction({
           ...selectedInstruction,
           title: editedTitle,
-          content: editedContent
+          content: editedContent,
+          version: data.version
         });
         setIsEditing(false);
         onInstructionUpdate?.();
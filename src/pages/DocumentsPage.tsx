@@ -22,6 +22,8 @@ import {
   SelectValue,
 } from '@/components/ui/select';
 
+const GENERATE_DOCUMENT_URL = 'https://functions.poehali.dev/10e5d546-414f-4059-8c93-a33a547cf157';
+
 interface DocumentsPageProps {
   onBack: () => void;
 }
@@ -100,7 +102,7 @@ export default function DocumentsPage({ onBack }: DocumentsPageProps) {
     setIsGenerating(true);
 
     try {
-      const response = await fetch('https://functions.poehali.dev/10e5d546-414f-4059-8c93-a33a547cf157', {
+      const response = await fetch(GENERATE_DOCUMENT_URL, {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json'
@@ -169,80 +171,38 @@ export default function DocumentsPage({ onBack }: DocumentsPageProps) {
     setSelectedDocument({ ...selectedDocument, content: updatedContent });
   };
 
-  const handleDownloadDOCX = (doc: Document) => {
-    const htmlContent = `
-      <!DOCTYPE html>
-      <html>
-        <head>
-          <meta charset="UTF-8">
-          <style>
-            body { font-family: Arial, sans-serif; line-height: 1.6; margin: 40px; }
-            h1 { font-size: 24px; font-weight: bold; margin-bottom: 20px; }
-            h2 { font-size: 20px; font-weight: bold; margin-top: 30px; margin-bottom: 15px; }
-            h3 { font-size: 16px; font-weight: bold; margin-top: 20px; margin-bottom: 10px; }
-            p { margin-bottom: 10px; }
-            ul, ol { margin-left: 20px; margin-bottom: 10px; }
-            table { border-collapse: collapse; width: 100%; margin: 20px 0; }
-            th, td { border: 1px solid black; padding: 8px; text-align: left; }
-            th { background-color: #f0f0f0; font-weight: bold; }
-          </style>
-        </head>
-        <body>
-          ${markdownToHTML(doc.content)}
-        </body>
-      </html>
-    `;
-
-    const blob = new Blob([htmlContent], { type: 'application/msword' });
-    const url = URL.createObjectURL(blob);
-    const link = document.createElement('a');
-    link.href = url;
-    link.download = `${doc.title}.doc`;
-    document.body.appendChild(link);
-    link.click();
-    document.body.removeChild(link);
-    URL.revokeObjectURL(url);
-  };
-
-
-
-  const markdownToHTML = (markdown: string): string => {
-    let html = markdown;
-
-    // Заголовки
-    html = html.replace(/^### (.*$)/gim, '<h3>$1</h3>');
-    html = html.replace(/^## (.*$)/gim, '<h2>$1</h2>');
-    html = html.replace(/^# (.*$)/gim, '<h1>$1</h1>');
-
-    // Жирный текст
-    html = html.replace(/\*\*(.+?)\*\*/g, '<strong>$1</strong>');
-
-    // Курсив
-    html = html.replace(/\*(.+?)\*/g, '<em>$1</em>');
-
-    // Списки
-    html = html.replace(/^- (.+)$/gim, '<li>$1</li>');
-    html = html.replace(/^\* (.+)$/gim, '<li>$1</li>');
-    html = html.replace(/(<li>.*<\/li>)/s, '<ul>$1</ul>');
-
-    // Нумерованные списки
-    html = html.replace(/^\d+\. (.+)$/gim, '<li>$1</li>');
-
-    // Горизонтальная линия
-    html = html.replace(/^---$/gim, '<hr />');
-
-    // Таблицы (упрощенная обработка)
-    html = html.replace(/\|(.+)\|/g, (match, content) => {
-      const cells = content.split('|').map((cell: string) => cell.trim());
-      return '<tr>' + cells.map((cell: string) => `<td>${cell}</td>`).join('') + '</tr>';
-    });
-    html = html.replace(/(<tr>.*<\/tr>)/s, '<table>$1</table>');
+  const handleDownload = async (doc: Document, format: 'docx' | 'pdf') => {
+    try {
+      // Файл собирается на сервере из текущего (в том числе отредактированного) Markdown
+      const response = await fetch(GENERATE_DOCUMENT_URL, {
+        method: 'POST',
+        headers: {
+          'Content-Type': 'application/json'
+        },
+        body: JSON.stringify({
+          title: doc.title,
+          content: doc.content,
+          format
+        })
+      });
 
-    // Параграфы
-    html = html.replace(/\n\n/g, '</p><p>');
-    html = '<p>' + html + '</p>';
+      if (!response.ok) {
+        throw new Error('Ошибка при экспорте документа');
+      }
 
-    return html;
+      const blob = await response.blob();
+      const url = URL.createObjectURL(blob);
+      const link = document.createElement('a');
+      link.href = url;
+      link.download = `${doc.title}.${format}`;
+      document.body.appendChild(link);
+      link.click();
+      document.body.removeChild(link);
+      URL.revokeObjectURL(url);
+    } catch (error) {
+      console.error('Ошибка экспорта:', error);
+      alert('Не удалось скачать документ. Попробуйте еще раз.');
+    }
   };
 
   return (
@@ -356,15 +316,26 @@ export default function DocumentsPage({ onBack }: DocumentsPageProps) {
                         Редактировать
                       </Button>
                     </div>
-                    <Button 
-                      variant="outline" 
-                      size="sm" 
-                      className="w-full"
-                      onClick={() => handleDownloadDOCX(doc)}
-                    >
-                      <Icon name="Download" className="h-4 w-4 mr-2" />
-                      Скачать DOCX
-                    </Button>
+                    <div className="flex gap-2">
+                      <Button 
+                        variant="outline" 
+                        size="sm" 
+                        className="flex-1"
+                        onClick={() => handleDownload(doc, 'docx')}
+                      >
+                        <Icon name="Download" className="h-4 w-4 mr-2" />
+                        DOCX
+                      </Button>
+                      <Button 
+                        variant="outline" 
+                        size="sm" 
+                        className="flex-1"
+                        onClick={() => handleDownload(doc, 'pdf')}
+                      >
+                        <Icon name="FileDown" className="h-4 w-4 mr-2" />
+                        PDF
+                      </Button>
+                    </div>
                   </div>
                 </CardContent>
               </Card>
@@ -511,12 +482,21 @@ export default function DocumentsPage({ onBack }: DocumentsPageProps) {
                 <Button 
                   variant="outline" 
                   className="flex-1"
-                  onClick={() => selectedDocument && handleDownloadDOCX(selectedDocument)}
+                  onClick={() => selectedDocument && handleDownload(selectedDocument, 'docx')}
                 >
                   <Icon name="Download" className="h-4 w-4 mr-2" />
                   Скачать DOCX
                 </Button>
 
+                <Button 
+                  variant="outline" 
+                  className="flex-1"
+                  onClick={() => selectedDocument && handleDownload(selectedDocument, 'pdf')}
+                >
+                  <Icon name="FileDown" className="h-4 w-4 mr-2" />
+                  Скачать PDF
+                </Button>
+
                 <Button 
                   variant="outline" 
                   className="flex-1"
@@ -149,7 +149,7 @@ export default function TestBuilder({ onBack, testId }: TestBuilderProps) {
 
       const data = await response.json();
       setQuestions(data.questions);
-      alert(`Успешно сгенерировано ${data.questions.length} вопросов`);
+      alert(data.shortfall ? data.message : `Успешно сгенерировано ${data.questions.length} вопросов`);
     } catch (error) {
       console.error(error);
       alert('Ошибка при генерации теста');
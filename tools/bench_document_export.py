@@ -0,0 +1,104 @@
+'''
+Бенчмарк экспорта документов generate-document в DOCX и PDF
+
+Для каждого типа документа рендерит Markdown (как handler) и замеряет
+медиану времени docx_writer.write_docx и pdf_writer.write_pdf, размер файла
+и число страниц PDF. Итог — документы и страницы PDF в секунду на одном
+потоке и пакетом через batch_archive.write_archive (ZIP с --workers потоками,
+как body.documents в handler). Загрузка шрифта (холодный старт) замеряется
+отдельно. Шрифт ищется так же, как в функции: PDF_FONT_PATH или DejaVu Sans.
+
+Пример:
+    python tools/bench_document_export.py
+    python tools/bench_document_export.py --iterations 50 --batch 100 --workers 8
+'''
+import argparse
+import io
+import os
+import statistics
+import sys
+import time
+from typing import Callable, List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FUNCTION_DIR = os.path.join(ROOT, 'backend', 'generate-document')
+DOC_TYPES = ['program', 'iot', 'di', 'profession', 'tool', 'electro', 'generic']
+SAMPLE = ('ИОТ при работе с болгаркой', 'Электроинструмент',
+          'Инструкция для работы с угловой шлифовальной машиной при резке металла')
+
+sys.path.insert(0, FUNCTION_DIR)
+import batch_archive  # noqa: E402
+import docx_writer  # noqa: E402
+import index  # noqa: E402
+import pdf_writer  # noqa: E402
+
+
+def measure(write: Callable[[io.BytesIO], object], iterations: int) -> Tuple[float, int, object]:
+    '''Медиана в мс, размер файла в байтах и то, что вернул write'''
+    timings: List[float] = []
+    for _ in range(iterations):
+        out = io.BytesIO()
+        started = time.perf_counter()
+        result = write(out)
+        timings.append((time.perf_counter() - started) * 1e3)
+    return statistics.median(timings), len(out.getvalue()), result
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Экспорт generate-document в DOCX и PDF: документы и страницы в секунду')
+    parser.add_argument('--iterations', type=int, default=20)
+    parser.add_argument('--types', nargs='*', default=DOC_TYPES)
+    parser.add_argument('--batch', type=int, default=50, help='Документов в пакете (0 — без пакетного замера)')
+    parser.add_argument('--workers', type=int, default=batch_archive.BATCH_WORKERS)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    try:
+        fonts = pdf_writer.load_fonts()
+    except FileNotFoundError as e:
+        print(e, file=sys.stderr)
+        return 1
+    print(f'шрифты: {", ".join(font.name for font in fonts)} ({(time.perf_counter() - started) * 1e3:.1f} мс)')
+
+    print(f'{"тип":12s} {"docx мс":>8s} {"docx КБ":>8s} {"pdf мс":>8s} {"pdf КБ":>8s} {"стр.":>5s} {"стр./с":>8s}')
+    totals = {'docx': 0.0, 'pdf': 0.0, 'pages': 0}
+    for doc_type in args.types:
+        markdown = index.generate_document_content(doc_type, *SAMPLE)
+        docx_ms, docx_size, _ = measure(lambda out: docx_writer.write_docx(out, markdown, SAMPLE[0]), args.iterations)
+        pdf_ms, pdf_size, pages = measure(lambda out: pdf_writer.write_pdf(out, markdown, SAMPLE[0]), args.iterations)
+        totals['docx'] += docx_ms
+        totals['pdf'] += pdf_ms
+        totals['pages'] += pages
+        print(f'{doc_type:12s} {docx_ms:8.2f} {docx_size / 1024:8.1f} {pdf_ms:8.2f} {pdf_size / 1024:8.1f} '
+              f'{pages:5d} {pages / pdf_ms * 1e3:8.1f}')
+    count = len(args.types)
+    print(f'один поток: docx {count / totals["docx"] * 1e3:.1f} док./с, '
+          f'pdf {count / totals["pdf"] * 1e3:.1f} док./с, {totals["pages"] / totals["pdf"] * 1e3:.1f} стр./с')
+
+    if args.batch:
+        specs = [batch_archive.DocumentSpec(args.types[number % count], f'{SAMPLE[0]} {number}', *SAMPLE[1:])
+                 for number in range(args.batch)]
+        for export_format in ('docx', 'pdf'):
+            pages = []
+
+            def render(spec: batch_archive.DocumentSpec) -> bytes:
+                out = io.BytesIO()
+                markdown = index.render_document(*spec)[0]
+                if export_format == 'pdf':
+                    pages.append(pdf_writer.write_pdf(out, markdown, spec.title))
+                else:
+                    docx_writer.write_docx(out, markdown, spec.title)
+                return out.getvalue()
+
+            out = io.BytesIO()
+            started = time.perf_counter()
+            batch_archive.write_archive(out, specs, render, export_format, {}, args.workers)
+            elapsed = time.perf_counter() - started
+            rate = f', {sum(pages) / elapsed:.1f} стр./с' if pages else ''
+            print(f'пакет {export_format}: {args.batch} док. за {elapsed:.2f} с ({args.workers} потоков), '
+                  f'{args.batch / elapsed:.1f} док./с{rate}, архив {len(out.getvalue()) / 1024:.0f} КБ')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,126 @@
+'''
+Микробенчмарк рендера документов в backend/generate-document
+
+Сравнивает generate_document_content из рабочего дерева с версией из git
+(по умолчанию — коммит перед появлением template_registry.py, где каждый тип
+документа был функцией с f-строкой). get_current_date в обеих версиях
+подменяется константой, чтобы сравнивались только шаблоны; с --with-date
+остаётся настоящая дата. Текущая версия отдаёт повторные документы из кеша
+рендера (RENDER_CACHE_SIZE=0 отключает его). Для каждого типа
+печатает медиану времени вызова и пиковый объём памяти, выделенной за вызов
+(tracemalloc).
+
+Пример:
+    python tools/bench_document_templates.py
+    python tools/bench_document_templates.py --iterations 50000 --baseline HEAD~3
+    RENDER_CACHE_SIZE=0 python tools/bench_document_templates.py --with-date
+'''
+import argparse
+import importlib.util
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from types import ModuleType
+from typing import Callable, Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FUNCTION_DIR = os.path.join(ROOT, 'backend', 'generate-document')
+FUNCTION_PATH = 'backend/generate-document/'
+DOC_TYPES = ['program', 'iot', 'di', 'profession', 'tool', 'electro', 'generic']
+SAMPLE = ('ИОТ при работе с болгаркой', 'Электроинструмент',
+          'Инструкция для работы с угловой шлифовальной машиной при резке металла')
+
+
+def load_module(name: str, path: str) -> ModuleType:
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def default_baseline() -> str:
+    added = subprocess.run(
+        ['git', 'log', '--format=%H', '--diff-filter=A', '--', f'{FUNCTION_PATH}template_registry.py'],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    ).stdout.split()
+    return f'{added[-1]}^' if added else 'HEAD'
+
+
+def load_function(name: str, function_dir: str, fixed_date: bool = True) -> ModuleType:
+    sys.path.insert(0, function_dir)
+    try:
+        module = load_module(name, os.path.join(function_dir, 'index.py'))
+    finally:
+        sys.path.remove(function_dir)
+        for entry in os.listdir(function_dir):
+            if entry.endswith('.py'):
+                sys.modules.pop(entry[:-3], None)
+    if fixed_date:
+        module.get_current_date = lambda: '19.10.2026'
+    return module
+
+
+def load_baseline(revision: str, workdir: str, fixed_date: bool = True) -> ModuleType:
+    '''Файлы функции (index.py, модули, шаблоны) из указанной ревизии'''
+    listing = subprocess.run(
+        ['git', 'ls-tree', '-r', '--name-only', revision, FUNCTION_PATH],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    ).stdout.split()
+    for path in listing:
+        source = subprocess.run(['git', 'show', f'{revision}:{path}'], cwd=ROOT, capture_output=True, check=True).stdout
+        target = os.path.join(workdir, path[len(FUNCTION_PATH):])
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, 'wb') as f:
+            f.write(source)
+    return load_function('generate_document_baseline', workdir, fixed_date)
+
+
+def measure(render: Callable, doc_type: str, iterations: int, alloc_iterations: int) -> Dict[str, float]:
+    timings: List[float] = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        render(doc_type, *SAMPLE)
+        timings.append((time.perf_counter() - started) * 1e6)
+
+    # Аллокации отдельным проходом: tracemalloc замедляет код
+    tracemalloc.start()
+    peaks = []
+    for _ in range(alloc_iterations):
+        tracemalloc.reset_peak()
+        base, _ = tracemalloc.get_traced_memory()
+        render(doc_type, *SAMPLE)
+        peaks.append(tracemalloc.get_traced_memory()[1] - base)
+    tracemalloc.stop()
+    return {'us': statistics.median(timings), 'peak_kb': statistics.fmean(peaks) / 1024}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Рендер generate-document: рабочее дерево против ревизии из git')
+    parser.add_argument('--baseline', help='Ревизия для сравнения (по умолчанию перед template_registry.py)')
+    parser.add_argument('--iterations', type=int, default=20000)
+    parser.add_argument('--alloc-iterations', type=int, default=200)
+    parser.add_argument('--types', nargs='*', default=DOC_TYPES)
+    parser.add_argument('--with-date', action='store_true', help='Не подменять get_current_date')
+    args = parser.parse_args()
+
+    revision = args.baseline or default_baseline()
+    current = load_function('generate_document_current', FUNCTION_DIR, not args.with_date)
+    with tempfile.TemporaryDirectory() as workdir:
+        baseline = load_baseline(revision, workdir, not args.with_date)
+        print(f'baseline: {revision}')
+        print(f'{"тип":12s} {"baseline мкс":>13s} {"текущая мкс":>12s} {"baseline КБ":>12s} {"текущая КБ":>11s}')
+        for doc_type in args.types:
+            if baseline.generate_document_content(doc_type, *SAMPLE) != current.generate_document_content(doc_type, *SAMPLE):
+                print(f'{doc_type:12s} документ отличается от baseline', file=sys.stderr)
+            old = measure(baseline.generate_document_content, doc_type, args.iterations, args.alloc_iterations)
+            new = measure(current.generate_document_content, doc_type, args.iterations, args.alloc_iterations)
+            print(f'{doc_type:12s} {old["us"]:13.2f} {new["us"]:12.2f} {old["peak_kb"]:12.1f} {new["peak_kb"]:11.1f}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
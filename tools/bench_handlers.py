@@ -0,0 +1,366 @@
+'''
+Нагрузочный бенчмарк облачных функций backend/*/index.py
+
+Импортирует handler каждой функции, прогоняет синтетические события против
+локального Postgres (DATABASE_URL) и считает задержки p50/p95/p99, число SQL
+запросов на вызов и аллокации на маршрут. Результат сохраняется в JSON, чтобы
+сравнивать прогоны между коммитами.
+
+Пример:
+    DATABASE_URL=postgresql://localhost/edu python tools/bench_handlers.py \\
+        --iterations 200 --concurrency 16 --compare bench-results/baseline.json
+'''
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BACKEND_DIR = os.path.join(ROOT, 'backend')
+
+_query_counter = threading.local()
+_handlers: Dict[str, Callable] = {}
+
+
+def install_query_counter() -> bool:
+    '''
+    Подменяет psycopg2.connect так, чтобы каждое соединение считало execute().
+    Если в _query_counter.captured лежит список, туда пишется текст каждого запроса.
+    '''
+    try:
+        import psycopg2
+        import psycopg2.extensions
+    except ImportError:
+        return False
+
+    if getattr(psycopg2, '_bench_patched', False):
+        return True
+
+    def counting(base: type) -> type:
+        class CountingCursor(base):
+            def execute(self, query, vars=None):
+                _query_counter.count = getattr(_query_counter, 'count', 0) + 1
+                captured = getattr(_query_counter, 'captured', None)
+                if captured is not None:
+                    captured.append(self.mogrify(query, vars).decode('utf-8'))
+                return super().execute(query, vars)
+        return CountingCursor
+
+    original_connect = psycopg2.connect
+
+    def counting_connect(*args, **kwargs):
+        # Сохраняем фабрику курсоров самой функции (например, ProfilingCursor)
+        kwargs['cursor_factory'] = counting(kwargs.get('cursor_factory') or psycopg2.extensions.cursor)
+        return original_connect(*args, **kwargs)
+
+    psycopg2.connect = counting_connect
+    psycopg2._bench_patched = True
+    return True
+
+
+def disable_rate_limits() -> None:
+    '''Бенчмарк меряет стоимость handler, а не admission control api'''
+    for name in ('RATE_LIMIT_USER_RPS', 'RATE_LIMIT_USER_BURST', 'RATE_LIMIT_ROUTE_RPS', 'RATE_LIMIT_ROUTE_BURST'):
+        os.environ.setdefault(name, '1000000000')
+
+
+def load_handler(function_name: str) -> Callable:
+    '''Загружает backend/<function_name>/index.py как отдельный модуль и возвращает handler'''
+    if function_name in _handlers:
+        return _handlers[function_name]
+
+    function_dir = os.path.join(BACKEND_DIR, function_name)
+    if function_dir not in sys.path:
+        sys.path.insert(0, function_dir)
+    module_name = 'bench_' + function_name.replace('-', '_')
+    spec = importlib.util.spec_from_file_location(module_name, os.path.join(function_dir, 'index.py'))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    spec.loader.exec_module(module)
+    _handlers[function_name] = module.handler
+    return module.handler
+
+
+def make_event(method: str, params: Optional[Dict[str, str]] = None, body: Optional[Dict[str, Any]] = None,
+               headers: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    return {
+        'httpMethod': method,
+        'queryStringParameters': params or {},
+        'headers': headers or {'Content-Type': 'application/json'},
+        'body': json.dumps(body, ensure_ascii=False) if body is not None else '',
+        'isBase64Encoded': False
+    }
+
+
+def make_context(function_name: str) -> SimpleNamespace:
+    return SimpleNamespace(request_id=uuid.uuid4().hex, function_name=function_name)
+
+
+def id_ranges(has_db: bool) -> Dict[str, Tuple[int, int]]:
+    '''Диапазоны id в базе, чтобы синтетические запросы попадали в существующие строки'''
+    ranges = {'users': (1, 1), 'instructions': (1, 1), 'training_programs': (1, 1), 'test_questions': (1, 1)}
+    if not has_db:
+        return ranges
+    import psycopg2
+    conn = psycopg2.connect(os.environ['DATABASE_URL'])
+    try:
+        with conn.cursor() as cur:
+            for table in ranges:
+                cur.execute(f'SELECT COALESCE(MIN(id), 1), COALESCE(MAX(id), 1) FROM {table}')
+                ranges[table] = cur.fetchone()
+    finally:
+        conn.close()
+    return ranges
+
+
+def build_scenarios(ranges: Dict[str, Tuple[int, int]]) -> Dict[str, Tuple[str, Callable[[random.Random], Dict[str, Any]], bool]]:
+    '''
+    Сценарии: имя маршрута -> (функция, генератор события, нужна ли база).
+    generate-instruction и upload-video ходят во внешние сервисы,
+    поэтому для них меряется только OPTIONS (холодный путь без SDK).
+    '''
+    def rid(table: str, rng: random.Random) -> int:
+        low, high = ranges[table]
+        return rng.randint(low, high)
+
+    def test_session(rng: random.Random) -> Dict[str, Any]:
+        answers = [{'question_id': rid('test_questions', rng), 'user_answer': rng.randint(0, 3)} for _ in range(10)]
+        return make_event('POST', {'path': 'test-session'}, {
+            'user_id': rid('users', rng),
+            'instruction_id': rid('instructions', rng),
+            'test_mode': 'exam',
+            'answers': answers,
+            'time_spent_seconds': rng.randint(60, 1800)
+        })
+
+    return {
+        'api:users': ('api', lambda rng: make_event('GET', {'path': 'users', 'role': 'student'}), True),
+        'api:instructions': ('api', lambda rng: make_event('GET', {'path': 'instructions'}), True),
+        'api:instruction': ('api', lambda rng: make_event('GET', {'path': 'instruction', 'id': str(rid('instructions', rng))}), True),
+        'api:programs': ('api', lambda rng: make_event('GET', {'path': 'programs'}), True),
+        'api:assignments': ('api', lambda rng: make_event('GET', {'path': 'assignments'}), True),
+        'api:assignments-user': ('api', lambda rng: make_event('GET', {'path': 'assignments', 'user_id': str(rid('users', rng))}), True),
+        'api:assignments-post': ('api', lambda rng: make_event('POST', {'path': 'assignments'}, {
+            'user_id': rid('users', rng),
+            'program_id': rid('training_programs', rng),
+            'deadline': '2030-12-31'
+        }), True),
+        'api:test-questions': ('api', lambda rng: make_event('GET', {'path': 'test-questions', 'instruction_id': str(rid('instructions', rng))}), True),
+        'api:test-session': ('api', test_session, True),
+        'api:activity': ('api', lambda rng: make_event('GET', {'path': 'activity', 'limit': '20'}), True),
+        'api:stats': ('api', lambda rng: make_event('GET', {'path': 'stats'}), True),
+        'manage-instructions:instructions': ('manage-instructions', lambda rng: make_event('GET', {'path': 'instructions'}), True),
+        'manage-instructions:instruction': ('manage-instructions', lambda rng: make_event('GET', {'path': 'instruction', 'id': str(rid('instructions', rng))}), True),
+        'generate-test:occupational-safety': ('generate-test', lambda rng: make_event('POST', body={
+            'title': 'Бенчмарк', 'topic': 'occupational-safety', 'questionCount': 20
+        }), False),
+        'generate-test:random-topic': ('generate-test', lambda rng: make_event('POST', body={
+            'title': 'Бенчмарк',
+            'topic': rng.choice(['first-aid', 'fire-safety', 'work-at-height', 'explosives', 'underground-mining', 'other']),
+            'questionCount': rng.choice([10, 20, 50])
+        }), False),
+        'generate-document:iot': ('generate-document', lambda rng: make_event('POST', body={
+            'type': 'iot', 'title': 'ИОТ для машиниста ПДМ', 'category': 'Подземные работы', 'prompt': 'Погрузочно-доставочная машина'
+        }), False),
+        'generate-document:random-type': ('generate-document', lambda rng: make_event('POST', body={
+            'type': rng.choice(['program', 'iot', 'di', 'profession', 'tool', 'electro', 'other']),
+            'title': 'Документ', 'category': 'Охрана труда', 'prompt': 'Синтетический запрос'
+        }), False),
+        'generate-instruction:options': ('generate-instruction', lambda rng: make_event('OPTIONS'), False),
+        'upload-video:options': ('upload-video', lambda rng: make_event('OPTIONS'), False),
+    }
+
+
+def run_once(route: str, seed: int) -> Tuple[float, int, int]:
+    '''Один вызов сценария: (задержка в мс, число SQL запросов, HTTP статус)'''
+    function_name, make, _ = SCENARIOS[route]
+    handler = load_handler(function_name)
+    event = make(random.Random(seed))
+    _query_counter.count = 0
+    started = time.perf_counter()
+    response = handler(event, make_context(function_name))
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    if not isinstance(response, dict):
+        # Обработчик не вернул ответ: считаем ошибкой, как 502 в tools/dev_server.py
+        return elapsed_ms, _query_counter.count, 502
+    return elapsed_ms, _query_counter.count, response.get('statusCode', 0)
+
+
+def _init_worker(ranges: Dict[str, Tuple[int, int]]) -> None:
+    global SCENARIOS
+    disable_rate_limits()
+    install_query_counter()
+    SCENARIOS = build_scenarios(ranges)
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * pct / 100
+    low = int(k)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (k - low)
+
+
+def summarize(latencies: List[float]) -> Dict[str, float]:
+    return {
+        'p50_ms': round(percentile(latencies, 50), 3),
+        'p95_ms': round(percentile(latencies, 95), 3),
+        'p99_ms': round(percentile(latencies, 99), 3),
+        'mean_ms': round(statistics.fmean(latencies), 3) if latencies else 0.0,
+    }
+
+
+def bench_route(route: str, args: argparse.Namespace, ranges: Dict[str, Tuple[int, int]]) -> Dict[str, Any]:
+    rng = random.Random(args.seed)
+    for _ in range(args.warmup):
+        run_once(route, rng.randrange(1 << 30))
+
+    latencies, queries, statuses = [], [], {}
+    for _ in range(args.iterations):
+        elapsed, count, status = run_once(route, rng.randrange(1 << 30))
+        latencies.append(elapsed)
+        queries.append(count)
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+
+    # Аллокации меряем отдельным проходом: tracemalloc заметно замедляет код
+    tracemalloc.start()
+    peaks, allocated = [], []
+    for _ in range(args.alloc_iterations):
+        tracemalloc.reset_peak()
+        before = tracemalloc.take_snapshot()
+        run_once(route, rng.randrange(1 << 30))
+        _, peak = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot()
+        peaks.append(peak)
+        allocated.append(sum(stat.size_diff for stat in after.compare_to(before, 'filename') if stat.size_diff > 0))
+    tracemalloc.stop()
+
+    result = {
+        'sequential': summarize(latencies),
+        'queries_per_request': round(statistics.fmean(queries), 2) if queries else 0,
+        'alloc_peak_kb': round(statistics.fmean(peaks) / 1024, 1) if peaks else 0,
+        'alloc_retained_kb': round(statistics.fmean(allocated) / 1024, 1) if allocated else 0,
+        'statuses': statuses,
+    }
+
+    if args.concurrency > 1:
+        seeds = [rng.randrange(1 << 30) for _ in range(args.iterations)]
+        if args.pool == 'process':
+            executor = ProcessPoolExecutor(max_workers=args.concurrency, initializer=_init_worker, initargs=(ranges,))
+        else:
+            executor = ThreadPoolExecutor(max_workers=args.concurrency)
+        with executor:
+            started = time.perf_counter()
+            outcomes = list(executor.map(run_once, [route] * len(seeds), seeds))
+            wall = time.perf_counter() - started
+        concurrent = summarize([outcome[0] for outcome in outcomes])
+        concurrent['throughput_rps'] = round(len(outcomes) / wall, 1) if wall else 0.0
+        concurrent['workers'] = args.concurrency
+        concurrent['pool'] = args.pool
+        concurrent['errors'] = sum(1 for outcome in outcomes if outcome[2] >= 500)
+        result['concurrent'] = concurrent
+
+    return result
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], max_regression: float) -> bool:
+    '''Печатает изменение p95 относительно baseline; False, если есть регрессия выше порога'''
+    ok = True
+    print(f"\nСравнение с {baseline['meta'].get('revision')}:")
+    for route, result in current['routes'].items():
+        base = baseline.get('routes', {}).get(route)
+        if not base:
+            continue
+        old, new = base['sequential']['p95_ms'], result['sequential']['p95_ms']
+        change = (new - old) / old * 100 if old else 0.0
+        marker = ''
+        if change > max_regression:
+            marker = '  <-- регрессия'
+            ok = False
+        print(f'  {route:40s} p95 {old:9.2f} -> {new:9.2f} ms ({change:+.1f}%){marker}')
+    return ok
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Бенчмарк handler-ов backend/*')
+    parser.add_argument('--routes', nargs='*', help='Маршруты (по умолчанию все доступные)')
+    parser.add_argument('--iterations', type=int, default=100)
+    parser.add_argument('--warmup', type=int, default=5)
+    parser.add_argument('--alloc-iterations', type=int, default=5)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--pool', choices=['thread', 'process'], default='thread')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='Куда сохранить JSON (по умолчанию bench-results/<ревизия>.json)')
+    parser.add_argument('--compare', help='JSON предыдущего прогона для сравнения')
+    parser.add_argument('--max-regression', type=float, default=20.0, help='Допустимый рост p95, %%')
+    args = parser.parse_args()
+
+    global SCENARIOS
+    disable_rate_limits()
+    # Потоки --pool thread делят один экземпляр api: пул соединений на всех (по умолчанию в api — 1)
+    os.environ.setdefault('DB_POOL_SIZE', str(max(1, args.concurrency)))
+    has_db = bool(os.environ.get('DATABASE_URL')) and install_query_counter()
+    ranges = id_ranges(has_db)
+    SCENARIOS = build_scenarios(ranges)
+
+    routes = args.routes or [name for name, (_, _, needs_db) in SCENARIOS.items() if has_db or not needs_db]
+    revision = git_revision()
+    report = {
+        'meta': {
+            'revision': revision,
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'database': has_db,
+            'iterations': args.iterations,
+            'concurrency': args.concurrency,
+            'pool': args.pool,
+        },
+        'routes': {}
+    }
+
+    for route in routes:
+        result = bench_route(route, args, ranges)
+        report['routes'][route] = result
+        seq = result['sequential']
+        print(f"{route:40s} p50 {seq['p50_ms']:8.2f}  p95 {seq['p95_ms']:8.2f}  p99 {seq['p99_ms']:8.2f} ms  "
+              f"q/req {result['queries_per_request']:5.1f}  alloc {result['alloc_peak_kb']:8.1f} KiB")
+
+    output = args.output or os.path.join(ROOT, 'bench-results', f'{revision}.json')
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f'\nРезультаты сохранены в {output}')
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        if not compare(report, baseline, args.max_regression):
+            return 1
+    return 0
+
+
+SCENARIOS: Dict[str, Tuple[str, Callable[[random.Random], Dict[str, Any]], bool]] = {}
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,115 @@
+'''
+Микробенчмарк сборки теста в backend/generate-test
+
+Сравнивает generate_questions_by_topic из рабочего дерева с версией из git
+(по умолчанию — коммит перед появлением question_bank.py, где пулы всех тем
+пересобирались на каждый вызов). Для каждой темы печатает время вызова и
+пиковый объём памяти, выделенной за вызов (tracemalloc).
+
+Пример:
+    python tools/bench_question_bank.py
+    python tools/bench_question_bank.py --count 20 --iterations 20000 --baseline HEAD~5
+'''
+import argparse
+import importlib.util
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from types import ModuleType
+from typing import Callable, Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FUNCTION_DIR = os.path.join(ROOT, 'backend', 'generate-test')
+TOPICS = ['occupational-safety', 'first-aid', 'fire-safety', 'work-at-height', 'explosives', 'underground-mining', 'other']
+
+
+def load_module(name: str, path: str) -> ModuleType:
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def default_baseline() -> str:
+    added = subprocess.run(
+        ['git', 'log', '--format=%H', '--diff-filter=A', '--', 'backend/generate-test/question_bank.py'],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    ).stdout.split()
+    return f'{added[-1]}^' if added else 'HEAD'
+
+
+def load_baseline(revision: str, workdir: str) -> ModuleType:
+    '''index.py и остальные файлы функции (модули, questions.bank) из указанной ревизии'''
+    listing = subprocess.run(
+        ['git', 'ls-tree', '--name-only', revision, 'backend/generate-test/'],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    ).stdout.split()
+    for path in listing:
+        source = subprocess.run(['git', 'show', f'{revision}:{path}'], cwd=ROOT, capture_output=True, check=True).stdout
+        with open(os.path.join(workdir, os.path.basename(path)), 'wb') as f:
+            f.write(source)
+    sys.path.insert(0, workdir)
+    try:
+        return load_module('generate_test_baseline', os.path.join(workdir, 'index.py'))
+    finally:
+        sys.path.remove(workdir)
+        for path in listing:
+            if path.endswith('.py'):
+                sys.modules.pop(os.path.basename(path)[:-3], None)
+
+
+def load_current() -> ModuleType:
+    sys.path.insert(0, FUNCTION_DIR)
+    try:
+        return load_module('generate_test_current', os.path.join(FUNCTION_DIR, 'index.py'))
+    finally:
+        sys.path.remove(FUNCTION_DIR)
+
+
+def measure(generate: Callable, topic: str, count: int, iterations: int, alloc_iterations: int) -> Dict[str, float]:
+    timings: List[float] = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        generate('Бенчмарк', 'iot', topic, count)
+        timings.append((time.perf_counter() - started) * 1e6)
+
+    # Аллокации отдельным проходом: tracemalloc замедляет код
+    tracemalloc.start()
+    peaks = []
+    for _ in range(alloc_iterations):
+        tracemalloc.reset_peak()
+        base, _ = tracemalloc.get_traced_memory()
+        generate('Бенчмарк', 'iot', topic, count)
+        peaks.append(tracemalloc.get_traced_memory()[1] - base)
+    tracemalloc.stop()
+    return {'us': statistics.median(timings), 'peak_kb': statistics.fmean(peaks) / 1024}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Сборка теста generate-test: рабочее дерево против ревизии из git')
+    parser.add_argument('--baseline', help='Ревизия для сравнения (по умолчанию перед question_bank.py)')
+    parser.add_argument('--count', type=int, default=10, help='questionCount')
+    parser.add_argument('--iterations', type=int, default=5000)
+    parser.add_argument('--alloc-iterations', type=int, default=200)
+    parser.add_argument('--topics', nargs='*', default=TOPICS)
+    args = parser.parse_args()
+
+    revision = args.baseline or default_baseline()
+    current = load_current()
+    with tempfile.TemporaryDirectory() as workdir:
+        baseline = load_baseline(revision, workdir)
+        print(f'baseline: {revision}, questionCount={args.count}')
+        print(f'{"тема":22s} {"baseline мкс":>13s} {"текущая мкс":>12s} {"baseline КБ":>12s} {"текущая КБ":>11s}')
+        for topic in args.topics:
+            old = measure(baseline.generate_questions_by_topic, topic, args.count, args.iterations, args.alloc_iterations)
+            new = measure(current.generate_questions_by_topic, topic, args.count, args.iterations, args.alloc_iterations)
+            print(f'{topic:22s} {old["us"]:13.1f} {new["us"]:12.1f} {old["peak_kb"]:12.1f} {new["peak_kb"]:11.1f}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,148 @@
+'''
+Сборка файла банка вопросов для backend/generate-test
+
+Исходник — backend/generate-test/questions.json: {"defaultTopic": ..., "topics":
+{тема: [вопрос | {"ref": id вопроса из другой темы}]}}. Скрипт проверяет вопросы,
+подставляет ссылки и пишет questions.bank (формат описан в question_bank.py).
+Почти одинаковые вопросы (MinHash-похожесть не ниже --threshold, см.
+near_duplicates.py) считаются ошибкой: вместо копии с другой формулировкой
+используйте ссылку ref.
+Версия банка — хеш содержимого, если не задана явно.
+
+Новый файл можно выложить в QUESTION_BANK_PATH без деплоя функции: прогретые
+экземпляры подхватят его при следующей проверке.
+
+Пример:
+    python tools/build_question_bank.py
+    python tools/build_question_bank.py --check        # код возврата 1, если questions.bank устарел
+    python tools/build_question_bank.py --output /mnt/banks/questions.bank --version 2026-10-19
+    python tools/build_question_bank.py --duplicates --threshold 0.5   # только отчёт о похожих вопросах
+'''
+import argparse
+import hashlib
+import json
+import os
+import sys
+import tempfile
+from typing import Any, Dict, List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FUNCTION_DIR = os.path.join(ROOT, 'backend', 'generate-test')
+
+sys.path.insert(0, FUNCTION_DIR)
+
+import near_duplicates  # noqa: E402
+import question_bank  # noqa: E402
+import question_store  # noqa: E402
+
+
+def validate_question(question: Dict[str, Any]) -> List[str]:
+    errors = []
+    if not question.get('id') or not question.get('text'):
+        errors.append('id и text обязательны')
+    if question.get('type') not in ('single', 'multiple'):
+        errors.append(f'неизвестный type {question.get("type")!r}')
+    answers = question.get('answers') or []
+    correct = sum(1 for answer in answers if answer.get('correct'))
+    if len(answers) < 2 or any(not answer.get('text') for answer in answers):
+        errors.append('нужно минимум два ответа с текстом')
+    elif question.get('type') == 'single' and correct != 1:
+        errors.append(f'у single должен быть один правильный ответ, найдено {correct}')
+    elif correct == 0:
+        errors.append('нет правильного ответа')
+    if not isinstance(question.get('points', 1), int) or question.get('points', 1) < 1:
+        errors.append('points должно быть положительным целым')
+    return errors
+
+
+def resolve_topics(source: Dict[str, Any]) -> Dict[str, List[Dict[str, Any]]]:
+    by_id: Dict[str, Dict[str, Any]] = {}
+    errors = []
+    for topic, questions in source['topics'].items():
+        for question in questions:
+            if 'ref' in question:
+                continue
+            for error in validate_question(question):
+                errors.append(f'{topic}/{question.get("id")}: {error}')
+            if question.get('id') in by_id:
+                errors.append(f'{topic}/{question["id"]}: id повторяется')
+            by_id[question.get('id')] = question
+
+    topics: Dict[str, List[Dict[str, Any]]] = {}
+    for topic, questions in source['topics'].items():
+        topics[topic] = []
+        for question in questions:
+            if 'ref' in question and question['ref'] not in by_id:
+                errors.append(f'{topic}: ссылка на неизвестный вопрос {question["ref"]}')
+                continue
+            topics[topic].append(by_id[question['ref']] if 'ref' in question else question)
+    if source.get('defaultTopic') not in topics:
+        errors.append(f'defaultTopic {source.get("defaultTopic")!r} нет среди тем')
+    if errors:
+        raise ValueError('\n'.join(errors))
+    return topics
+
+
+def find_near_duplicates(topics: Dict[str, List[Dict[str, Any]]], threshold: float) -> List[Tuple[str, str, float]]:
+    index = near_duplicates.MinHashIndex()
+    for questions in topics.values():
+        for question in questions:
+            if question['id'] not in index.signatures:
+                index.add(question['id'], question_store.question_signature(
+                    question['text'], (answer['text'] for answer in question['answers'])
+                ))
+    return index.duplicates(threshold)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='questions.json -> questions.bank для generate-test')
+    parser.add_argument('--source', default=os.path.join(FUNCTION_DIR, 'questions.json'))
+    parser.add_argument('--output', default=os.path.join(FUNCTION_DIR, 'questions.bank'))
+    parser.add_argument('--version', help='Версия банка (по умолчанию хеш содержимого)')
+    parser.add_argument('--check', action='store_true', help='Только проверить, что --output собран из --source')
+    parser.add_argument('--threshold', type=float, default=near_duplicates.NEAR_DUPLICATE_THRESHOLD,
+                        help='Порог похожести для почти одинаковых вопросов')
+    parser.add_argument('--duplicates', action='store_true', help='Только напечатать пары похожих вопросов')
+    args = parser.parse_args()
+
+    with open(args.source, encoding='utf-8') as f:
+        source = json.load(f)
+    try:
+        topics = resolve_topics(source)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 1
+
+    duplicates = find_near_duplicates(topics, args.threshold)
+    for a, b, score in duplicates:
+        print(f'{a} ~ {b}: похожесть {score:.2f}', file=sys.stdout if args.duplicates else sys.stderr)
+    if args.duplicates:
+        print(f'{len(duplicates)} пар с похожестью от {args.threshold}')
+        return 0
+    if duplicates:
+        print(f'почти одинаковые вопросы (порог {args.threshold}): замените копии ссылками ref', file=sys.stderr)
+        return 1
+
+    canonical = json.dumps([source['defaultTopic'], topics], ensure_ascii=False, sort_keys=True).encode('utf-8')
+    version = args.version or hashlib.sha256(canonical).hexdigest()[:12]
+
+    if args.check:
+        with tempfile.TemporaryDirectory() as workdir:
+            expected_path = os.path.join(workdir, 'questions.bank')
+            question_bank.write_bank(expected_path, topics, source['defaultTopic'], version)
+            expected = open(expected_path, 'rb').read()
+        current = open(args.output, 'rb').read() if os.path.exists(args.output) else None
+        if current != expected:
+            print(f'{os.path.relpath(args.output, ROOT)} устарел: запустите python tools/build_question_bank.py', file=sys.stderr)
+            return 1
+        print(f'{os.path.relpath(args.output, ROOT)} актуален (версия {version})')
+        return 0
+
+    question_bank.write_bank(args.output, topics, source['defaultTopic'], version)
+    total = sum(len(questions) for questions in topics.values())
+    print(f'{os.path.relpath(args.output, ROOT)}: версия {version}, {len(topics)} тем, {total} вопросов')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
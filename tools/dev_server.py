@@ -0,0 +1,381 @@
+'''
+Локальный HTTP сервер для всех облачных функций из backend/func2url.json
+
+Каждая функция доступна по адресу http://localhost:<port>/<имя-функции>?...
+HTTP запрос превращается в event/context того же вида, что передаёт среда
+исполнения. Как и в облаке, один экземпляр функции обрабатывает один запрос
+за раз: свободный прогретый экземпляр переиспользуется (warm), иначе
+импортируется новый (cold start). Простаивающие дольше --idle-ttl экземпляры
+выгружаются.
+
+Пример:
+    DATABASE_URL=postgresql://localhost/edu python tools/dev_server.py --workers 32 --max-instances 8
+    curl 'http://localhost:8000/api?path=stats'
+    curl 'http://localhost:8000/__stats'
+    python tools/dev_server.py --smoke --functions generate-document generate-test
+'''
+import argparse
+import base64
+import builtins
+import importlib.util
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from types import ModuleType, SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BACKEND_DIR = os.path.join(ROOT, 'backend')
+
+_import_lock = threading.Lock()
+_instance_counter = 0
+
+
+class Instance:
+    '''
+    Экземпляр функции: собственные копии index.py и соседних модулей со своим
+    состоянием. Модули загружаются со своими __builtins__, где __import__ сначала
+    ищет соседа среди модулей этого экземпляра, поэтому ленивые импорты во время
+    запроса (в том числе из потоков обработчика) получают тот же набор модулей,
+    что и при холодном старте, а sys.path и общий sys.modules не меняются.
+    '''
+
+    def __init__(self, function_name: str):
+        global _instance_counter
+        self.function_dir = os.path.join(BACKEND_DIR, function_name)
+        with _import_lock:
+            _instance_counter += 1
+            self.name = f'{function_name}#{_instance_counter}'
+            self.prefix = f"dev_{function_name.replace('-', '_')}_{_instance_counter}"
+        self.siblings = {f[:-3] for f in os.listdir(self.function_dir) if f.endswith('.py') and f != 'index.py'}
+        self.modules: Dict[str, ModuleType] = {}
+        self.lock = threading.RLock()
+        self.builtins = dict(builtins.__dict__, __import__=self._import)
+        started = time.perf_counter()
+        module = self._load('index')
+        self.init_ms = (time.perf_counter() - started) * 1000
+        self.handler: Callable = module.handler
+        self.last_used = time.monotonic()
+
+    def _load(self, name: str) -> ModuleType:
+        with self.lock:
+            module = self.modules.get(name)
+            if module is not None:
+                return module
+            spec = importlib.util.spec_from_file_location(
+                f'{self.prefix}_{name}', os.path.join(self.function_dir, f'{name}.py'))
+            module = importlib.util.module_from_spec(spec)
+            module.__dict__['__builtins__'] = self.builtins
+            # До выполнения, как sys.modules: циклические импорты соседей получают тот же модуль
+            self.modules[name] = module
+            try:
+                spec.loader.exec_module(module)
+            except BaseException:
+                del self.modules[name]
+                raise
+            return module
+
+    def _import(self, name: str, globals: Any = None, locals: Any = None, fromlist: Any = (), level: int = 0) -> ModuleType:
+        if level == 0 and name in self.siblings:
+            return self._load(name)
+        return builtins.__import__(name, globals, locals, fromlist, level)
+
+
+class FunctionPool:
+    '''Пул экземпляров одной функции с лимитом и выгрузкой простаивающих'''
+
+    def __init__(self, function_name: str, max_instances: int, idle_ttl: float, always_cold: bool):
+        self.function_name = function_name
+        self.max_instances = max_instances
+        self.idle_ttl = idle_ttl
+        self.always_cold = always_cold
+        self.idle: List[Instance] = []
+        self.busy = 0
+        self.condition = threading.Condition()
+        self.stats: Dict[str, List[float]] = {'cold': [], 'warm': [], 'init': [], 'queued': []}
+
+    def acquire(self) -> Tuple[Instance, bool]:
+        queued_from = time.perf_counter()
+        with self.condition:
+            while True:
+                self._evict_idle()
+                if self.idle and not self.always_cold:
+                    instance = self.idle.pop()
+                    self.busy += 1
+                    self.stats['queued'].append((time.perf_counter() - queued_from) * 1000)
+                    return instance, False
+                if self.busy + len(self.idle) < self.max_instances:
+                    self.busy += 1
+                    break
+                self.condition.wait()
+        self.stats['queued'].append((time.perf_counter() - queued_from) * 1000)
+        try:
+            instance = Instance(self.function_name)
+        except BaseException:
+            with self.condition:
+                self.busy -= 1
+                self.condition.notify()
+            raise
+        self.stats['init'].append(instance.init_ms)
+        return instance, True
+
+    def release(self, instance: Instance) -> None:
+        with self.condition:
+            self.busy -= 1
+            instance.last_used = time.monotonic()
+            if not self.always_cold:
+                self.idle.append(instance)
+            self.condition.notify()
+
+    def _evict_idle(self) -> None:
+        deadline = time.monotonic() - self.idle_ttl
+        self.idle = [instance for instance in self.idle if instance.last_used >= deadline]
+
+    def record(self, cold: bool, elapsed_ms: float) -> None:
+        with self.condition:
+            self.stats['cold' if cold else 'warm'].append(elapsed_ms)
+
+    def summary(self) -> Dict[str, Any]:
+        def pct(values: List[float], p: float) -> float:
+            if not values:
+                return 0.0
+            ordered = sorted(values)
+            return round(ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))], 2)
+
+        with self.condition:
+            result = {'instances': {'idle': len(self.idle), 'busy': self.busy, 'max': self.max_instances}}
+            for kind, values in self.stats.items():
+                result[kind] = {'count': len(values), 'p50_ms': pct(values, 50), 'p95_ms': pct(values, 95), 'p99_ms': pct(values, 99)}
+            return result
+
+
+def build_event(request: BaseHTTPRequestHandler, body: bytes) -> Dict[str, Any]:
+    url = urlsplit(request.path)
+    headers = {name: value for name, value in request.headers.items()}
+    event = {
+        'httpMethod': request.command,
+        'headers': headers,
+        'queryStringParameters': dict(parse_qsl(url.query, keep_blank_values=True)),
+        'requestContext': {
+            'requestId': uuid.uuid4().hex,
+            'identity': {'sourceIp': request.client_address[0], 'userAgent': headers.get('User-Agent', '')},
+            'httpMethod': request.command,
+        },
+        'isBase64Encoded': False,
+        'body': '',
+    }
+    if body:
+        try:
+            event['body'] = body.decode('utf-8')
+        except UnicodeDecodeError:
+            event['body'] = base64.b64encode(body).decode('ascii')
+            event['isBase64Encoded'] = True
+    return event
+
+
+class DevServer(HTTPServer):
+    '''HTTP сервер, обрабатывающий соединения в пуле потоков фиксированного размера'''
+
+    daemon_threads = True
+
+    def __init__(self, address, pools: Dict[str, FunctionPool], workers: int):
+        super().__init__(address, RequestHandler)
+        self.pools = pools
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='dev-worker')
+
+    def process_request(self, request, client_address):
+        self.executor.submit(self._process, request, client_address)
+
+    def _process(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self.executor.shutdown(wait=False)
+
+
+class RequestHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        self.dispatch()
+
+    do_POST = do_PUT = do_DELETE = do_OPTIONS = do_PATCH = do_GET
+
+    def dispatch(self) -> None:
+        url = urlsplit(self.path)
+        function_name = url.path.strip('/').split('/')[0]
+
+        if function_name == '__stats':
+            self.send_json(200, {name: pool.summary() for name, pool in self.server.pools.items()})
+            return
+
+        pool: Optional[FunctionPool] = self.server.pools.get(function_name)
+        if pool is None:
+            self.send_json(404, {'error': f'Unknown function {function_name}', 'functions': sorted(self.server.pools)})
+            return
+
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else b''
+        event = build_event(self, body)
+        context = SimpleNamespace(
+            request_id=event['requestContext']['requestId'],
+            function_name=function_name,
+            function_version='$LATEST',
+            memory_limit_in_mb=128,
+        )
+
+        started = time.perf_counter()
+        try:
+            instance, cold = pool.acquire()
+        except Exception as e:
+            self.send_json(500, {'error': f'Init failed: {e}'})
+            return
+        try:
+            handler_started = time.perf_counter()
+            response = instance.handler(event, context)
+            handler_ms = (time.perf_counter() - handler_started) * 1000
+        except Exception as e:
+            pool.release(instance)
+            self.send_json(502, {'error': f'Unhandled exception: {e}'})
+            return
+        pool.release(instance)
+        if not isinstance(response, dict):
+            self.send_json(502, {'error': f'Handler returned {type(response).__name__} instead of a response dict'})
+            return
+        total_ms = (time.perf_counter() - started) * 1000
+        pool.record(cold, total_ms)
+
+        extra = {
+            'X-Dev-Instance': instance.name,
+            'X-Dev-Cold-Start': '1' if cold else '0',
+            'X-Dev-Init-Ms': f'{instance.init_ms:.1f}' if cold else '0',
+            'X-Dev-Handler-Ms': f'{handler_ms:.1f}',
+        }
+        self.send_function_response(response, extra)
+
+    def send_function_response(self, response: Dict[str, Any], extra: Dict[str, str]) -> None:
+        body = response.get('body', '')
+        if response.get('isBase64Encoded'):
+            payload = base64.b64decode(body)
+        elif isinstance(body, (dict, list)):
+            payload = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        else:
+            payload = (body or '').encode('utf-8')
+
+        self.send_response(response.get('statusCode', 200))
+        for name, value in {**(response.get('headers') or {}), **extra}.items():
+            if name.lower() != 'content-length':
+                self.send_header(name, str(value))
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def send_json(self, status: int, data: Dict[str, Any]) -> None:
+        self.send_function_response({
+            'statusCode': status,
+            'headers': {'Content-Type': 'application/json'},
+            'body': json.dumps(data, ensure_ascii=False)
+        }, {})
+
+    def log_message(self, format: str, *args: Any) -> None:
+        sys.stderr.write(f"{self.log_date_time_string()} {self.address_string()} {format % args}\n")
+
+
+def load_env_file(path: str) -> None:
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith('#') and '=' in line:
+                name, value = line.split('=', 1)
+                os.environ.setdefault(name.strip(), value.strip().strip('"\''))
+
+
+def run_smoke(server: DevServer, functions: List[str]) -> int:
+    '''Прогоняет tests.json каждой функции через запущенный сервер; 1, если статус не совпал'''
+    from urllib.error import HTTPError
+    from urllib.request import Request, urlopen
+
+    base = f'http://{server.server_address[0]}:{server.server_address[1]}'
+    failed = 0
+    for function_name in functions:
+        tests_path = os.path.join(BACKEND_DIR, function_name, 'tests.json')
+        if not os.path.exists(tests_path):
+            continue
+        with open(tests_path, encoding='utf-8') as f:
+            tests = json.load(f).get('tests', [])
+        for test in tests:
+            body = test.get('body')
+            request = Request(
+                f"{base}/{function_name}{test.get('path') or '/'}",
+                data=json.dumps(body, ensure_ascii=False).encode('utf-8') if body is not None else None,
+                method=test.get('method', 'GET'),
+                headers={'Content-Type': 'application/json'}
+            )
+            try:
+                with urlopen(request, timeout=60) as response:
+                    status, payload = response.status, response.read()
+            except HTTPError as e:
+                status, payload = e.code, e.read()
+            ok = status == test.get('expectedStatus', 200)
+            failed += not ok
+            detail = '' if ok else f' (ожидался {test.get("expectedStatus", 200)}: {payload[:200].decode("utf-8", "replace")})'
+            print(f'{"OK  " if ok else "FAIL"} {function_name}: {test.get("name")} -> {status}{detail}', flush=True)
+    return 1 if failed else 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Локальный запуск облачных функций backend/*')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--workers', type=int, default=16, help='Размер пула потоков HTTP сервера')
+    parser.add_argument('--max-instances', type=int, default=4, help='Максимум экземпляров на функцию')
+    parser.add_argument('--idle-ttl', type=float, default=300.0, help='Через сколько секунд простоя экземпляр выгружается')
+    parser.add_argument('--always-cold', action='store_true', help='Каждый запрос в новом экземпляре')
+    parser.add_argument('--functions', nargs='*', help='Запустить только указанные функции')
+    parser.add_argument('--env-file', help='Файл с переменными окружения NAME=value')
+    parser.add_argument('--smoke', action='store_true',
+                        help='Прогнать tests.json функций через сервер на свободном порту и завершиться')
+    args = parser.parse_args()
+
+    if args.env_file:
+        load_env_file(args.env_file)
+
+    with open(os.path.join(BACKEND_DIR, 'func2url.json'), encoding='utf-8') as f:
+        functions = sorted(json.load(f))
+    if args.functions:
+        functions = [name for name in functions if name in args.functions]
+
+    pools = {name: FunctionPool(name, args.max_instances, args.idle_ttl, args.always_cold) for name in functions}
+    server = DevServer((args.host, 0 if args.smoke else args.port), pools, args.workers)
+    if args.smoke:
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            return run_smoke(server, functions)
+        finally:
+            server.shutdown()
+            server.server_close()
+    print(f'Функции: {", ".join(functions)}')
+    print(f'Слушаю http://{args.host}:{args.port}/<функция>  (статистика: /__stats)', flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
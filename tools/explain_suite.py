@@ -0,0 +1,126 @@
+'''
+Регрессионный набор EXPLAIN для запросов backend/api и backend/manage-instructions
+
+Прогоняет GET маршруты из сценариев tools/bench_handlers.py против базы с
+синтетическими данными (tools/generate_data.py), перехватывает каждый SELECT,
+который выполнил handler, и строит для него план EXPLAIN (FORMAT JSON).
+Набор падает, если план читает большую таблицу (больше --large-rows строк)
+последовательным сканированием и это не разрешено в ALLOWED_SEQ_SCANS.
+
+Пример:
+    DATABASE_URL=postgresql://localhost/edu python tools/generate_data.py --scale 0.1 --truncate
+    DATABASE_URL=postgresql://localhost/edu python tools/explain_suite.py
+'''
+import argparse
+import os
+import random
+import sys
+from typing import Any, Dict, Iterator, List, Set, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import bench_handlers  # noqa: E402
+
+# Маршруты, которые по смыслу читают таблицу целиком: полный список без фильтра
+# или агрегат по большинству строк. Для них Seq Scan — оптимальный план.
+ALLOWED_SEQ_SCANS: Dict[str, Set[str]] = {
+    'api:users': {'users'},
+    'api:assignments': {'user_assignments', 'users'},
+    'api:programs': {'user_assignments', 'test_sessions'},
+    'api:stats': {'test_sessions', 'users'},
+    'api:instructions': {'instructions'},
+    'manage-instructions:instructions': {'instructions'},
+}
+
+
+def plan_nodes(node: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    yield node
+    for child in node.get('Plans', []):
+        yield from plan_nodes(child)
+
+
+def table_sizes(cur) -> Dict[str, float]:
+    cur.execute("""
+        SELECT c.relname, c.reltuples
+        FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace
+        WHERE c.relkind = 'r' AND n.nspname = current_schema()
+    """)
+    return {name: rows for name, rows in cur.fetchall()}
+
+
+def capture_queries(route: str, seed: int) -> Tuple[List[str], int]:
+    bench_handlers._query_counter.captured = []
+    try:
+        _, _, status = bench_handlers.run_once(route, seed)
+        return bench_handlers._query_counter.captured, status
+    finally:
+        bench_handlers._query_counter.captured = None
+
+
+def check_route(cur, route: str, seed: int, sizes: Dict[str, float], large_rows: float, verbose: bool) -> List[str]:
+    failures = []
+    queries, status = capture_queries(route, seed)
+    if status >= 500:
+        failures.append(f'{route}: handler вернул {status}')
+    for sql in queries:
+        if not sql.lstrip().lower().startswith(('select', 'with')):
+            continue
+        cur.execute('EXPLAIN (FORMAT JSON) ' + sql)
+        plan = cur.fetchone()[0][0]['Plan']
+        for node in plan_nodes(plan):
+            relation = node.get('Relation Name')
+            if node['Node Type'] != 'Seq Scan' or not relation:
+                continue
+            rows = sizes.get(relation, 0)
+            if rows < large_rows or relation in ALLOWED_SEQ_SCANS.get(route, set()):
+                continue
+            failures.append(f'{route}: Seq Scan по {relation} (~{int(rows)} строк)\n    {" ".join(sql.split())[:300]}')
+        if verbose:
+            print(f'  {route}: {plan["Node Type"]} cost={plan["Total Cost"]}  {" ".join(sql.split())[:120]}')
+    return failures
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='EXPLAIN регрессии для SQL запросов функций')
+    parser.add_argument('--routes', nargs='*', help='Маршруты (по умолчанию все GET маршруты с базой)')
+    parser.add_argument('--large-rows', type=float, default=10000, help='С какого размера таблица считается большой')
+    parser.add_argument('--samples', type=int, default=3, help='Сколько случайных событий на маршрут')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--verbose', action='store_true')
+    args = parser.parse_args()
+
+    if not os.environ.get('DATABASE_URL'):
+        print('Нужен DATABASE_URL с применёнными миграциями и синтетическими данными', file=sys.stderr)
+        return 2
+    import psycopg2
+
+    bench_handlers.disable_rate_limits()
+    bench_handlers.install_query_counter()
+    ranges = bench_handlers.id_ranges(True)
+    bench_handlers.SCENARIOS = bench_handlers.build_scenarios(ranges)
+    routes = args.routes or [
+        name for name, (_, make, needs_db) in bench_handlers.SCENARIOS.items()
+        if needs_db and make(random.Random(0))['httpMethod'] == 'GET'
+    ]
+
+    conn = psycopg2.connect(os.environ['DATABASE_URL'])
+    conn.autocommit = True
+    failures: List[str] = []
+    try:
+        with conn.cursor() as cur:
+            sizes = table_sizes(cur)
+            rng = random.Random(args.seed)
+            for route in routes:
+                for _ in range(args.samples):
+                    failures.extend(check_route(cur, route, rng.randrange(1 << 30), sizes, args.large_rows, args.verbose))
+    finally:
+        conn.close()
+
+    for failure in dict.fromkeys(failures):
+        print('FAIL ' + failure)
+    print(f'{len(routes)} маршрутов проверено, {len(set(failures))} проблемных планов')
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
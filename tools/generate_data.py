@@ -0,0 +1,344 @@
+'''
+Генератор синтетических данных в объёмах продакшена для схемы db_migrations/V0001
+
+Данные детерминированы (seed), загружаются через COPY потоком без
+материализации таблиц в памяти. Объёмы задаются коэффициентом --scale
+и переопределяются по таблицам.
+
+Пример:
+    DATABASE_URL=postgresql://localhost/edu python tools/generate_data.py --scale 0.1 --truncate
+    python tools/generate_data.py --scale 0.01 --csv /tmp/edu-data
+'''
+import argparse
+import io
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Sequence
+
+BASE_VOLUMES = {
+    'users': 100_000,
+    'instructions': 3_000,
+    'training_programs': 200,
+    'questions_per_instruction': 15,
+    'instructions_per_program': 12,
+    'user_assignments': 300_000,
+    'test_sessions': 2_000_000,
+    'answers_per_session': 10,
+    'certificates': 400_000,
+    'activity_log': 3_000_000,
+}
+
+# Порядок загрузки соблюдает внешние ключи
+TABLES = [
+    'users', 'instructions', 'training_programs', 'program_instructions', 'test_questions',
+    'user_assignments', 'test_sessions', 'test_answers', 'certificates', 'activity_log'
+]
+
+DEPARTMENTS = [
+    'Подземный рудник', 'Открытые горные работы', 'Обогатительная фабрика', 'Энергетический цех',
+    'Механический цех', 'Автотранспортный цех', 'Служба ОТ', 'Отдел обучения', 'Геологическая служба',
+    'Маркшейдерский отдел', 'Вентиляционная служба', 'Склад ВМ', 'Хвостовое хозяйство', 'Лаборатория'
+]
+POSITIONS = [
+    'Горнорабочий очистного забоя', 'Проходчик', 'Машинист ПДМ', 'Взрывник', 'Электрослесарь подземный',
+    'Крепильщик', 'Машинист экскаватора', 'Водитель БелАЗа', 'Флотатор', 'Дробильщик', 'Электромонтер',
+    'Слесарь-ремонтник', 'Сварщик', 'Крановщик', 'Мастер участка', 'Горный мастер', 'Машинист буровой установки'
+]
+INDUSTRIES = ['Горнодобывающая', 'Обогащение', 'Энергетика', 'Строительство', 'Производство', 'Транспорт']
+LAST_NAMES = ['Иванов', 'Петров', 'Смирнов', 'Кузнецов', 'Попов', 'Васильев', 'Соколов', 'Михайлов', 'Новиков',
+              'Федоров', 'Морозов', 'Волков', 'Алексеев', 'Лебедев', 'Семенов', 'Егоров', 'Павлов', 'Козлов']
+FIRST_NAMES = ['Иван', 'Петр', 'Алексей', 'Сергей', 'Дмитрий', 'Андрей', 'Михаил', 'Николай', 'Владимир', 'Олег']
+MIDDLE_NAMES = ['Иванович', 'Петрович', 'Сергеевич', 'Алексеевич', 'Николаевич', 'Владимирович', 'Андреевич']
+SECTIONS = [
+    'I. ОБЩИЕ ТРЕБОВАНИЯ ОХРАНЫ ТРУДА',
+    'II. ТРЕБОВАНИЯ ОХРАНЫ ТРУДА ПЕРЕД НАЧАЛОМ РАБОТЫ',
+    'III. ТРЕБОВАНИЯ ОХРАНЫ ТРУДА ВО ВРЕМЯ РАБОТЫ',
+    'IV. ТРЕБОВАНИЯ ОХРАНЫ ТРУДА В АВАРИЙНЫХ СИТУАЦИЯХ',
+    'V. ТРЕБОВАНИЯ ОХРАНЫ ТРУДА ПО ОКОНЧАНИИ РАБОТЫ'
+]
+SUBJECTS = ['Работник', 'Машинист', 'Горнорабочий', 'Ответственный руководитель работ', 'Электрослесарь', 'Мастер смены']
+VERBS = ['обязан проверить', 'должен убедиться в исправности', 'обязан осмотреть', 'должен применять',
+         'обязан немедленно сообщить о неисправности', 'не допускается к работе без']
+OBJECTS = ['средств индивидуальной защиты', 'ограждений и блокировок', 'крепи выработки', 'заземления оборудования',
+           'газоанализатора', 'самоспасателя', 'светильника', 'тормозной системы машины', 'вентиляции забоя',
+           'наряда-допуска', 'предохранительного пояса', 'пусковой аппаратуры']
+CONDITIONS = ['перед началом смены', 'при обнаружении опасности', 'в соответствии с Приказом Минтруда № 505н',
+              'согласно Федеральным нормам и правилам в области промышленной безопасности',
+              'при изменении горно-геологических условий', 'после аварийной остановки', 'в присутствии мастера']
+ACTIONS = ['Назначено обучение', 'Завершил тест', 'Провалил тест', 'Создал инструкцию', 'Получил сертификат']
+
+EPOCH = datetime(2023, 1, 1)
+SPAN_SECONDS = 2 * 365 * 24 * 3600
+
+
+def volumes(scale: float, overrides: Dict[str, Optional[int]]) -> Dict[str, int]:
+    result = {}
+    for name, base in BASE_VOLUMES.items():
+        if name.endswith('_per_instruction') or name.endswith('_per_session') or name.endswith('_per_program'):
+            result[name] = base
+        else:
+            result[name] = max(1, int(base * scale))
+    for name, value in overrides.items():
+        if value is not None:
+            result[name] = value
+    return result
+
+
+def copy_text(value) -> str:
+    '''Значение в текстовом формате COPY'''
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if isinstance(value, datetime):
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+    text = str(value)
+    if '\\' in text or '\t' in text or '\n' in text or '\r' in text:
+        text = text.replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n').replace('\r', '\\r')
+    return text
+
+
+class RowStream(io.RawIOBase):
+    '''Файлоподобный поток строк COPY: copy_expert читает его кусками, не держа таблицу в памяти'''
+
+    def __init__(self, rows: Iterator[Sequence]):
+        self.rows = rows
+        self.buffer = b''
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, target) -> int:
+        while len(self.buffer) < len(target):
+            chunk = []
+            for row in self.rows:
+                chunk.append('\t'.join(copy_text(v) for v in row) + '\n')
+                if len(chunk) >= 1000:
+                    break
+            if not chunk:
+                break
+            self.buffer += ''.join(chunk).encode('utf-8')
+        size = min(len(target), len(self.buffer))
+        target[:size] = self.buffer[:size]
+        self.buffer = self.buffer[size:]
+        return size
+
+
+class Generator:
+    '''Детерминированные генераторы строк: у каждой таблицы свой RNG от общего seed'''
+
+    def __init__(self, seed: int, vol: Dict[str, int]):
+        self.seed = seed
+        self.vol = vol
+
+    def rng(self, table: str) -> random.Random:
+        return random.Random(f'{self.seed}:{table}')
+
+    def staff_id(self, rng: random.Random, last_staff_id: int) -> int:
+        '''Автор записи из первых last_staff_id пользователей (методисты — до 23, инспекторы — до 63),
+        но не больше числа пользователей, чтобы на малом --scale не было нарушений внешних ключей'''
+        return rng.randint(1, min(last_staff_id, self.vol['users']))
+
+    def timestamp(self, rng: random.Random) -> datetime:
+        return EPOCH + timedelta(seconds=rng.randrange(SPAN_SECONDS))
+
+    def content(self, rng: random.Random, title: str) -> str:
+        parts = [f'# {title.upper()}\n']
+        for number, section in enumerate(SECTIONS, start=1):
+            parts.append(f'\n## {section}\n')
+            for item in range(1, rng.randint(8, 16) + 1):
+                sentence = f'{rng.choice(SUBJECTS)} {rng.choice(VERBS)} {rng.choice(OBJECTS)} {rng.choice(CONDITIONS)}.'
+                if rng.random() < 0.5:
+                    sentence += f' {rng.choice(SUBJECTS)} {rng.choice(VERBS)} {rng.choice(OBJECTS)}.'
+                parts.append(f'\n{number}.{item}. {sentence}\n')
+        return ''.join(parts)
+
+    def users(self) -> Iterator[Sequence]:
+        rng = self.rng('users')
+        staff = ['admin'] * 3 + ['methodist'] * 20 + ['inspector'] * 40
+        for user_id in range(1, self.vol['users'] + 1):
+            role = staff[user_id - 1] if user_id <= len(staff) else 'student'
+            name = f'{rng.choice(LAST_NAMES)} {rng.choice(FIRST_NAMES)} {rng.choice(MIDDLE_NAMES)}'
+            created = self.timestamp(rng)
+            yield (user_id, name, rng.choice(POSITIONS), rng.choice(DEPARTMENTS), role,
+                   f'user{user_id}@mine.example', f'+7900{user_id:07d}', created, created)
+
+    def instructions(self) -> Iterator[Sequence]:
+        rng = self.rng('instructions')
+        for instruction_id in range(1, self.vol['instructions'] + 1):
+            category = rng.choices(['iot', 'job', 'equipment'], weights=[6, 2, 2])[0]
+            profession = rng.choice(POSITIONS)
+            title = f'ИОТ для профессии «{profession}» № {instruction_id}' if category == 'iot' else \
+                f'{"Должностная инструкция" if category == "job" else "Инструкция по эксплуатации"}: {profession} № {instruction_id}'
+            created = self.timestamp(rng)
+            status = rng.choices(['active', 'draft', 'archived'], weights=[90, 5, 5])[0]
+            yield (instruction_id, title, category, rng.choice(INDUSTRIES), profession, self.content(rng, title),
+                   self.staff_id(rng, 23), created, created + timedelta(days=rng.randint(0, 200)), status)
+
+    def training_programs(self) -> Iterator[Sequence]:
+        rng = self.rng('training_programs')
+        for program_id in range(1, self.vol['training_programs'] + 1):
+            created = self.timestamp(rng)
+            yield (program_id, f'Программа обучения № {program_id}: {rng.choice(POSITIONS)}',
+                   f'Обучение по охране труда для подразделения «{rng.choice(DEPARTMENTS)}»',
+                   rng.choice([8, 16, 20, 40, 72]), rng.choice([70, 80, 90]), self.staff_id(rng, 23),
+                   created, created, rng.choices(['active', 'draft', 'archived'], weights=[90, 5, 5])[0])
+
+    def program_instructions(self) -> Iterator[Sequence]:
+        rng = self.rng('program_instructions')
+        per_program = min(self.vol['instructions_per_program'], self.vol['instructions'])
+        for program_id in range(1, self.vol['training_programs'] + 1):
+            for order_num, instruction_id in enumerate(rng.sample(range(1, self.vol['instructions'] + 1), per_program), start=1):
+                yield (program_id, instruction_id, order_num)
+
+    def test_questions(self) -> Iterator[Sequence]:
+        rng = self.rng('test_questions')
+        question_id = 0
+        for instruction_id in range(1, self.vol['instructions'] + 1):
+            for number in range(1, self.vol['questions_per_instruction'] + 1):
+                question_id += 1
+                options = [f'{rng.choice(SUBJECTS)} {rng.choice(VERBS)} {rng.choice(OBJECTS)}' for _ in range(4)]
+                yield (question_id, instruction_id,
+                       f'Вопрос {number} к инструкции {instruction_id}: что необходимо сделать {rng.choice(CONDITIONS)}?',
+                       options[0], options[1], options[2], options[3], rng.randint(0, 3),
+                       f'См. пункт {rng.randint(1, 5)}.{rng.randint(1, 16)} инструкции', self.timestamp(rng))
+
+    def user_assignments(self) -> Iterator[Sequence]:
+        rng = self.rng('user_assignments')
+        for assignment_id in range(1, self.vol['user_assignments'] + 1):
+            assigned = self.timestamp(rng)
+            status = rng.choices(['assigned', 'in_progress', 'completed', 'overdue'], weights=[30, 20, 40, 10])[0]
+            started = assigned + timedelta(days=rng.randint(0, 10)) if status != 'assigned' else None
+            completed = started + timedelta(days=rng.randint(0, 20)) if status == 'completed' else None
+            yield (assignment_id, rng.randint(1, self.vol['users']), rng.randint(1, self.vol['training_programs']),
+                   self.staff_id(rng, 63), (assigned + timedelta(days=30)).date(), status, assigned, started, completed)
+
+    def test_sessions(self) -> Iterator[Sequence]:
+        rng = self.rng('test_sessions')
+        total = self.vol['answers_per_session']
+        for session_id in range(1, self.vol['test_sessions'] + 1):
+            started = self.timestamp(rng)
+            status = rng.choices(['completed', 'in_progress', 'abandoned'], weights=[85, 5, 10])[0]
+            correct = rng.randint(total // 3, total) if status == 'completed' else None
+            spent = rng.randint(120, 2400)
+            yield (session_id, rng.randint(1, self.vol['users']), rng.randint(1, self.vol['instructions']),
+                   rng.choice(['practice', 'exam']), status,
+                   int(correct * 100 / total) if correct is not None else None, correct, total, spent,
+                   started, started + timedelta(seconds=spent) if status == 'completed' else None)
+
+    def test_answers(self) -> Iterator[Sequence]:
+        # Сессии пересоздаются тем же RNG, чтобы ответы ссылались на вопросы своей инструкции
+        sessions = self.test_sessions()
+        rng = self.rng('test_answers')
+        per_instruction = self.vol['questions_per_instruction']
+        per_session = min(self.vol['answers_per_session'], per_instruction)
+        answer_id = 0
+        for session in sessions:
+            session_id, instruction_id, started = session[0], session[2], session[9]
+            first_question = (instruction_id - 1) * per_instruction + 1
+            for offset in rng.sample(range(per_instruction), per_session):
+                answer_id += 1
+                user_answer = rng.randint(0, 3)
+                yield (answer_id, session_id, first_question + offset, user_answer, rng.random() < 0.75,
+                       started + timedelta(seconds=rng.randint(5, 600)))
+
+    def certificates(self) -> Iterator[Sequence]:
+        rng = self.rng('certificates')
+        for certificate_id in range(1, self.vol['certificates'] + 1):
+            issued = self.timestamp(rng)
+            yield (certificate_id, rng.randint(1, self.vol['users']), rng.randint(1, self.vol['test_sessions']),
+                   f'ГТ-{issued.year}-{certificate_id:08d}', f'Инструкция № {rng.randint(1, self.vol["instructions"])}',
+                   rng.randint(80, 100), self.staff_id(rng, 63), None, issued,
+                   (issued + timedelta(days=365 * rng.choice([1, 3]))).date())
+
+    def activity_log(self) -> Iterator[Sequence]:
+        rng = self.rng('activity_log')
+        for activity_id in range(1, self.vol['activity_log'] + 1):
+            action = rng.choice(ACTIONS)
+            yield (activity_id, rng.randint(1, self.vol['users']), action,
+                   f'Инструкция № {rng.randint(1, self.vol["instructions"])}',
+                   f'Результат: {rng.randint(0, 100)}%' if 'тест' in action else None, self.timestamp(rng))
+
+
+COLUMNS = {
+    'users': 'id, full_name, position, department, role, email, phone, created_at, updated_at',
+    'instructions': 'id, title, category, industry, profession, content, created_by, created_at, updated_at, status',
+    'training_programs': 'id, title, description, duration_hours, passing_score, created_by, created_at, updated_at, status',
+    'program_instructions': 'program_id, instruction_id, order_num',
+    'test_questions': 'id, instruction_id, question, option_a, option_b, option_c, option_d, correct_answer, explanation, created_at',
+    'user_assignments': 'id, user_id, program_id, assigned_by, deadline, status, assigned_at, started_at, completed_at',
+    'test_sessions': 'id, user_id, instruction_id, test_mode, status, score, correct_answers, total_questions, time_spent_seconds, started_at, completed_at',
+    'test_answers': 'id, session_id, question_id, user_answer, is_correct, answered_at',
+    'certificates': 'id, user_id, session_id, certificate_number, instruction_title, score, issued_by, qr_code_url, issued_at, valid_until',
+    'activity_log': 'id, user_id, action, subject, details, created_at',
+}
+
+
+def load_postgres(generator: Generator, tables: List[str], truncate: bool) -> None:
+    import psycopg2
+
+    conn = psycopg2.connect(os.environ['DATABASE_URL'])
+    try:
+        with conn.cursor() as cur:
+            if truncate:
+                cur.execute('TRUNCATE ' + ', '.join(reversed(tables)) + ' RESTART IDENTITY CASCADE')
+            for table in tables:
+                started = time.perf_counter()
+                cur.copy_expert(f'COPY {table} ({COLUMNS[table]}) FROM STDIN', RowStream(getattr(generator, table)()))
+                loaded = cur.rowcount
+                if 'id' in COLUMNS[table].split(', '):
+                    cur.execute(f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), COALESCE(MAX(id), 1)) FROM {table}")
+                conn.commit()
+                print(f'{table:22s} {loaded:>10} строк  {time.perf_counter() - started:7.1f} с', flush=True)
+            cur.execute('ANALYZE')
+            conn.commit()
+    finally:
+        conn.close()
+
+
+def write_csv(generator: Generator, tables: List[str], directory: str) -> None:
+    os.makedirs(directory, exist_ok=True)
+    for table in tables:
+        started = time.perf_counter()
+        path = os.path.join(directory, f'{table}.tsv')
+        stream = RowStream(getattr(generator, table)())
+        with open(path, 'wb') as f:
+            while True:
+                chunk = stream.read(1 << 20)
+                if not chunk:
+                    break
+                f.write(chunk)
+        print(f'{table:22s} {path}  {time.perf_counter() - started:7.1f} с', flush=True)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Синтетические данные для схемы образовательной платформы')
+    parser.add_argument('--scale', type=float, default=1.0, help='Коэффициент объёмов (1.0 = 100k пользователей)')
+    parser.add_argument('--seed', type=int, default=20240101)
+    parser.add_argument('--tables', nargs='*', choices=TABLES, help='Только указанные таблицы')
+    parser.add_argument('--truncate', action='store_true', help='Очистить таблицы перед загрузкой')
+    parser.add_argument('--csv', metavar='DIR', help='Записать файлы COPY в каталог вместо загрузки в базу')
+    for name in BASE_VOLUMES:
+        parser.add_argument('--' + name.replace('_', '-'), type=int, dest=name, help=f'Переопределить объём {name}')
+    args = parser.parse_args()
+
+    vol = volumes(args.scale, {name: getattr(args, name) for name in BASE_VOLUMES})
+    generator = Generator(args.seed, vol)
+    tables = [table for table in TABLES if not args.tables or table in args.tables]
+    print('Объёмы: ' + ', '.join(f'{name}={value}' for name, value in vol.items()), flush=True)
+
+    if args.csv:
+        write_csv(generator, tables, args.csv)
+    elif os.environ.get('DATABASE_URL'):
+        load_postgres(generator, tables, args.truncate)
+    else:
+        print('Укажите DATABASE_URL или --csv DIR', file=sys.stderr)
+        return 2
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
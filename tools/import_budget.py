@@ -0,0 +1,139 @@
+'''
+Замер холодного импорта облачных функций через python -X importtime
+
+Для каждой функции из backend/func2url.json импортирует index.py в чистом
+интерпретаторе несколько раз, берёт медиану и печатает самые тяжёлые модули.
+Если время импорта превышает бюджет из tools/import_budget.json, скрипт
+завершается с кодом 1 — проверку можно ставить в сборку.
+
+Пример:
+    python tools/import_budget.py
+    python tools/import_budget.py --functions generate-instruction --top 15
+    python tools/import_budget.py --update-budget --headroom 1.5
+'''
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Optional, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BACKEND_DIR = os.path.join(ROOT, 'backend')
+BUDGET_PATH = os.path.join(ROOT, 'tools', 'import_budget.json')
+
+
+def measure_once(function_name: str) -> Tuple[Optional[float], Dict[str, float], str]:
+    '''
+    Один холодный импорт: (время импорта index в мс, cumulative мс по прямым импортам index, ошибка)
+    '''
+    function_dir = os.path.join(BACKEND_DIR, function_name)
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import index'],
+        cwd=function_dir, capture_output=True, text=True,
+        env={**os.environ, 'PYTHONDONTWRITEBYTECODE': '1'}
+    )
+    modules: Dict[str, float] = {}
+    children: Dict[str, float] = {}
+    total = None
+    # importtime печатает модуль после его импортов: прямые импорты index.py — строки
+    # уровня 1 между предыдущим модулем верхнего уровня (site, encodings и т.п. при
+    # старте интерпретатора) и строкой index
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative_us, name = line[len('import time:'):].split('|')
+        level = (len(name) - len(name.lstrip()) - 1) // 2
+        name = name.strip()
+        if level == 1:
+            children[name] = children.get(name, 0.0) + int(cumulative_us) / 1000
+        elif level == 0:
+            if name == 'index':
+                total = int(cumulative_us) / 1000
+                modules = children
+            children = {}
+    if result.returncode != 0:
+        return None, modules, result.stderr.strip().splitlines()[-1]
+    return total, modules, ''
+
+
+def measure(function_name: str, runs: int) -> Dict[str, object]:
+    totals: List[float] = []
+    per_module: Dict[str, List[float]] = {}
+    for _ in range(runs):
+        total, modules, error = measure_once(function_name)
+        if total is None:
+            return {'error': error}
+        totals.append(total)
+        for name, value in modules.items():
+            per_module.setdefault(name, []).append(value)
+    return {
+        'median_ms': round(statistics.median(totals), 2),
+        'min_ms': round(min(totals), 2),
+        'modules': {name: round(statistics.median(values), 2) for name, values in per_module.items()},
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Бюджет холодного импорта облачных функций')
+    parser.add_argument('--functions', nargs='*', help='Только указанные функции')
+    parser.add_argument('--runs', type=int, default=5, help='Сколько раз импортировать каждую функцию')
+    parser.add_argument('--top', type=int, default=8, help='Сколько самых тяжёлых модулей показать')
+    parser.add_argument('--budget', default=BUDGET_PATH)
+    parser.add_argument('--update-budget', action='store_true', help='Записать текущие замеры в бюджет')
+    parser.add_argument('--headroom', type=float, default=1.5, help='Запас при --update-budget')
+    parser.add_argument('--json', help='Сохранить замеры в JSON')
+    args = parser.parse_args()
+
+    with open(os.path.join(BACKEND_DIR, 'func2url.json'), encoding='utf-8') as f:
+        functions = sorted(json.load(f))
+    if args.functions:
+        functions = [name for name in functions if name in args.functions]
+
+    budget: Dict[str, float] = {}
+    if os.path.exists(args.budget):
+        with open(args.budget, encoding='utf-8') as f:
+            budget = json.load(f)
+
+    report = {}
+    failed = False
+    for function_name in functions:
+        result = measure(function_name, args.runs)
+        report[function_name] = result
+        if 'error' in result:
+            print(f'{function_name:22s} ОШИБКА импорта: {result["error"]}')
+            failed = True
+            continue
+
+        limit = budget.get(function_name)
+        status = ''
+        if limit is not None and result['median_ms'] > limit:
+            status = f'  ПРЕВЫШЕН бюджет {limit} мс'
+            failed = True
+        elif limit is not None:
+            status = f'  (бюджет {limit} мс)'
+        print(f'{function_name:22s} {result["median_ms"]:8.2f} мс{status}')
+        heaviest = sorted(result['modules'].items(), key=lambda item: item[1], reverse=True)[:args.top]
+        for name, value in heaviest:
+            print(f'    {value:8.2f} мс  {name}')
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    if args.update_budget:
+        for function_name, result in report.items():
+            if 'median_ms' in result:
+                budget[function_name] = round(result['median_ms'] * args.headroom, 1)
+        with open(args.budget, 'w', encoding='utf-8') as f:
+            json.dump(dict(sorted(budget.items())), f, ensure_ascii=False, indent=2)
+            f.write('\n')
+        print(f'Бюджет обновлён: {args.budget}')
+        return 0
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
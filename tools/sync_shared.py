@@ -0,0 +1,50 @@
+'''
+Синхронизация модулей, общих для нескольких облачных функций
+
+Каждая функция деплоится из своего каталога, поэтому общий модуль лежит
+копией в каждой функции. Источник истины — первый путь в SHARED_MODULES.
+
+Пример:
+    python tools/sync_shared.py          # проверка, код возврата 1 при расхождении
+    python tools/sync_shared.py --write  # скопировать источник во все функции
+'''
+import argparse
+import os
+import shutil
+import sys
+from typing import Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SHARED_MODULES: Dict[str, List[str]] = {
+    'backend/api/instruction_store.py': ['backend/manage-instructions/instruction_store.py'],
+}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Проверка копий общих модулей backend')
+    parser.add_argument('--write', action='store_true', help='Перезаписать копии из источника')
+    args = parser.parse_args()
+
+    stale = []
+    for source, copies in SHARED_MODULES.items():
+        with open(os.path.join(ROOT, source), 'rb') as f:
+            expected = f.read()
+        for copy in copies:
+            path = os.path.join(ROOT, copy)
+            current = open(path, 'rb').read() if os.path.exists(path) else None
+            if current == expected:
+                continue
+            if args.write:
+                shutil.copyfile(os.path.join(ROOT, source), path)
+                print(f'{copy} <- {source}')
+            else:
+                stale.append(f'{copy} отличается от {source}')
+
+    for message in stale:
+        print(message)
+    return 1 if stale else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())